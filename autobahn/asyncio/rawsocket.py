@@ -34,7 +34,7 @@ except ImportError:
 import struct
 import math
 
-from autobahn.util import public, _LazyHexFormatter
+from autobahn.util import public, _LazyHexFormatter, _SendBatcher
 from autobahn.wamp.exception import ProtocolError, SerializationError, TransportLost
 from autobahn.asyncio.util import peer2str, get_serializers
 import txaio
@@ -270,6 +270,8 @@ class RawSocketServerProtocol(RawSocketProtocol):
 # this is transport independent part of WAMP protocol
 class WampRawSocketMixinGeneral(object):
 
+    _batcher = None  # with a batched serializer, collects messages to send in one batch
+
     def _on_handshake_complete(self):
         self.log.debug("WampRawSocketProtocol: Handshake complete")
         try:
@@ -310,7 +312,14 @@ class WampRawSocketMixinGeneral(object):
                 raise SerializationError("WampRawSocketProtocol: unable to serialize WAMP application payload ({0})"
                                          .format(e))
             else:
-                self.sendString(payload)
+                if self._serializer.BATCHED:
+                    # send all messages from this loop iteration as one batch (but
+                    # not larger than the peer accepts)
+                    if self._batcher is None:
+                        self._batcher = _SendBatcher(self.sendString, max_size=self.max_length_send)
+                    self._batcher.add(payload)
+                else:
+                    self.sendString(payload)
                 self.log.debug("WampRawSocketProtocol: TX octets: {octets}", octets=_LazyHexFormatter(payload))
         else:
             raise TransportLost()
@@ -329,6 +338,8 @@ class WampRawSocketMixinAsyncio(object):
     """
 
     def _on_connection_lost(self, exc):
+        if self._batcher is not None:
+            self._batcher.clear()
         try:
             wasClean = exc is None
             self._session.onClose(wasClean)
@@ -342,6 +353,8 @@ class WampRawSocketMixinAsyncio(object):
         Implements :func:`autobahn.wamp.interfaces.ITransport.close`
         """
         if self.isOpen():
+            if self._batcher is not None:
+                self._batcher.flush()
             self.transport.close()
         else:
             raise TransportLost()
@@ -125,6 +125,14 @@ class WebSocketAdapterProtocol(asyncio.Protocol):
     def _closeConnection(self, abort=False):
         self.transport.close()
 
+    def _writeSequence(self, data):
+        self.transport.writelines(data)
+
+    def _resumeSendQueue(self):
+        # the transport tries to write right away, so it is enough to
+        # reenter the loop once, and there is no need for a timer
+        (self.factory.loop or txaio.config.loop).call_soon(self._send)
+
     def _onOpen(self):
         res = self.onOpen()
         if yields(res):
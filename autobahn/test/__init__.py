@@ -36,5 +36,9 @@ class FakeTransport(object):
             raise Exception("Can't write to a closed connection")
         self._written = self._written + msg
 
+    def writeSequence(self, msgs):
+        for msg in msgs:
+            self.write(msg)
+
     def loseConnection(self):
         self._open = False
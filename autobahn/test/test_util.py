@@ -26,9 +26,10 @@
 
 from __future__ import absolute_import
 
+import os
 import unittest2 as unittest
 
-from autobahn.util import IdGenerator
+from autobahn.util import IdGenerator, _SendBatcher
 
 
 class TestIdGenerator(unittest.TestCase):
@@ -46,3 +47,50 @@ class TestIdGenerator(unittest.TestCase):
         self.assertEqual(v, 2 ** 53)
         v = next(g)
         self.assertEqual(v, 1)
+
+
+if os.environ.get('USE_TWISTED', False):
+    import txaio
+    txaio.use_twisted()
+
+    from twisted.internet.task import Clock
+    from txaio.testutil import replace_loop
+
+    class TestSendBatcher(unittest.TestCase):
+
+        def test_batch_per_iteration(self):
+            sent = []
+            with replace_loop(Clock()) as clock:
+                batcher = _SendBatcher(sent.append)
+                batcher.add(b'a')
+                batcher.add(b'bc')
+                self.assertEqual(sent, [])
+                clock.advance(0)
+                self.assertEqual(sent, [b'abc'])
+
+                batcher.add(b'd')
+                clock.advance(0)
+                self.assertEqual(sent, [b'abc', b'd'])
+
+        def test_max_size(self):
+            sent = []
+            with replace_loop(Clock()) as clock:
+                batcher = _SendBatcher(sent.append, max_size=4)
+                for payload in [b'ab', b'cd', b'e', b'fghij', b'k']:
+                    batcher.add(payload)
+                clock.advance(0)
+                self.assertEqual(sent, [b'abcd', b'e', b'fghij', b'k'])
+
+        def test_flush_and_clear(self):
+            sent = []
+            with replace_loop(Clock()) as clock:
+                batcher = _SendBatcher(sent.append)
+                batcher.add(b'a')
+                batcher.flush()
+                self.assertEqual(sent, [b'a'])
+
+                batcher.add(b'b')
+                batcher.clear()
+                clock.advance(0)
+                self.assertEqual(sent, [b'a'])
+                self.assertEqual(clock.getDelayedCalls(), [])
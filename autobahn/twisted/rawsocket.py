@@ -34,7 +34,7 @@ from twisted.internet.error import ConnectionDone
 
 from autobahn.util import public
 from autobahn.twisted.util import peer2str, transport_channel_id
-from autobahn.util import _LazyHexFormatter
+from autobahn.util import _LazyHexFormatter, _SendBatcher
 from autobahn.wamp.exception import ProtocolError, SerializationError, TransportLost
 
 __all__ = (
@@ -89,6 +89,10 @@ class WampRawSocketProtocol(Int32StringReceiver):
         #
         self._max_len_send = None
 
+        # With a batched serializer, collects messages to send in one batch.
+        #
+        self._batcher = None
+
     def _on_handshake_complete(self):
         try:
             self._session = self.factory._factory()
@@ -103,6 +107,8 @@ class WampRawSocketProtocol(Int32StringReceiver):
     def connectionLost(self, reason):
         self.log.debug("WampRawSocketProtocol: connection lost: reason = '{reason}'", reason=reason)
         txaio.resolve(self.is_closed, self)
+        if self._batcher is not None:
+            self._batcher.clear()
         try:
             wasClean = isinstance(reason.value, ConnectionDone)
             self._session.onClose(wasClean)
@@ -138,7 +144,14 @@ class WampRawSocketProtocol(Int32StringReceiver):
                 # all exceptions raised from above should be serialization errors ..
                 raise SerializationError("WampRawSocketProtocol: unable to serialize WAMP application payload ({0})".format(e))
             else:
-                self.sendString(payload)
+                if self._serializer.BATCHED:
+                    # send all messages from this reactor iteration as one batch (but
+                    # not larger than the peer accepts)
+                    if self._batcher is None:
+                        self._batcher = _SendBatcher(self.sendString, max_size=self._max_len_send)
+                    self._batcher.add(payload)
+                else:
+                    self.sendString(payload)
                 self.log.trace("WampRawSocketProtocol: TX octets: {octets}", octets=_LazyHexFormatter(payload))
         else:
             raise TransportLost()
@@ -154,6 +167,8 @@ class WampRawSocketProtocol(Int32StringReceiver):
         Implements :func:`autobahn.wamp.interfaces.ITransport.close`
         """
         if self.isOpen():
+            if self._batcher is not None:
+                self._batcher.flush()
             self.transport.loseConnection()
         else:
             raise TransportLost()
@@ -26,6 +26,7 @@
 
 from __future__ import absolute_import, print_function
 
+import struct
 import unittest2 as unittest
 
 from autobahn.twisted.rawsocket import (WampRawSocketServerFactory,
@@ -33,7 +34,11 @@ from autobahn.twisted.rawsocket import (WampRawSocketServerFactory,
                                         WampRawSocketClientFactory,
                                         WampRawSocketClientProtocol)
 from autobahn.test import FakeTransport
+from autobahn.wamp import message
+from autobahn.wamp.serializer import JsonSerializer
 from mock import Mock
+from twisted.internet.task import Clock
+from txaio.testutil import replace_loop
 
 
 class RawSocketHandshakeTests(unittest.TestCase):
@@ -70,3 +75,44 @@ class RawSocketHandshakeTests(unittest.TestCase):
         # onOpen is called on the session
         session_mock.onOpen.assert_called_once_with(p)
         server_session_mock.onOpen.assert_called_once_with(sp)
+
+
+class RawSocketBatchingTests(unittest.TestCase):
+
+    def test_batch_per_iteration(self):
+        """
+        With a batched serializer, all messages sent within one reactor
+        iteration go out in one frame.
+        """
+        session_mock = Mock()
+        t = FakeTransport()
+        f = WampRawSocketClientFactory(lambda: session_mock, serializer=JsonSerializer(batched=True))
+        p = WampRawSocketClientProtocol()
+        p.transport = t
+        p.factory = f
+
+        server_session_mock = Mock()
+        st = FakeTransport()
+        sf = WampRawSocketServerFactory(lambda: server_session_mock, serializers=[JsonSerializer(batched=True)])
+        sp = WampRawSocketServerProtocol()
+        sp.transport = st
+        sp.factory = sf
+
+        sp.connectionMade()
+        p.connectionMade()
+        sp.dataReceived(t._written)
+        p.dataReceived(st._written)
+        t._written = b''
+
+        with replace_loop(Clock()) as clock:
+            for i in range(3):
+                p.send(message.Publish(i + 1, u'com.example.topic'))
+            self.assertEqual(t._written, b'')
+
+            clock.advance(0)
+
+        # one frame: its length prefix, and the messages each followed by a separator
+        self.assertEqual(struct.unpack('!L', t._written[:4])[0], len(t._written) - 4)
+        self.assertEqual(t._written.count(b'\x18'), 3)
+        sp.dataReceived(t._written)
+        self.assertEqual([call[0][0].request for call in server_session_mock.onMessage.call_args_list], [1, 2, 3])
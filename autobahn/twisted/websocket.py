@@ -137,6 +137,16 @@ class WebSocketAdapterProtocol(twisted.internet.protocol.Protocol):
             # e.g. ProcessProtocol lacks abortConnection()
             self.transport.loseConnection()
 
+    def _writeSequence(self, data):
+        self.transport.writeSequence(data)
+
+    def _resumeSendQueue(self):
+        # everything queued was written already, so it is enough to reenter the
+        # reactor once. note that the send queue must not register a producer
+        # of its own with the transport, as that would keep application code
+        # from registering one meanwhile
+        txaio.call_later(0, self._send)
+
     def _onOpen(self):
         self.onOpen()
 
@@ -835,3 +835,90 @@ class _LazyHexFormatter(object):
 
     def __str__(self):
         return binascii.hexlify(self.obj).decode('ascii')
+
+
+class _LazyPrettyFormatter(object):
+    """
+    This is used to avoid calling pprint.pformat() on objects given to
+    log.debug() calls unless debug is active. Like::
+
+        self.log.debug(
+            "Some config: {config}",
+            config=_LazyPrettyFormatter(config),
+        )
+    """
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return pformat(self.obj)
+
+
+class _SendBatcher(object):
+    """
+    Collects the payloads of WAMP messages sent with a batched serializer, and
+    sends everything collected as one payload in the next reactor/loop
+    iteration (or earlier, once the batch would grow beyond a maximum size).
+    Since a batched payload is just the concatenation of the serialized
+    messages, all messages produced within one iteration go out as one
+    WebSocket message or RawSocket frame.
+
+    FOR INTERNAL USE ONLY!
+    """
+    __slots__ = ('_send', '_max_size', '_payloads', '_size', '_call')
+
+    def __init__(self, send, max_size=None):
+        """
+
+        :param send: Called with every batch payload to send.
+        :type send: callable
+        :param max_size: Maximum size of a batch in bytes (a single message
+            larger than this is still sent, as a batch on its own).
+        :type max_size: int or None
+        """
+        self._send = send
+        self._max_size = max_size
+        self._payloads = []
+        self._size = 0
+        self._call = None
+
+    def add(self, payload):
+        if self._max_size is not None and self._size + len(payload) > self._max_size:
+            self.flush()
+        self._payloads.append(payload)
+        self._size += len(payload)
+        if self._call is None:
+            self._call = txaio.call_later(0, self._onTimeout)
+
+    def _onTimeout(self):
+        self._call = None
+        self.flush()
+
+    def flush(self):
+        """
+        Send everything collected right away.
+        """
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+
+        if self._payloads:
+            payloads = self._payloads
+            self._payloads = []
+            self._size = 0
+            if len(payloads) == 1:
+                self._send(payloads[0])
+            else:
+                self._send(b''.join(payloads))
+
+    def clear(self):
+        """
+        Drop everything collected (e.g. when the transport has gone away).
+        """
+        if self._call is not None:
+            self._call.cancel()
+            self._call = None
+        self._payloads = []
+        self._size = 0
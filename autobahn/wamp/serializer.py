@@ -26,6 +26,8 @@
 
 from __future__ import absolute_import
 
+import io
+import os
 import six
 import struct
 
@@ -40,6 +42,40 @@ __all__ = ['Serializer',
            'JsonSerializer']
 
 
+def _unpack_batched(payload, unpack):
+    """
+    Unpack a batch of messages each prefixed with its length (as a 32 bit
+    unsigned integer in network byte order). ``unpack`` is called with a
+    memoryview of every message, so no message is copied from the payload
+    (unless ``unpack`` does).
+
+    FOR INTERNAL USE ONLY!
+    """
+    msgs = []
+    N = len(payload)
+    view = memoryview(payload)
+    i = 0
+    while i < N:
+        # read message length prefix
+        if i + 4 > N:
+            raise Exception("batch format error [1]")
+        l = struct.unpack_from("!L", payload, i)[0]
+
+        # read message data
+        if i + 4 + l > N:
+            raise Exception("batch format error [2]")
+
+        # append parsed raw message
+        msgs.append(unpack(view[i + 4:i + 4 + l]))
+
+        # advance until everything consumed
+        i = i + 4 + l
+
+    if i != N:
+        raise Exception("batch format error [3]")
+    return msgs
+
+
 class Serializer(object):
     """
     Base class for WAMP serializers. A WAMP serializer is the core glue between
@@ -77,6 +113,12 @@ class Serializer(object):
     Mapping of WAMP message type codes to WAMP message classes.
     """
 
+    BATCHED = False
+    """
+    Flag that indicates whether this serializer operates in batched mode: then,
+    the concatenation of serialized messages is a valid payload too.
+    """
+
     def __init__(self, serializer):
         """
         Constructor.
@@ -150,37 +192,34 @@ class _WAMPJsonEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, obj)
 
 
-#
-# the following is a hack. see http://bugs.python.org/issue29992
-#
-
-from json import scanner
-from json.decoder import scanstring
-
-
-def _parse_string(*args, **kwargs):
-    s, idx = scanstring(*args, **kwargs)
-    if s and s[0] == u'\x00':
-        s = base64.b64decode(s[1:])
-    return s, idx
-
-
-class _WAMPJsonDecoder(json.JSONDecoder):
-
-    def __init__(self, *args, **kwargs):
-        json.JSONDecoder.__init__(self, *args, **kwargs)
-        self.parse_string = _parse_string
-
-        # we need to recreate the internal scan function ..
-        self.scan_once = scanner.py_make_scanner(self)
-
-        # .. and we have to explicitly use the Py version,
-        # not the C version, as the latter won't work
-        # self.scan_once = scanner.make_scanner(self)
+def _unpack_binary(obj):
+    """
+    Restore binary strings in a decoded JSON value. Binary strings are sent
+    as a string with a leading ``\\x00``, followed by the Base64 encoded bytes.
+    Lists and dicts are changed in place (but dict keys stay strings).
+    """
+    if type(obj) == list:
+        for i, value in enumerate(obj):
+            if type(value) in (list, dict, six.text_type):
+                obj[i] = _unpack_binary(value)
+    elif type(obj) == dict:
+        for key, value in obj.items():
+            if type(value) in (list, dict, six.text_type):
+                obj[key] = _unpack_binary(value)
+    elif type(obj) == six.text_type and obj and obj[0] == u'\x00':
+        obj = base64.b64decode(obj[1:])
+    return obj
 
 
 def _loads(s):
-    return json.loads(s, cls=_WAMPJsonDecoder)
+    # parsing uses the C scanner of the json module, and binary strings are
+    # restored afterwards - but only if there can be any: a \x00 in a JSON
+    # string must be escaped, and that is what we look for (a false positive
+    # merely costs a pass over the decoded value)
+    obj = json.loads(s)
+    if u'\\u0000' in s:
+        obj = _unpack_binary(obj)
+    return obj
 
 
 def _dumps(obj):
@@ -194,33 +233,173 @@ def _dumps(obj):
 _json = json
 
 
+def _binary_default(obj):
+    # encode binary strings the WAMP way, for JSON libraries taking a default function
+    if isinstance(obj, six.binary_type):
+        return u'\x00' + base64.b64encode(obj).decode('ascii')
+    raise TypeError("{0!r} is not JSON serializable".format(obj))
+
+
+def _json_dumps(obj):
+    return _dumps(obj).encode('utf8')
+
+
+def _json_loads(data):
+    return _loads(data.decode('utf8'))
+
+
+def _add_json_backend(name, module, dumps, loads):
+    """
+    Register a JSON backend, given its ``dumps`` (object to UTF-8 encoded JSON)
+    and ``loads`` (the other way round) functions. Binary strings are restored
+    after ``loads``, and where a backend doesn't handle an object or payload
+    (e.g. integers beyond 64 bits, dict keys which are not strings, or binary
+    strings at all), the stdlib JSON module takes over. Backends must raise
+    an error rather than produce a different result, so that results are the
+    same with all backends.
+    """
+    def _backend_dumps(obj):
+        try:
+            return dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            return _json_dumps(obj)
+
+    def _backend_loads(data):
+        try:
+            obj = loads(data)
+        except ValueError:
+            return _json_loads(data)
+        if b'\\u0000' in data:
+            obj = _unpack_binary(obj)
+        return obj
+
+    JSON_BACKENDS[name] = {
+        u'module': module,
+        u'dumps': _backend_dumps,
+        u'loads': _backend_loads,
+    }
+
+
+# JSON backend to use by default: "orjson", "ujson", "rapidjson" or "json". When
+# not set explicitly via the environment, the first one available is used.
+_JSON_BACKEND_WANTED = os.environ.get('AUTOBAHN_JSON_BACKEND', None)
+
+JSON_BACKENDS = {
+    u'json': {
+        u'module': _json,
+        u'dumps': _json_dumps,
+        u'loads': _json_loads,
+    }
+}
+"""
+The JSON backends available, mapping the backend name to a dict with the
+JSON ``module``, and the ``dumps`` and ``loads`` functions used.
+"""
+
+try:
+    import orjson
+except ImportError:
+    pass
+else:
+    # an integer literal of 19 digits or more might not fit into 64 bits. to find
+    # one, all digits are mapped to "0" first (which is much faster than a regex)
+    _DIGITS_TO_ZERO = bytes(bytearray(0x30 if 0x30 <= i <= 0x39 else i for i in range(256)))
+    _LONG_INTEGER = b'0' * 19
+
+    def _orjson_dumps(obj):
+        # orjson encodes NaN and infinities as null, so let the stdlib JSON
+        # module encode anything with a null in it (which is rare in WAMP)
+        data = orjson.dumps(obj, default=_binary_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        if b'null' in data:
+            raise ValueError("null or non-finite float")
+        return data
+
+    def _orjson_loads(data):
+        # orjson decodes integers beyond 64 bits as floats
+        if _LONG_INTEGER in data.translate(_DIGITS_TO_ZERO):
+            raise ValueError("integer literal beyond 64 bits")
+        return orjson.loads(data)
+
+    _add_json_backend(u'orjson', orjson, _orjson_dumps, _orjson_loads)
+
+try:
+    import ujson
+except ImportError:
+    pass
+else:
+    # binary strings are rejected here, and then handled by the stdlib JSON module
+    _add_json_backend(u'ujson',
+                      ujson,
+                      lambda obj: ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                                              reject_bytes=True).encode('utf8'),
+                      ujson.loads)
+
+try:
+    import rapidjson
+except ImportError:
+    pass
+else:
+    _add_json_backend(u'rapidjson',
+                      rapidjson,
+                      lambda obj: rapidjson.dumps(obj, ensure_ascii=False, default=_binary_default,
+                                                  bytes_mode=rapidjson.BM_NONE).encode('utf8'),
+                      lambda data: rapidjson.loads(data.decode('utf8')))
+
+JSON_BACKEND = None
+"""
+The JSON backend used by default: ``u'orjson'``, ``u'ujson'``, ``u'rapidjson'`` or ``u'json'``.
+"""
+
+for _backend in [u'orjson', u'ujson', u'rapidjson', u'json']:
+    if _backend in JSON_BACKENDS and _JSON_BACKEND_WANTED in (None, _backend):
+        JSON_BACKEND = _backend
+        break
+else:
+    JSON_BACKEND = u'json'
+
+
 class JsonObjectSerializer(object):
 
-    JSON_MODULE = _json
+    JSON_BACKEND = JSON_BACKEND
+    """
+    The JSON backend used (see :data:`autobahn.wamp.serializer.JSON_BACKENDS`).
+    """
+
+    JSON_MODULE = JSON_BACKENDS[JSON_BACKEND][u'module']
     """
-    The JSON module used (now only stdlib).
+    The JSON module used (that of the JSON backend).
     """
 
     NAME = u'json'
 
     BINARY = False
 
-    def __init__(self, batched=False):
+    def __init__(self, batched=False, backend=None):
         """
         Ctor.
 
         :param batched: Flag that controls whether serializer operates in batched mode.
         :type batched: bool
+
+        :param backend: The JSON backend to use (default: the fastest one available, see
+            :data:`autobahn.wamp.serializer.JSON_BACKEND`).
+        :type backend: str or None
         """
         self._batched = batched
+        if backend is not None and backend != self.JSON_BACKEND:
+            if backend not in JSON_BACKENDS:
+                raise Exception("JSON backend '{0}' not available (available: {1})".format(
+                    backend, sorted(JSON_BACKENDS)))
+            self.JSON_BACKEND = backend
+            self.JSON_MODULE = JSON_BACKENDS[backend][u'module']
+        self._dumps = JSON_BACKENDS[self.JSON_BACKEND][u'dumps']
+        self._loads = JSON_BACKENDS[self.JSON_BACKEND][u'loads']
 
     def serialize(self, obj):
         """
         Implements :func:`autobahn.wamp.interfaces.IObjectSerializer.serialize`
         """
-        s = _dumps(obj)
-        if isinstance(s, six.text_type):
-            s = s.encode('utf8')
+        s = self._dumps(obj)
         if self._batched:
             return s + b'\30'
         else:
@@ -231,12 +410,15 @@ class JsonObjectSerializer(object):
         Implements :func:`autobahn.wamp.interfaces.IObjectSerializer.unserialize`
         """
         if self._batched:
-            chunks = payload.split(b'\30')[:-1]
+            # splitting (in C) is faster than decoding at offsets into the payload
+            chunks = payload.split(b'\30')
+            if chunks.pop():
+                raise Exception("batch format error (trailing data)")
         else:
             chunks = [payload]
         if len(chunks) == 0:
             raise Exception("batch format error")
-        return [_loads(data.decode('utf8')) for data in chunks]
+        return [self._loads(data) for data in chunks]
 
 
 IObjectSerializer.register(JsonObjectSerializer)
@@ -262,35 +444,65 @@ class JsonSerializer(Serializer):
     WAMP-over-Longpoll HTTP fallback.
     """
 
-    def __init__(self, batched=False):
+    def __init__(self, batched=False, backend=None):
         """
         Ctor.
 
         :param batched: Flag to control whether to put this serialized into batched mode.
         :type batched: bool
+
+        :param backend: The JSON backend to use (default: the fastest one available).
+        :type backend: str or None
         """
-        Serializer.__init__(self, JsonObjectSerializer(batched=batched))
+        Serializer.__init__(self, JsonObjectSerializer(batched=batched, backend=backend))
         if batched:
             self.SERIALIZER_ID = u"json.batched"
+            self.BATCHED = True
 
 
 ISerializer.register(JsonSerializer)
 
 
-# MsgPack serialization depends on the `u-msgpack` package being available
+# MsgPack serialization depends on the `msgpack` package (with its C extension)
+# or the pure Python `u-msgpack` package being available
+# https://pypi.python.org/pypi/msgpack
 # https://pypi.python.org/pypi/u-msgpack-python
 # https://github.com/vsergeev/u-msgpack-python
 #
-try:
-    import umsgpack
-except ImportError:
-    pass
-else:
+# `msgpack` is preferred, unless the environment variable AUTOBAHN_USE_UMSGPACK
+# is set. With either, WAMP strings are MsgPack str, and binaries MsgPack bin.
+#
+_MSGPACK_MODULE = None
+
+if not os.environ.get('AUTOBAHN_USE_UMSGPACK', None):
+    try:
+        import msgpack
+    except ImportError:
+        pass
+    else:
+        # raw=False (to unpack MsgPack str to unicode) needs msgpack 0.5.2
+        if msgpack.version >= (0, 5, 2):
+            _MSGPACK_MODULE = msgpack
+
+if _MSGPACK_MODULE is None:
+    try:
+        import umsgpack
+    except ImportError:
+        pass
+    else:
+        _MSGPACK_MODULE = umsgpack
+
+if _MSGPACK_MODULE is not None:
 
     class MsgPackObjectSerializer(object):
 
         NAME = u'msgpack'
 
+        MSGPACK_MODULE = _MSGPACK_MODULE
+        """
+        The MsgPack module used: ``msgpack`` or ``umsgpack``.
+        """
+
         BINARY = True
         """
         Flag that indicates whether this serializer needs a binary clean transport.
@@ -304,11 +516,27 @@ else:
             """
             self._batched = batched
 
+            module = self.MSGPACK_MODULE
+            if module.__name__ == 'msgpack':
+                options = {'raw': False}
+                if module.version >= (0, 6, 1):
+                    # like u-msgpack, don't restrict the types of map keys
+                    options['strict_map_key'] = False
+
+                # a packer reuses its buffer, which is faster than packb(), and
+                # unpackb() unpacks from a memoryview without copying
+                self._packb = module.Packer(use_bin_type=True).pack
+                self._unpackb = lambda data: module.unpackb(data, **options)
+            else:
+                self._packb = module.packb
+                self._unpackb = lambda data: module.unpackb(
+                    data.tobytes() if isinstance(data, memoryview) else data)
+
         def serialize(self, obj):
             """
             Implements :func:`autobahn.wamp.interfaces.IObjectSerializer.serialize`
             """
-            data = umsgpack.packb(obj)
+            data = self._packb(obj)
             if self._batched:
                 return struct.pack("!L", len(data)) + data
             else:
@@ -320,32 +548,10 @@ else:
             """
 
             if self._batched:
-                msgs = []
-                N = len(payload)
-                i = 0
-                while i < N:
-                    # read message length prefix
-                    if i + 4 > N:
-                        raise Exception("batch format error [1]")
-                    l = struct.unpack("!L", payload[i:i + 4])[0]
-
-                    # read message data
-                    if i + 4 + l > N:
-                        raise Exception("batch format error [2]")
-                    data = payload[i + 4:i + 4 + l]
-
-                    # append parsed raw message
-                    msgs.append(umsgpack.unpackb(data))
-
-                    # advance until everything consumed
-                    i = i + 4 + l
-
-                if i != N:
-                    raise Exception("batch format error [3]")
-                return msgs
+                return _unpack_batched(payload, self._unpackb)
 
             else:
-                unpacked = umsgpack.unpackb(payload)
+                unpacked = self._unpackb(payload)
                 return [unpacked]
 
     IObjectSerializer.register(MsgPackObjectSerializer)
@@ -382,26 +588,72 @@ else:
             Serializer.__init__(self, MsgPackObjectSerializer(batched=batched))
             if batched:
                 self.SERIALIZER_ID = u"msgpack.batched"
+                self.BATCHED = True
 
     ISerializer.register(MsgPackSerializer)
 
     __all__.append('MsgPackSerializer')
 
 
-# CBOR serialization depends on the `cbor` package being available
+# CBOR serialization depends on the `cbor2` or the `cbor` package being available
+# https://pypi.python.org/pypi/cbor2
+# https://github.com/agronholm/cbor2
 # https://pypi.python.org/pypi/cbor
 # https://bitbucket.org/bodhisnarkva/cbor
 #
-try:
-    import cbor
-except ImportError:
-    pass
-else:
+# `cbor2` is preferred, unless the environment variable AUTOBAHN_USE_CBOR is set.
+#
+_CBOR_MODULE = None
+
+if not os.environ.get('AUTOBAHN_USE_CBOR', None):
+    try:
+        import cbor2
+    except ImportError:
+        pass
+    else:
+        _CBOR_MODULE = cbor2
+
+if _CBOR_MODULE is None:
+    try:
+        import cbor
+    except ImportError:
+        pass
+    else:
+        _CBOR_MODULE = cbor
+
+if _CBOR_MODULE is not None:
+
+    _CBOR_BINARY_TAGS = frozenset([
+        21,  # expected conversion to base64url encoding
+        22,  # expected conversion to base64 encoding
+        23,  # expected conversion to base16 encoding
+        24,  # encoded CBOR data item
+        64,  # uint8 typed array
+    ])
+
+    def _cbor2_tag_hook(*args):
+        """
+        Tag hook for cbor2: byte strings with a tag that only hints at their
+        content are decoded as plain binaries. Other unknown tags are kept.
+
+        FOR INTERNAL USE ONLY!
+        """
+        # depending on the version of cbor2, the hook is called with (decoder, tag)
+        # or with (tag, immutable)
+        tag = args[0] if isinstance(args[0], cbor2.CBORTag) else args[1]
+        if tag.tag in _CBOR_BINARY_TAGS and isinstance(tag.value, six.binary_type):
+            return tag.value
+        return tag
 
     class CBORObjectSerializer(object):
 
         NAME = u'cbor'
 
+        CBOR_MODULE = _CBOR_MODULE
+        """
+        The CBOR module used: ``cbor2`` or ``cbor``.
+        """
+
         BINARY = True
         """
         Flag that indicates whether this serializer needs a binary clean transport.
@@ -416,11 +668,23 @@ else:
             """
             self._batched = batched
 
+            module = self.CBOR_MODULE
+            self._dumps = module.dumps
+            if module.__name__ == 'cbor2':
+                self._loads = lambda data: module.loads(data, tag_hook=_cbor2_tag_hook)
+                self._loads_batched = self._cbor2_loads_batched
+
+                # creating a decoder is costly, so one is reused for all batches
+                self._decoder = module.CBORDecoder(io.BytesIO(), tag_hook=_cbor2_tag_hook)
+            else:
+                self._loads = module.loads
+                self._loads_batched = self._cbor_loads_batched
+
         def serialize(self, obj):
             """
             Implements :func:`autobahn.wamp.interfaces.IObjectSerializer.serialize`
             """
-            data = cbor.dumps(obj)
+            data = self._dumps(obj)
             if self._batched:
                 return struct.pack("!L", len(data)) + data
             else:
@@ -432,34 +696,50 @@ else:
             """
 
             if self._batched:
-                msgs = []
-                N = len(payload)
-                i = 0
-                while i < N:
-                    # read message length prefix
-                    if i + 4 > N:
-                        raise Exception("batch format error [1]")
-                    l = struct.unpack("!L", payload[i:i + 4])[0]
-
-                    # read message data
-                    if i + 4 + l > N:
-                        raise Exception("batch format error [2]")
-                    data = payload[i + 4:i + 4 + l]
-
-                    # append parsed raw message
-                    msgs.append(cbor.loads(data))
-
-                    # advance until everything consumed
-                    i = i + 4 + l
-
-                if i != N:
-                    raise Exception("batch format error [3]")
-                return msgs
+                return self._loads_batched(payload)
 
             else:
-                unpacked = cbor.loads(payload)
+                unpacked = self._loads(payload)
                 return [unpacked]
 
+        def _cbor2_loads_batched(self, payload):
+            # decode all messages streaming from the payload (which a BytesIO shares
+            # rather than copies)
+            msgs = []
+            N = len(payload)
+            fp = io.BytesIO(payload)
+            decoder = self._decoder
+            decoder.fp = fp
+            i = 0
+            while i < N:
+                # read message length prefix
+                if i + 4 > N:
+                    raise Exception("batch format error [1]")
+                l = struct.unpack_from("!L", payload, i)[0]
+
+                # read message data
+                if i + 4 + l > N:
+                    raise Exception("batch format error [2]")
+                fp.seek(i + 4)
+
+                # append parsed raw message
+                msgs.append(decoder.decode())
+
+                # advance until everything consumed
+                i = i + 4 + l
+
+                # the message must take exactly the length announced
+                if fp.tell() != i:
+                    raise Exception("batch format error [4]")
+
+            if i != N:
+                raise Exception("batch format error [3]")
+            return msgs
+
+        def _cbor_loads_batched(self, payload):
+            # cbor only decodes from bytes (and is slower decoding from a file)
+            return _unpack_batched(payload, lambda data: self._loads(data.tobytes()))
+
     IObjectSerializer.register(CBORObjectSerializer)
 
     __all__.append('CBORObjectSerializer')
@@ -494,6 +774,7 @@ else:
             Serializer.__init__(self, CBORObjectSerializer(batched=batched))
             if batched:
                 self.SERIALIZER_ID = u"cbor.batched"
+                self.BATCHED = True
 
     ISerializer.register(CBORSerializer)
 
@@ -542,29 +823,7 @@ else:
             """
 
             if self._batched:
-                msgs = []
-                N = len(payload)
-                i = 0
-                while i < N:
-                    # read message length prefix
-                    if i + 4 > N:
-                        raise Exception("batch format error [1]")
-                    l = struct.unpack("!L", payload[i:i + 4])[0]
-
-                    # read message data
-                    if i + 4 + l > N:
-                        raise Exception("batch format error [2]")
-                    data = payload[i + 4:i + 4 + l]
-
-                    # append parsed raw message
-                    msgs.append(ubjson.loadb(data))
-
-                    # advance until everything consumed
-                    i = i + 4 + l
-
-                if i != N:
-                    raise Exception("batch format error [3]")
-                return msgs
+                return _unpack_batched(payload, ubjson.loadb)
 
             else:
                 unpacked = ubjson.loadb(payload)
@@ -604,6 +863,7 @@ else:
             Serializer.__init__(self, UBJSONObjectSerializer(batched=batched))
             if batched:
                 self.SERIALIZER_ID = u"ubjson.batched"
+                self.BATCHED = True
 
     ISerializer.register(UBJSONSerializer)
 
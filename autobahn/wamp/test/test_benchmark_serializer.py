@@ -0,0 +1,303 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""
+Conformance and speed benchmark of the WAMP serializers.
+
+Every JSON backend in :data:`autobahn.wamp.serializer.JSON_BACKENDS` is run
+over the WAMP messages of :mod:`autobahn.wamp.test.test_serializer`: its output
+must be understood by the stdlib JSON backend (and the other way round), and
+the time to serialize and unserialize a message is measured. The same is done
+for MsgPack, with the msgpack module against the u-msgpack module, and for
+CBOR, with the cbor2 module against the cbor module (over EVENT, CALL and
+RESULT messages of typical sizes too). Finally, every serializer in batched
+mode is run over batches of messages, against its unbatched mode, and
+sending WAMP messages over WebSocket is run with and without batching.
+
+This is skipped by default. To run it, set the environment variable
+``AUTOBAHN_BENCHMARK``, e.g.
+
+    AUTOBAHN_BENCHMARK=1 trial autobahn.wamp.test.test_benchmark_serializer
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import unittest2 as unittest
+
+try:
+    import umsgpack
+except ImportError:
+    umsgpack = None
+
+try:
+    import cbor
+except ImportError:
+    cbor = None
+
+from autobahn.wamp import message
+from autobahn.wamp import serializer
+from autobahn.wamp.websocket import WampWebSocketProtocol
+from autobahn.wamp.test.test_serializer import generate_test_messages
+from autobahn.wamp.test.test_serializer import generate_test_messages_binary
+from autobahn.websocket.test.test_benchmark import BenchmarkServerProtocol, _open
+from autobahn.websocket.test.test_benchmark import timeit
+from autobahn.websocket.protocol import WebSocketServerFactory
+
+if os.environ.get('USE_TWISTED', False):
+    import txaio
+    from twisted.internet.task import Clock
+    from txaio.testutil import replace_loop
+
+
+def create_messages():
+    """
+    Create the WAMP messages to run the serializers over, as lists (before
+    serialization).
+    """
+    messages = generate_test_messages() + generate_test_messages_binary()
+    return [msg.marshal() for _, msg in messages]
+
+
+def create_sized_messages():
+    """
+    Create WAMP messages of typical sizes, as lists (before serialization): a
+    dict mapping the message kind to a list of messages.
+    """
+    items = [{u'id': i, u'name': u'item %d' % i, u'price': i * 1.25, u'image': b'\x01' * 32} for i in range(50)]
+    return {
+        'event': [[36, 5512315355, 4429313566 + i, {}, [i * 0.5]] for i in range(10)],
+        'call': [[48, 4429313566 + i, {}, u'com.example.procedure%d' % i, [1, 2, 3],
+                  {u'foo': u'bar', u'baz': [1.5, None, True]}] for i in range(10)],
+        'result': [[50, 4429313566 + i, {}, items[:i * 5 + 5]] for i in range(10)],
+    }
+
+
+def check_conformance(ser, reference, messages):
+    """
+    Check that what one object serializer produces is understood by another
+    (and vice versa). Returns the number of messages that don't come through.
+    """
+    failures = 0
+    for msg in messages:
+        for encoder, decoder in [(ser, reference), (reference, ser)]:
+            try:
+                if decoder.unserialize(encoder.serialize(msg)) != [msg]:
+                    failures += 1
+            except Exception:
+                failures += 1
+    return failures
+
+
+def measure_speed(ser, messages, repeat=100):
+    """
+    Measure the time an object serializer takes to serialize and to
+    unserialize a message, in microseconds (averaged over all messages).
+    """
+    payloads = [ser.serialize(msg) for msg in messages]
+
+    def serialize():
+        for _ in range(repeat):
+            for msg in messages:
+                ser.serialize(msg)
+
+    def unserialize():
+        for _ in range(repeat):
+            for payload in payloads:
+                ser.unserialize(payload)
+
+    count = float(repeat * len(messages))
+    return timeit(serialize) / count * 1000000, timeit(unserialize) / count * 1000000
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class JsonBackendBenchmark(unittest.TestCase):
+    """
+    Conformance (with the stdlib JSON backend) and speed of all JSON backends.
+    """
+
+    def test_backends(self):
+        messages = create_messages()
+        reference = serializer.JsonObjectSerializer(backend=u'json')
+        print()
+        print('{:>12} {:>10} {:>16} {:>18}'.format('backend', 'failures', 'serialize [us]', 'unserialize [us]'))
+        for backend in sorted(serializer.JSON_BACKENDS):
+            ser = serializer.JsonObjectSerializer(backend=backend)
+            failures = check_conformance(ser, reference, messages)
+            serialize, unserialize = measure_speed(ser, messages)
+            print('{:>12} {:>10} {:>16.2f} {:>18.2f}'.format(backend, failures, serialize, unserialize))
+            self.assertEqual(failures, 0)
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(not hasattr(serializer, 'MsgPackObjectSerializer') or umsgpack is None,
+                 'MsgPack or u-msgpack not available')
+class MsgPackBenchmark(unittest.TestCase):
+    """
+    Conformance (with u-msgpack) and speed of the MsgPack serializer, in
+    batched mode too.
+    """
+
+    def test_modules(self):
+        class UMsgPackObjectSerializer(serializer.MsgPackObjectSerializer):
+            MSGPACK_MODULE = umsgpack
+
+        messages = create_messages()
+        print()
+        print('{:>12} {:>8} {:>10} {:>16} {:>18}'.format(
+            'module', 'batched', 'failures', 'serialize [us]', 'unserialize [us]'))
+        for batched in [False, True]:
+            reference = UMsgPackObjectSerializer(batched=batched)
+            for klass in [UMsgPackObjectSerializer, serializer.MsgPackObjectSerializer]:
+                ser = klass(batched=batched)
+                failures = check_conformance(ser, reference, messages)
+                serialize, unserialize = measure_speed(ser, messages)
+                print('{:>12} {:>8} {:>10} {:>16.2f} {:>18.2f}'.format(
+                    ser.MSGPACK_MODULE.__name__, batched, failures, serialize, unserialize))
+                self.assertEqual(failures, 0)
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(not hasattr(serializer, 'CBORObjectSerializer') or cbor is None,
+                 'CBOR or cbor not available')
+class CBORBenchmark(unittest.TestCase):
+    """
+    Conformance (with the cbor module) and speed of the CBOR serializer, in
+    batched mode too.
+    """
+
+    def test_modules(self):
+        class LegacyCBORObjectSerializer(serializer.CBORObjectSerializer):
+            CBOR_MODULE = cbor
+
+        corpora = create_sized_messages()
+        corpora['all'] = create_messages()
+        print()
+        print('{:>8} {:>8} {:>8} {:>10} {:>16} {:>18}'.format(
+            'messages', 'module', 'batched', 'failures', 'serialize [us]', 'unserialize [us]'))
+        for corpus in ['event', 'call', 'result', 'all']:
+            messages = corpora[corpus]
+            for batched in [False, True]:
+                reference = LegacyCBORObjectSerializer(batched=batched)
+                for klass in [LegacyCBORObjectSerializer, serializer.CBORObjectSerializer]:
+                    ser = klass(batched=batched)
+                    failures = check_conformance(ser, reference, messages)
+                    serialize, unserialize = measure_speed(ser, messages)
+                    print('{:>8} {:>8} {:>8} {:>10} {:>16.2f} {:>18.2f}'.format(
+                        corpus, ser.CBOR_MODULE.__name__, batched, failures, serialize, unserialize))
+                    self.assertEqual(failures, 0)
+
+
+def create_object_serializers():
+    """
+    Create all WAMP object serializers available, each unbatched and batched.
+    """
+    serializers = []
+    for name in ['JsonObjectSerializer', 'MsgPackObjectSerializer', 'CBORObjectSerializer', 'UBJSONObjectSerializer']:
+        klass = getattr(serializer, name, None)
+        if klass is not None:
+            serializers.append((klass(), klass(batched=True)))
+    return serializers
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class BatchedBenchmark(unittest.TestCase):
+    """
+    Time to unserialize a message in batches of messages, against unbatched.
+    """
+
+    def test_batches(self):
+        messages = create_messages()
+        print()
+        print('{:>12} {:>10} {:>16} {:>16}'.format('serializer', 'batch', 'unbatched [us]', 'batched [us]'))
+        for unbatched, batched in create_object_serializers():
+            for size in [10, 100]:
+                msgs = (messages * (size // len(messages) + 1))[:size]
+                payloads = [unbatched.serialize(msg) for msg in msgs]
+                batch = b''.join(batched.serialize(msg) for msg in msgs)
+                self.assertEqual(batched.unserialize(batch), msgs)
+
+                def unserialize_unbatched():
+                    for _ in range(100):
+                        for payload in payloads:
+                            unbatched.unserialize(payload)
+
+                def unserialize_batched():
+                    for _ in range(100):
+                        batched.unserialize(batch)
+
+                count = float(100 * size)
+                print('{:>12} {:>10} {:>16.2f} {:>16.2f}'.format(
+                    batched.NAME, size,
+                    timeit(unserialize_unbatched) / count * 1000000, timeit(unserialize_batched) / count * 1000000))
+
+
+class BenchmarkWampServerProtocol(WampWebSocketProtocol, BenchmarkServerProtocol):
+    """
+    WAMP-over-WebSocket server protocol which sends into a collecting transport.
+    """
+
+    class _Session(object):
+        _authid = None
+        _session_id = None
+
+    def __init__(self, ser):
+        BenchmarkServerProtocol.__init__(self)
+        self._serializer = ser
+        self._session = self._Session()
+        self.log = txaio.make_logger()
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(not os.environ.get('USE_TWISTED', False), 'only for Twisted')
+class SendBatchingBenchmark(unittest.TestCase):
+    """
+    Time to send WAMP events over WebSocket (all sent within one reactor
+    iteration), with the JSON serializer unbatched and batched.
+    """
+
+    def test_send(self):
+        events = [message.Event(5512315355, 4429313566 + i, args=[i * 0.5]) for i in range(100)]
+        print()
+        print('{:>16} {:>10} {:>12} {:>12}'.format('serializer', 'writes', 'octets', 'send [us]'))
+        for ser in [serializer.JsonSerializer(), serializer.JsonSerializer(batched=True)]:
+            factory = WebSocketServerFactory()
+            factory.setProtocolOptions(openHandshakeTimeout=0)
+            proto = _open(BenchmarkWampServerProtocol(ser), factory)
+
+            with replace_loop(Clock()) as clock:
+                def send():
+                    for event in events:
+                        proto.send(event)
+                    clock.advance(0)
+
+                proto.transport.chunks = []
+                send()
+                writes, octets = len(proto.transport.chunks), len(proto.transport.getvalue())
+                elapsed = timeit(send)
+
+            print('{:>16} {:>10} {:>12} {:>12.2f}'.format(
+                ser.SERIALIZER_ID, writes, octets, elapsed / len(events) * 1000000))
@@ -26,6 +26,7 @@
 
 from __future__ import absolute_import
 
+import math
 import os
 import unittest2 as unittest
 import six
@@ -33,6 +34,7 @@ import six
 from autobahn.wamp import message
 from autobahn.wamp import role
 from autobahn.wamp import serializer
+from autobahn.wamp.exception import ProtocolError
 
 
 # FIXME: autobahn.wamp.serializer.JsonObjectSerializer uses a patched JSON
@@ -120,6 +122,163 @@ def generate_test_messages_binary():
     return [(True, msg) for msg in msgs]
 
 
+class TestJsonBinary(unittest.TestCase):
+    """
+    Decoding of binary strings (a \\x00 followed by Base64) in JSON.
+    """
+
+    def _legacy_loads(self, s):
+        # the decoder used before: it base64-decodes every string value
+        # starting with a \x00 while scanning (with the pure Python scanner)
+        import base64
+        import json
+        from json import scanner
+        from json.decoder import scanstring
+
+        def parse_string(*args, **kwargs):
+            s, idx = scanstring(*args, **kwargs)
+            if s and s[0] == u'\x00':
+                s = base64.b64decode(s[1:])
+            return s, idx
+
+        decoder = json.JSONDecoder()
+        decoder.parse_string = parse_string
+        decoder.scan_once = scanner.py_make_scanner(decoder)
+        return decoder.decode(s)
+
+    def test_same_as_legacy(self):
+        payloads = [
+            u'[36,1,2,{},["\\u0000AAEC"]]',
+            u'[36,1,2,{},["\\u0000AAEC"],{"foo":"\\u0000/w==","bar":[{"baz":["\\u0000"]}]}]',
+            u'[36,1,2,{},["\\u0000AAEC", "\\u0000AAEC", "x\\u0000"],{"\\u0000AAEC":1}]',
+            u'"\\u0000AAEC"',
+            u'[36,1,2,{},["\\\\u0000AAEC"]]',
+            u'[36,1,2,{},["hello",1.5,null,true,{"a":[]}]]',
+        ]
+        for payload in payloads:
+            self.assertEqual(serializer._loads(payload), self._legacy_loads(payload))
+
+    @unittest.skipIf(six.PY2, 'binary JSON encoding only works on Python 3')
+    def test_roundtrip(self):
+        obj = [1, {u'foo': [b'\x00\x01', {u'bar': b''}]}, b'\xff' * 100, u'x\x00']
+        self.assertEqual(serializer._loads(serializer._dumps(obj)), obj)
+
+    @unittest.skipIf(six.PY2, 'binary JSON encoding only works on Python 3')
+    def test_backends(self):
+        """
+        All JSON backends produce the same results as the stdlib JSON module,
+        including for values some of them don't support themselves.
+        """
+        obj = [1, {u'foo': [b'\x00\x01', {u'bar': b''}], u'baz': 2 ** 64 + 1}, u'\u3053/\x00', 1.5e16, None,
+               -2 ** 63 - 1, float('inf'), -float('inf')]
+        reference = serializer.JsonObjectSerializer(backend=u'json')
+        for backend in serializer.JSON_BACKENDS:
+            ser = serializer.JsonObjectSerializer(backend=backend)
+            self.assertEqual(ser.JSON_BACKEND, backend)
+            self.assertEqual(ser.unserialize(ser.serialize(obj)), [obj])
+            self.assertEqual(ser.unserialize(reference.serialize(obj)), [obj])
+            self.assertEqual(reference.unserialize(ser.serialize(obj)), [obj])
+
+            self.assertTrue(math.isnan(ser.unserialize(ser.serialize([float('nan')]))[0][0]))
+            self.assertTrue(math.isnan(reference.unserialize(ser.serialize([float('nan')]))[0][0]))
+            self.assertTrue(math.isnan(ser.unserialize(ser.serialize({u'x': float('nan')}))[0][u'x']))
+            self.assertTrue(math.isnan(ser.unserialize(b'[NaN]')[0][0]))
+
+            # dict keys which are not strings are encoded like the stdlib does
+            keys = {True: 1, None: 2, 3: 3, 1e16: 4}
+            self.assertEqual(ser.unserialize(ser.serialize(keys)), reference.unserialize(reference.serialize(keys)))
+
+    def test_backend_unavailable(self):
+        self.assertRaises(Exception, serializer.JsonObjectSerializer, backend=u'no-such-json')
+
+
+@unittest.skipIf(not hasattr(serializer, 'MsgPackObjectSerializer'), 'MsgPack not available')
+class TestMsgPack(unittest.TestCase):
+    """
+    MsgPack serialization with the msgpack or the u-msgpack module.
+    """
+
+    def test_strings_and_binaries(self):
+        obj = [1, {u'foo': [b'\x00\x01', {u'bar': b''}]}, u'\u3053', b'\xff' * 100, 2 ** 63, -2 ** 63]
+        ser = serializer.MsgPackObjectSerializer()
+        self.assertEqual(ser.unserialize(ser.serialize(obj)), [obj])
+        self.assertEqual(type(ser.unserialize(ser.serialize(u'x'))[0]), six.text_type)
+        self.assertEqual(type(ser.unserialize(ser.serialize(b'x'))[0]), six.binary_type)
+
+    def test_same_as_umsgpack(self):
+        try:
+            import umsgpack
+        except ImportError:
+            raise unittest.SkipTest('u-msgpack not available')
+        obj = [36, 1, 2, {}, [b'\x00\x01', u'\u3053', 1.5, None, True], {u'foo': {1: b''}}]
+        ser = serializer.MsgPackObjectSerializer()
+        self.assertEqual(ser.serialize(obj), umsgpack.packb(obj))
+        self.assertEqual(ser.unserialize(umsgpack.packb(obj)), [obj])
+
+    def test_batched(self):
+        ser = serializer.MsgPackObjectSerializer(batched=True)
+        objs = [[1, u'foo'], [2, b'bar'], [], [3, {u'baz': [b'']}]]
+        payload = b''.join(ser.serialize(obj) for obj in objs)
+        self.assertEqual(ser.unserialize(payload), objs)
+        self.assertEqual(ser.unserialize(bytearray(payload)), objs)
+        self.assertEqual(ser.unserialize(b''), [])
+
+        # truncated length prefix and message data
+        self.assertRaises(Exception, ser.unserialize, payload + b'\x00\x00')
+        self.assertRaises(Exception, ser.unserialize, payload[:-1])
+
+        # a message which is longer than its length prefix says
+        self.assertRaises(Exception, ser.unserialize, b'\x00\x00\x00\x01\x92\x01\x02')
+
+
+@unittest.skipIf(not hasattr(serializer, 'CBORObjectSerializer'), 'CBOR not available')
+class TestCBOR(unittest.TestCase):
+    """
+    CBOR serialization with the cbor2 or the cbor module.
+    """
+
+    def test_numbers_strings_and_binaries(self):
+        obj = [1, {u'foo': [b'\x00\x01', {u'bar': b''}]}, u'\u3053', b'\xff' * 100,
+               2 ** 64, -2 ** 64 - 1, 1.0, 0.5, -0.0, 1e300, True, None]
+        ser = serializer.CBORObjectSerializer()
+        result = ser.unserialize(ser.serialize(obj))[0]
+        self.assertEqual(result, obj)
+        self.assertEqual([type(x) for x in result], [type(x) for x in obj])
+
+    def test_binary_tags(self):
+        if serializer.CBORObjectSerializer.CBOR_MODULE.__name__ != 'cbor2':
+            raise unittest.SkipTest('only with cbor2')
+        ser = serializer.CBORObjectSerializer()
+
+        # tags 21, 22, 23 and 64 on a byte string: b'\x00\x01'
+        for tag in [b'\xd5', b'\xd6', b'\xd7', b'\xd8\x40']:
+            self.assertEqual(ser.unserialize(b'\x82\x01' + tag + b'\x42\x00\x01'), [[1, b'\x00\x01']])
+
+        # unknown tags are kept
+        tagged = ser.unserialize(b'\xd9\x0f\xa0\x42\x00\x01')[0]
+        self.assertEqual((tagged.tag, tagged.value), (4000, b'\x00\x01'))
+
+    def test_batched(self):
+        ser = serializer.CBORObjectSerializer(batched=True)
+        objs = [[1, u'foo'], [2, b'bar'], [], [3, {u'baz': [b'']}]]
+        payload = b''.join(ser.serialize(obj) for obj in objs)
+        self.assertEqual(ser.unserialize(payload), objs)
+        self.assertEqual(ser.unserialize(b''), [])
+
+        # truncated length prefix and message data
+        self.assertRaises(Exception, ser.unserialize, payload + b'\x00\x00')
+        self.assertRaises(Exception, ser.unserialize, payload[:-1])
+
+    def test_batched_length_mismatch(self):
+        if serializer.CBORObjectSerializer.CBOR_MODULE.__name__ != 'cbor2':
+            raise unittest.SkipTest('only with cbor2')
+        ser = serializer.CBORObjectSerializer(batched=True)
+
+        # a message which is longer or shorter than its length prefix says
+        self.assertRaises(Exception, ser.unserialize, b'\x00\x00\x00\x01\x82\x01\x02')
+        self.assertRaises(Exception, ser.unserialize, b'\x00\x00\x00\x04\x82\x01\x02\x03' * 2)
+
+
 class TestSerializer(unittest.TestCase):
 
     def setUp(self):
@@ -131,6 +290,12 @@ class TestSerializer(unittest.TestCase):
         self._test_serializers.append(serializer.JsonSerializer())
         self._test_serializers.append(serializer.JsonSerializer(batched=True))
 
+        # .. with every JSON backend available
+        for backend in sorted(serializer.JSON_BACKENDS):
+            if backend != serializer.JSON_BACKEND:
+                self._test_serializers.append(serializer.JsonSerializer(backend=backend))
+                self._test_serializers.append(serializer.JsonSerializer(batched=True, backend=backend))
+
         # MsgPack serializer is optional
         if hasattr(serializer, 'MsgPackSerializer'):
             self._test_serializers.append(serializer.MsgPackSerializer())
@@ -175,6 +340,23 @@ class TestSerializer(unittest.TestCase):
                     # must be equal: message roundtrips via the serializer
                     self.assertEqual([msg], msg2)
 
+    def test_batched_concatenation(self):
+        """
+        With batched serializers, the concatenation of serialized messages
+        unserializes to all those messages.
+        """
+        for ser in self._test_serializers:
+            self.assertEqual(ser.BATCHED, ser.SERIALIZER_ID.endswith(u'.batched'))
+            if not ser.BATCHED:
+                continue
+
+            msgs = [msg for contains_binary, msg in self._test_messages if not must_skip(ser, contains_binary)]
+            payload = b''.join(ser.serialize(msg)[0] for msg in msgs)
+            self.assertEqual(ser.unserialize(payload, ser.serialize(msgs[0])[1]), msgs)
+
+            # trailing data after the last message
+            self.assertRaises(ProtocolError, ser.unserialize, payload + b'\x00', None)
+
     def test_crosstrip(self):
         """
         Test cross-tripping over 2 serializers (as is done by WAMP routers).
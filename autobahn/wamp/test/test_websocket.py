@@ -29,8 +29,16 @@ from __future__ import absolute_import
 import os
 
 if os.environ.get('USE_TWISTED', False):
+    import txaio
+    txaio.use_twisted()
+
     from twisted.trial import unittest
+    from twisted.internet.task import Clock
+    from txaio.testutil import replace_loop
+    from mock import Mock
 
+    from autobahn.wamp import message
+    from autobahn.wamp.serializer import JsonSerializer
     from autobahn.wamp.websocket import WampWebSocketProtocol
 
     class TestWebsocketProtocol(unittest.TestCase):
@@ -40,3 +48,64 @@ if os.environ.get('USE_TWISTED', False):
         def test_close_before_open(self):
             # just checking this doesn't throw an exception...
             self.protocol.onClose(True, 1, "just testing")
+
+    class TestWebsocketProtocolBatching(unittest.TestCase):
+        """
+        Sending WAMP messages with a batched serializer.
+        """
+
+        def _create_protocol(self, serializer):
+            protocol = WampWebSocketProtocol()
+            protocol.log = txaio.make_logger()
+            protocol._session = Mock(_authid=None, _session_id=None)
+            protocol._serializer = serializer
+            protocol.sent = []
+            protocol.sendMessage = lambda payload, isBinary: protocol.sent.append((payload, isBinary))
+            protocol.sendClose = lambda code: protocol.sent.append(code)
+            return protocol
+
+        def test_batch_per_iteration(self):
+            serializer = JsonSerializer(batched=True)
+            protocol = self._create_protocol(serializer)
+            with replace_loop(Clock()) as clock:
+                for i in range(3):
+                    protocol.send(message.Publish(i + 1, u'com.example.topic'))
+                self.assertEqual(protocol.sent, [])
+
+                clock.advance(0)
+                self.assertEqual(len(protocol.sent), 1)
+                payload, isBinary = protocol.sent[0]
+                self.assertFalse(isBinary)
+                msgs = serializer.unserialize(payload, isBinary)
+                self.assertEqual([msg.request for msg in msgs], [1, 2, 3])
+
+                protocol.send(message.Publish(4, u'com.example.topic'))
+                clock.advance(0)
+                self.assertEqual(len(protocol.sent), 2)
+
+        def test_not_batched(self):
+            protocol = self._create_protocol(JsonSerializer())
+            with replace_loop(Clock()):
+                protocol.send(message.Publish(1, u'com.example.topic'))
+                protocol.send(message.Publish(2, u'com.example.topic'))
+                self.assertEqual(len(protocol.sent), 2)
+
+        def test_close_flushes(self):
+            protocol = self._create_protocol(JsonSerializer(batched=True))
+            with replace_loop(Clock()) as clock:
+                protocol.send(message.Publish(1, u'com.example.topic'))
+                protocol.close()
+                self.assertEqual(len(protocol.sent), 2)
+                self.assertEqual(protocol.sent[1], 1000)
+
+                clock.advance(0)
+                self.assertEqual(len(protocol.sent), 2)
+
+        def test_lost_drops(self):
+            protocol = self._create_protocol(JsonSerializer(batched=True))
+            with replace_loop(Clock()) as clock:
+                protocol.send(message.Publish(1, u'com.example.topic'))
+                protocol._session = None
+                protocol.onClose(False, 1006, None)
+                clock.advance(0)
+                self.assertEqual(protocol.sent, [])
@@ -28,6 +28,7 @@ from __future__ import absolute_import
 
 import traceback
 
+from autobahn.util import _SendBatcher
 from autobahn.websocket import protocol
 from autobahn.websocket.types import ConnectionDeny
 from autobahn.wamp.interfaces import ITransport
@@ -46,6 +47,8 @@ class WampWebSocketProtocol(object):
 
     _session = None  # default; self.session is set in onOpen
 
+    _batcher = None  # with a batched serializer, collects messages to send in one batch
+
     def _bailout(self, code, reason=None):
         self.log.debug('Failing WAMP-over-WebSocket transport: code={code}, reason="{reason}"', code=code, reason=reason)
         self._fail_connection(code, reason)
@@ -68,6 +71,9 @@ class WampWebSocketProtocol(object):
         """
         Callback from :func:`autobahn.websocket.interfaces.IWebSocketChannel.onClose`
         """
+        if self._batcher is not None:
+            self._batcher.clear()
+
         # WAMP session might never have been established in the first place .. guard this!
         if self._session is not None:
             # WebSocket connection lost - fire off the WAMP
@@ -122,7 +128,13 @@ class WampWebSocketProtocol(object):
                 # all exceptions raised from above should be serialization errors ..
                 raise SerializationError(u"WAMP message serialization error: {0}".format(e))
             else:
-                self.sendMessage(payload, isBinary)
+                if self._serializer.BATCHED:
+                    # send all messages from this reactor/loop iteration as one batch
+                    if self._batcher is None:
+                        self._batcher = _SendBatcher(lambda batch: self.sendMessage(batch, isBinary))
+                    self._batcher.add(payload)
+                else:
+                    self.sendMessage(payload, isBinary)
         else:
             raise TransportLost()
 
@@ -137,6 +149,8 @@ class WampWebSocketProtocol(object):
         Implements :func:`autobahn.wamp.interfaces.ITransport.close`
         """
         if self.isOpen():
+            if self._batcher is not None:
+                self._batcher.flush()
             self.sendClose(protocol.WebSocketProtocol.CLOSE_STATUS_CODE_NORMAL)
         else:
             raise TransportLost()
@@ -26,6 +26,8 @@
 
 from __future__ import absolute_import
 
+import zlib
+
 from autobahn.websocket.compress_base import \
     PerMessageCompressOffer, \
     PerMessageCompressOfferAccept, \
@@ -39,7 +41,9 @@ from autobahn.websocket.compress_deflate import \
     PerMessageDeflateOfferAccept, \
     PerMessageDeflateResponse, \
     PerMessageDeflateResponseAccept, \
-    PerMessageDeflate
+    PerMessageDeflate, \
+    PerMessageDeflatePool, \
+    build_deflate_dictionary
 
 # this must be a list (not tuple), since we dynamically
 # extend it ..
@@ -54,6 +58,8 @@ __all__ = [
     'PerMessageDeflateResponse',
     'PerMessageDeflateResponseAccept',
     'PerMessageDeflate',
+    'PerMessageDeflatePool',
+    'build_deflate_dictionary',
     'PERMESSAGE_COMPRESSION_EXTENSION'
 ]
 
@@ -70,6 +76,37 @@ PERMESSAGE_COMPRESSION_EXTENSION = {
 }
 
 
+# include 'permessage-deflate-dictionary' classes if zlib supports preset
+# dictionaries (Python 3.3+)
+try:
+    zlib.compressobj(zdict=b'\x00')
+except TypeError:
+    pass
+else:
+    from autobahn.websocket.compress_deflate import \
+        PerMessageDeflateDictionaryMixin, \
+        PerMessageDeflateDictionaryOffer, \
+        PerMessageDeflateDictionaryOfferAccept, \
+        PerMessageDeflateDictionaryResponse, \
+        PerMessageDeflateDictionaryResponseAccept, \
+        PerMessageDeflateDictionary
+
+    PMCE = {
+        'Offer': PerMessageDeflateDictionaryOffer,
+        'OfferAccept': PerMessageDeflateDictionaryOfferAccept,
+        'Response': PerMessageDeflateDictionaryResponse,
+        'ResponseAccept': PerMessageDeflateDictionaryResponseAccept,
+        'PMCE': PerMessageDeflateDictionary
+    }
+    PERMESSAGE_COMPRESSION_EXTENSION[PerMessageDeflateDictionaryMixin.EXTENSION_NAME] = PMCE
+
+    __all__.extend(['PerMessageDeflateDictionaryOffer',
+                    'PerMessageDeflateDictionaryOfferAccept',
+                    'PerMessageDeflateDictionaryResponse',
+                    'PerMessageDeflateDictionaryResponseAccept',
+                    'PerMessageDeflateDictionary'])
+
+
 # include 'permessage-bzip2' classes if bzip2 is available
 try:
     import bz2
@@ -129,3 +166,34 @@ else:
                     'PerMessageSnappyResponse',
                     'PerMessageSnappyResponseAccept',
                     'PerMessageSnappy'])
+
+
+# include 'permessage-zstd' classes if Zstandard is available
+try:
+    # noinspection PyPackageRequirements
+    import zstandard
+except ImportError:
+    zstandard = None
+else:
+    from autobahn.websocket.compress_zstd import \
+        PerMessageZstdMixin, \
+        PerMessageZstdOffer, \
+        PerMessageZstdOfferAccept, \
+        PerMessageZstdResponse, \
+        PerMessageZstdResponseAccept, \
+        PerMessageZstd
+
+    PMCE = {
+        'Offer': PerMessageZstdOffer,
+        'OfferAccept': PerMessageZstdOfferAccept,
+        'Response': PerMessageZstdResponse,
+        'ResponseAccept': PerMessageZstdResponseAccept,
+        'PMCE': PerMessageZstd
+    }
+    PERMESSAGE_COMPRESSION_EXTENSION[PerMessageZstdMixin.EXTENSION_NAME] = PMCE
+
+    __all__.extend(['PerMessageZstdOffer',
+                    'PerMessageZstdOfferAccept',
+                    'PerMessageZstdResponse',
+                    'PerMessageZstdResponseAccept',
+                    'PerMessageZstd'])
@@ -24,6 +24,8 @@
 #
 ###############################################################################
 
+import hashlib
+
 __all__ = (
     'PerMessageCompressOffer',
     'PerMessageCompressOfferAccept',
@@ -61,3 +63,100 @@ class PerMessageCompress(object):
     """
     Base class for WebSocket compression negotiated parameters.
     """
+
+    def get_broadcast_key(self):
+        """
+        Get a key for the parameters messages sent are compressed with. Messages
+        sent on connections with equal keys compress to the same octets, and hence
+        can be compressed once and shared.
+
+        :returns: A hashable key, or ``None`` when the compressed octets depend on
+            previous messages (context takeover) and every message has to be
+            compressed on its own.
+        :rtype: tuple or None
+        """
+        return None
+
+    def set_compress_options(self, level=None, strategy=None):
+        """
+        Tune how messages sent are compressed. These options only affect the
+        sending side, and are not negotiated. Extensions ignore options they
+        do not support.
+
+        :param level: Compression level, or ``None`` for the extension default.
+        :type level: int or None
+        :param strategy: Compression strategy, or ``None`` for the extension default.
+        :type strategy: int or None
+        """
+
+    def set_pool(self, pool):
+        """
+        Share compression objects with the other connections of the factory.
+        Extensions which do not support pooling ignore this.
+
+        :param pool: The pool of the factory.
+        :type pool: obj
+        """
+
+    def discard_compress_message(self):
+        """
+        Discard the message compressed since ``start_compress_message``, because
+        it is sent uncompressed instead. Extensions which keep a compression
+        context across messages override this to drop that context, as the peer
+        never gets to see the discarded octets.
+
+        :returns: ``True`` when the message was discarded, ``False`` when it
+            cannot be (and must be sent compressed after all).
+        :rtype: bool
+        """
+        return True
+
+    def decompress_message_data_chunked(self, data, max_length):
+        """
+        Decompress (a part of) a message, producing the decompressed octets in
+        chunks of bounded size. Extensions which can bound the size of what
+        they decompress at once override this; by default, everything is
+        decompressed at once with ``decompress_message_data``.
+
+        :param data: Compressed octets.
+        :type data: bytes
+        :param max_length: Maximum length of a chunk of decompressed octets.
+        :type max_length: int
+
+        :returns: Iterable of decompressed chunks. There is at least one
+            (possibly empty) chunk.
+        """
+        return [self.decompress_message_data(data)]
+
+
+_DICTIONARY_ID_LENGTH = 16
+
+
+def _dictionary_id(dictionary):
+    """
+    Compute the identifier under which peers negotiate a preset dictionary:
+    a prefix of the hex-encoded SHA-256 digest of the dictionary.
+
+    FOR INTERNAL USE ONLY!
+    """
+    return hashlib.sha256(dictionary).hexdigest()[:_DICTIONARY_ID_LENGTH]
+
+
+def _parse_dictionary_id(cls, params):
+    """
+    Take out the ``dictionary_id`` parameter from parsed extension parameters.
+
+    FOR INTERNAL USE ONLY!
+    """
+    if 'dictionary_id' not in params:
+        raise Exception("missing extension parameter 'dictionary_id' for extension '%s'" % cls.EXTENSION_NAME)
+
+    vals = params.pop('dictionary_id')
+    if len(vals) > 1:
+        raise Exception("multiple occurrence of extension parameter 'dictionary_id' for extension '%s'" % cls.EXTENSION_NAME)
+
+    val = vals[0]
+    if val is True or len(val) != _DICTIONARY_ID_LENGTH or val.strip('0123456789abcdef'):
+        raise Exception("illegal extension parameter value '%s' for parameter 'dictionary_id' of extension '%s'" % (val, cls.EXTENSION_NAME))
+
+    return val
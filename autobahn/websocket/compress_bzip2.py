@@ -417,6 +417,13 @@ class PerMessageBzip2(PerMessageCompress, PerMessageBzip2Mixin):
     def __repr__(self):
         return "PerMessageBzip2(isServer = %s, server_max_compress_level = %s, client_max_compress_level = %s)" % (self._isServer, self.server_max_compress_level, self.client_max_compress_level)
 
+    def get_broadcast_key(self):
+        # every message is compressed with a fresh compressor
+        if self._isServer:
+            return self.EXTENSION_NAME, self.server_max_compress_level
+        else:
+            return self.EXTENSION_NAME, self.client_max_compress_level
+
     def start_compress_message(self):
         if self._isServer:
             if self._compressor is None:
@@ -33,7 +33,9 @@ from autobahn.websocket.compress_base import PerMessageCompressOffer, \
     PerMessageCompressOfferAccept, \
     PerMessageCompressResponse, \
     PerMessageCompressResponseAccept, \
-    PerMessageCompress
+    PerMessageCompress, \
+    _dictionary_id, \
+    _parse_dictionary_id
 
 __all__ = (
     'PerMessageDeflateMixin',
@@ -42,6 +44,14 @@ __all__ = (
     'PerMessageDeflateResponse',
     'PerMessageDeflateResponseAccept',
     'PerMessageDeflate',
+    'PerMessageDeflatePool',
+    'PerMessageDeflateDictionaryMixin',
+    'PerMessageDeflateDictionaryOffer',
+    'PerMessageDeflateDictionaryOfferAccept',
+    'PerMessageDeflateDictionaryResponse',
+    'PerMessageDeflateDictionaryResponseAccept',
+    'PerMessageDeflateDictionary',
+    'build_deflate_dictionary',
 )
 
 
@@ -559,6 +569,9 @@ class PerMessageDeflate(PerMessageCompress, PerMessageDeflateMixin):
     DEFAULT_WINDOW_BITS = zlib.MAX_WBITS
     DEFAULT_MEM_LEVEL = 8
 
+    DEFAULT_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+    DEFAULT_STRATEGY = zlib.Z_DEFAULT_STRATEGY
+
     @classmethod
     def create_from_response_accept(cls, is_server, accept):
         # accept: instance of PerMessageDeflateResponseAccept
@@ -598,9 +611,15 @@ class PerMessageDeflate(PerMessageCompress, PerMessageDeflateMixin):
 
         self.mem_level = mem_level if mem_level else self.DEFAULT_MEM_LEVEL
 
+        self.level = self.DEFAULT_LEVEL
+        self.strategy = self.DEFAULT_STRATEGY
+
         self._compressor = None
         self._decompressor = None
 
+        self._pool = None
+        self._pool_key = None
+
     def __json__(self):
         return {'extension': self.EXTENSION_NAME,
                 'is_server': self._is_server,
@@ -608,41 +627,615 @@ class PerMessageDeflate(PerMessageCompress, PerMessageDeflateMixin):
                 'client_no_context_takeover': self.client_no_context_takeover,
                 'server_max_window_bits': self.server_max_window_bits,
                 'client_max_window_bits': self.client_max_window_bits,
-                'mem_level': self.mem_level}
+                'mem_level': self.mem_level,
+                'level': self.level,
+                'strategy': self.strategy}
 
     def __repr__(self):
-        return "PerMessageDeflate(is_server = %s, server_no_context_takeover = %s, client_no_context_takeover = %s, server_max_window_bits = %s, client_max_window_bits = %s, mem_level = %s)" % (self._is_server, self.server_no_context_takeover, self.client_no_context_takeover, self.server_max_window_bits, self.client_max_window_bits, self.mem_level)
+        return "PerMessageDeflate(is_server = %s, server_no_context_takeover = %s, client_no_context_takeover = %s, server_max_window_bits = %s, client_max_window_bits = %s, mem_level = %s, level = %s, strategy = %s)" % (self._is_server, self.server_no_context_takeover, self.client_no_context_takeover, self.server_max_window_bits, self.client_max_window_bits, self.mem_level, self.level, self.strategy)
+
+    def set_compress_options(self, level=None, strategy=None):
+        if level is not None and level != self.level:
+            self.level = level
+            self._compressor = None
+        if strategy is not None and strategy != self.strategy:
+            self.strategy = strategy
+            self._compressor = None
+
+    def get_broadcast_key(self):
+        if self._is_server:
+            if self.server_no_context_takeover:
+                return self.EXTENSION_NAME, self.server_max_window_bits, self.mem_level, self.level, self.strategy
+        else:
+            if self.client_no_context_takeover:
+                return self.EXTENSION_NAME, self.client_max_window_bits, self.mem_level, self.level, self.strategy
+        return None
+
+    def set_pool(self, pool):
+        self._pool = pool
 
     def start_compress_message(self):
+        if self._is_server:
+            window_bits, no_context_takeover = self.server_max_window_bits, self.server_no_context_takeover
+        else:
+            window_bits, no_context_takeover = self.client_max_window_bits, self.client_no_context_takeover
+
+        if no_context_takeover and self._pool is not None:
+            # the compressor is reset at the end of the message (see end_compress_message),
+            # so it can be used by other connections in the meantime
+            self._pool_key = (window_bits, self.mem_level, self.level, self.strategy)
+            self._compressor = self._pool.get_compressor(self._pool_key)
+            if self._compressor is None:
+                self._compressor = self._create_compressor(window_bits)
+        elif self._compressor is None or no_context_takeover:
+            self._compressor = self._create_compressor(window_bits)
+
+    def _create_compressor(self, window_bits):
         # compressobj([level[, method[, wbits[, mem_level[, strategy]]]]])
         # http://bugs.python.org/issue19278
         # http://hg.python.org/cpython/rev/c54c8e71b79a
-        if self._is_server:
-            if self._compressor is None or self.server_no_context_takeover:
-                self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -self.server_max_window_bits, self.mem_level)
-        else:
-            if self._compressor is None or self.client_no_context_takeover:
-                self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -self.client_max_window_bits, self.mem_level)
+        return zlib.compressobj(self.level, zlib.DEFLATED, -window_bits, self.mem_level, self.strategy)
 
     def compress_message_data(self, data):
         return self._compressor.compress(data)
 
     def end_compress_message(self):
-        data = self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self._pool_key is not None:
+            # a full flush ends the message just like a sync flush, but also
+            # resets the compressor, which then goes back to the pool
+            data = self._compressor.flush(zlib.Z_FULL_FLUSH)
+            self._pool.put_compressor(self._pool_key, self._compressor)
+            self._compressor = None
+            self._pool_key = None
+        else:
+            data = self._compressor.flush(zlib.Z_SYNC_FLUSH)
         return data[:-4]
 
+    def discard_compress_message(self):
+        # the peer's decompressor never sees the discarded octets, so we must not
+        # refer back to them: start over with a fresh compression context
+        self._compressor = None
+        return True
+
     def start_decompress_message(self):
         if self._is_server:
             if self._decompressor is None or self.client_no_context_takeover:
-                self._decompressor = zlib.decompressobj(-self.client_max_window_bits)
+                self._decompressor = self._create_decompressor(self.client_max_window_bits)
         else:
             if self._decompressor is None or self.server_no_context_takeover:
-                self._decompressor = zlib.decompressobj(-self.server_max_window_bits)
+                self._decompressor = self._create_decompressor(self.server_max_window_bits)
+
+    def _create_decompressor(self, window_bits):
+        return zlib.decompressobj(-window_bits)
 
     def decompress_message_data(self, data):
         return self._decompressor.decompress(data)
 
+    def decompress_message_data_chunked(self, data, max_length):
+        decompressor = self._decompressor
+        chunk = decompressor.decompress(data, max_length)
+        yield chunk
+        # a full chunk might leave inflated octets pending in the decompressor,
+        # even when all compressed octets were consumed
+        while decompressor.unconsumed_tail or len(chunk) == max_length:
+            chunk = decompressor.decompress(decompressor.unconsumed_tail, max_length)
+            if not chunk:
+                break
+            yield chunk
+
     def end_decompress_message(self):
         # Eat stripped LEN and NLEN field of a non-compressed block added
         # for Z_SYNC_FLUSH.
         self._decompressor.decompress(b'\x00\x00\xff\xff')
+
+
+@public
+class PerMessageDeflatePool(object):
+    """
+    Pool of zlib compressors shared by the `permessage-deflate` connections of
+    a factory which compress messages without context takeover.
+
+    Creating a compressor is a large native allocation, sized by the window
+    bits and memory level. Since compressors are reset after every message
+    and only taken from the pool for the time a message is compressed, a few
+    of them serve all connections.
+
+    Decompressors are not pooled: unlike a reset compressor, a decompressor
+    keeps the history of the messages it decompressed, which the next peer
+    could refer back to. Creating them is cheap, as their window is only
+    allocated on first use.
+    """
+
+    def __init__(self, max_size=16):
+        """
+
+        :param max_size: Maximum number of idle compressors pooled per set of
+            compression parameters.
+        :type max_size: int
+        """
+        self.max_size = max_size
+
+        self.hits = 0
+        """
+        Number of compressors taken from the pool.
+        """
+
+        self.misses = 0
+        """
+        Number of compressors that had to be created since the pool had none.
+        """
+
+        # idle compressors by (window bits, memory level, level, strategy)
+        self._compressors = {}
+
+    def get_compressor(self, key):
+        """
+        Take an idle compressor from the pool.
+
+        :param key: The compression parameters.
+        :type key: tuple
+
+        :returns: A compressor, or ``None`` when there is none for the parameters.
+        """
+        compressors = self._compressors.get(key, None)
+        if compressors:
+            self.hits += 1
+            return compressors.pop()
+        self.misses += 1
+        return None
+
+    def put_compressor(self, key, compressor):
+        """
+        Return a compressor, which has been reset, to the pool.
+
+        :param key: The compression parameters.
+        :type key: tuple
+        :param compressor: The compressor.
+        :type compressor: obj
+        """
+        compressors = self._compressors.get(key, None)
+        if compressors is None:
+            self._compressors[key] = compressors = []
+        if len(compressors) < self.max_size:
+            compressors.append(compressor)
+
+    def __json__(self):
+        return {'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'idle': sum(len(compressors) for compressors in self._compressors.values())}
+
+
+@public
+def build_deflate_dictionary(samples, max_size=32768):
+    """
+    Build a preset dictionary for :class:`PerMessageDeflateDictionary` from
+    samples of what is sent, e.g. the URIs or (serialized) messages observed
+    on WAMP connections.
+
+    Distinct samples are concatenated from the least to the most frequent one,
+    since deflate encodes matches closer to the end of the dictionary more
+    compactly. Only the last ``max_size`` octets are kept, as deflate cannot
+    refer back further than its window (32kB at most) anyway.
+
+    :param samples: Samples of message payloads.
+    :type samples: iterable of bytes
+    :param max_size: Maximum size of the dictionary in octets.
+    :type max_size: int
+
+    :returns: The dictionary.
+    :rtype: bytes
+    """
+    counts = {}
+    order = {}
+    for sample in samples:
+        if sample not in counts:
+            counts[sample] = 0
+            order[sample] = len(order)
+        counts[sample] += 1
+    ranked = sorted(counts, key=lambda sample: (counts[sample], -order[sample]))
+    return b''.join(ranked)[-max_size:]
+
+
+class PerMessageDeflateDictionaryMixin(object):
+    """
+    Mixin class for this extension.
+    """
+
+    EXTENSION_NAME = "permessage-deflate-dictionary"
+    """
+    Name of this WebSocket extension.
+    """
+
+
+@public
+class PerMessageDeflateDictionaryOffer(PerMessageDeflateDictionaryMixin, PerMessageDeflateOffer):
+    """
+    Set of extension parameters for `permessage-deflate-dictionary` WebSocket extension
+    offered by a client to a server.
+
+    This is `permessage-deflate` with compressors and decompressors primed with a
+    preset dictionary both peers know in advance. It is private to Autobahn peers.
+    """
+
+    @classmethod
+    def parse(cls, params):
+        """
+        Parses a WebSocket extension offer for `permessage-deflate-dictionary` provided by a client to a server.
+
+        :param params: Output from :func:`autobahn.websocket.WebSocketProtocol._parseExtensionsHeader`.
+        :type params: list
+
+        :returns: A new instance of :class:`autobahn.compress.PerMessageDeflateDictionaryOffer`.
+        :rtype: obj
+        """
+        params = dict(params)
+        dictionary_id = _parse_dictionary_id(cls, params)
+        offer = super(PerMessageDeflateDictionaryOffer, cls).parse(params)
+        offer.dictionary_id = dictionary_id
+        return offer
+
+    def __init__(self,
+                 accept_no_context_takeover=True,
+                 accept_max_window_bits=True,
+                 request_no_context_takeover=False,
+                 request_max_window_bits=0,
+                 dictionary=None):
+        """
+
+        :param accept_no_context_takeover: When ``True``, the client accepts the "no context takeover" feature.
+        :type accept_no_context_takeover: bool
+        :param accept_max_window_bits: When ``True``, the client accepts setting "max window size".
+        :type accept_max_window_bits: bool
+        :param request_no_context_takeover: When ``True``, the client request the "no context takeover" feature.
+        :type request_no_context_takeover: bool
+        :param request_max_window_bits: When non-zero, the client requests the given "max window size" (must be
+            an integer from the interval ``[8..15]``).
+        :type request_max_window_bits: int
+        :param dictionary: The preset dictionary offered (``None`` for offers parsed by the server, which only
+            carry the identifier of the dictionary).
+        :type dictionary: bytes
+        """
+        PerMessageDeflateOffer.__init__(self,
+                                        accept_no_context_takeover,
+                                        accept_max_window_bits,
+                                        request_no_context_takeover,
+                                        request_max_window_bits)
+
+        if dictionary is not None and type(dictionary) != bytes:
+            raise Exception("invalid type %s for dictionary" % type(dictionary))
+
+        self.dictionary = dictionary
+        self.dictionary_id = _dictionary_id(dictionary) if dictionary is not None else None
+
+    def get_extension_string(self):
+        """
+        Returns the WebSocket extension configuration string as sent to the server.
+
+        :returns: PMCE configuration string.
+        :rtype: str
+        """
+        return PerMessageDeflateOffer.get_extension_string(self) + "; dictionary_id=%s" % self.dictionary_id
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        obj = PerMessageDeflateOffer.__json__(self)
+        obj['dictionary_id'] = self.dictionary_id
+        return obj
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageDeflateDictionaryOffer(accept_no_context_takeover = %s, accept_max_window_bits = %s, request_no_context_takeover = %s, request_max_window_bits = %s, dictionary_id = %s)" % (self.accept_no_context_takeover, self.accept_max_window_bits, self.request_no_context_takeover, self.request_max_window_bits, self.dictionary_id)
+
+
+@public
+class PerMessageDeflateDictionaryOfferAccept(PerMessageDeflateDictionaryMixin, PerMessageDeflateOfferAccept):
+    """
+    Set of parameters with which to accept an `permessage-deflate-dictionary` offer
+    from a client by a server.
+    """
+
+    def __init__(self,
+                 offer,
+                 request_no_context_takeover=False,
+                 request_max_window_bits=0,
+                 no_context_takeover=None,
+                 window_bits=None,
+                 mem_level=None,
+                 dictionary=None):
+        """
+
+        :param offer: The offer being accepted.
+        :type offer: Instance of :class:`autobahn.compress.PerMessageDeflateDictionaryOffer`.
+        :param request_no_context_takeover: When ``True``, the server requests the "no context takeover" feature.
+        :type request_no_context_takeover: bool
+        :param request_max_window_bits: When non-zero, the server requests the given "max window size" (must be
+            an integer from the interval ``[8..15]``).
+        :type request_max_window_bits: int
+        :param no_context_takeover: Override server ("server-to-client direction") context takeover (this must
+                be compatible with the offer).
+        :type no_context_takeover: bool
+        :param window_bits: Override server ("server-to-client direction") window size (this must be
+                compatible with the offer).
+        :type window_bits: int
+        :param mem_level: Set server ("server-to-client direction") memory level.
+        :type mem_level: int
+        :param dictionary: The preset dictionary, which must be the one offered by the client.
+        :type dictionary: bytes
+        """
+        if not isinstance(offer, PerMessageDeflateDictionaryOffer):
+            raise Exception("invalid type %s for offer" % type(offer))
+
+        PerMessageDeflateOfferAccept.__init__(self,
+                                              offer,
+                                              request_no_context_takeover,
+                                              request_max_window_bits,
+                                              no_context_takeover,
+                                              window_bits,
+                                              mem_level)
+
+        if type(dictionary) != bytes:
+            raise Exception("invalid type %s for dictionary" % type(dictionary))
+
+        if _dictionary_id(dictionary) != offer.dictionary_id:
+            raise Exception("invalid value for dictionary - client offered dictionary %s" % offer.dictionary_id)
+
+        self.dictionary = dictionary
+        self.dictionary_id = offer.dictionary_id
+
+    def get_extension_string(self):
+        """
+        Returns the WebSocket extension configuration string as sent to the server.
+
+        :returns: PMCE configuration string.
+        :rtype: str
+        """
+        return PerMessageDeflateOfferAccept.get_extension_string(self) + "; dictionary_id=%s" % self.dictionary_id
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        obj = PerMessageDeflateOfferAccept.__json__(self)
+        obj['dictionary_id'] = self.dictionary_id
+        return obj
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageDeflateDictionaryOfferAccept(offer = %s, request_no_context_takeover = %s, request_max_window_bits = %s, no_context_takeover = %s, window_bits = %s, mem_level = %s, dictionary_id = %s)" % (self.offer.__repr__(), self.request_no_context_takeover, self.request_max_window_bits, self.no_context_takeover, self.window_bits, self.mem_level, self.dictionary_id)
+
+
+@public
+class PerMessageDeflateDictionaryResponse(PerMessageDeflateDictionaryMixin, PerMessageDeflateResponse):
+    """
+    Set of parameters for `permessage-deflate-dictionary` responded by server.
+    """
+
+    @classmethod
+    def parse(cls, params):
+        """
+        Parses a WebSocket extension response for `permessage-deflate-dictionary` provided by a server to a client.
+
+        :param params: Output from :func:`autobahn.websocket.WebSocketProtocol._parseExtensionsHeader`.
+        :type params: list
+
+        :returns: A new instance of :class:`autobahn.compress.PerMessageDeflateDictionaryResponse`.
+        :rtype: obj
+        """
+        params = dict(params)
+        dictionary_id = _parse_dictionary_id(cls, params)
+        response = super(PerMessageDeflateDictionaryResponse, cls).parse(params)
+        response.dictionary_id = dictionary_id
+        return response
+
+    def __init__(self,
+                 client_max_window_bits,
+                 client_no_context_takeover,
+                 server_max_window_bits,
+                 server_no_context_takeover,
+                 dictionary_id=None):
+        """
+
+        :param client_max_window_bits: The "max window size" the client must use for compressing (an integer
+            from the interval ``[8..15]``, or ``0`` when the server did not restrict it).
+        :type client_max_window_bits: int
+        :param client_no_context_takeover: When ``True``, the client must not use context takeover when
+            compressing.
+        :type client_no_context_takeover: bool
+        :param server_max_window_bits: The "max window size" the server will use for compressing (an integer
+            from the interval ``[8..15]``, or ``0`` when the server does not restrict it).
+        :type server_max_window_bits: int
+        :param server_no_context_takeover: When ``True``, the server will not use context takeover when
+            compressing.
+        :type server_no_context_takeover: bool
+        :param dictionary_id: Identifier of the preset dictionary the server accepted (a hex encoded prefix of
+            the SHA-256 digest of the dictionary).
+        :type dictionary_id: str
+        """
+        PerMessageDeflateResponse.__init__(self,
+                                           client_max_window_bits,
+                                           client_no_context_takeover,
+                                           server_max_window_bits,
+                                           server_no_context_takeover)
+        self.dictionary_id = dictionary_id
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        obj = PerMessageDeflateResponse.__json__(self)
+        obj['dictionary_id'] = self.dictionary_id
+        return obj
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageDeflateDictionaryResponse(client_max_window_bits = %s, client_no_context_takeover = %s, server_max_window_bits = %s, server_no_context_takeover = %s, dictionary_id = %s)" % (self.client_max_window_bits, self.client_no_context_takeover, self.server_max_window_bits, self.server_no_context_takeover, self.dictionary_id)
+
+
+@public
+class PerMessageDeflateDictionaryResponseAccept(PerMessageDeflateDictionaryMixin, PerMessageDeflateResponseAccept):
+    """
+    Set of parameters with which to accept an `permessage-deflate-dictionary` response
+    from a server by a client.
+    """
+
+    def __init__(self,
+                 response,
+                 no_context_takeover=None,
+                 window_bits=None,
+                 mem_level=None,
+                 dictionary=None):
+        """
+
+        :param response: The response being accepted.
+        :type response: Instance of :class:`autobahn.compress.PerMessageDeflateDictionaryResponse`.
+        :param no_context_takeover: Override client ("client-to-server direction") context takeover (this must be compatible with response).
+        :type no_context_takeover: bool
+        :param window_bits: Override client ("client-to-server direction") window size (this must be compatible with response).
+        :type window_bits: int
+        :param mem_level: Set client ("client-to-server direction") memory level.
+        :type mem_level: int
+        :param dictionary: The preset dictionary, which must be the one accepted by the server.
+        :type dictionary: bytes
+        """
+        if not isinstance(response, PerMessageDeflateDictionaryResponse):
+            raise Exception("invalid type %s for response" % type(response))
+
+        PerMessageDeflateResponseAccept.__init__(self,
+                                                 response,
+                                                 no_context_takeover,
+                                                 window_bits,
+                                                 mem_level)
+
+        if type(dictionary) != bytes:
+            raise Exception("invalid type %s for dictionary" % type(dictionary))
+
+        if _dictionary_id(dictionary) != response.dictionary_id:
+            raise Exception("invalid value for dictionary - server accepted dictionary %s" % response.dictionary_id)
+
+        self.dictionary = dictionary
+        self.dictionary_id = response.dictionary_id
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        obj = PerMessageDeflateResponseAccept.__json__(self)
+        obj['dictionary_id'] = self.dictionary_id
+        return obj
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageDeflateDictionaryResponseAccept(response = %s, no_context_takeover = %s, window_bits = %s, mem_level = %s, dictionary_id = %s)" % (self.response.__repr__(), self.no_context_takeover, self.window_bits, self.mem_level, self.dictionary_id)
+
+
+# noinspection PyArgumentList
+class PerMessageDeflateDictionary(PerMessageDeflateDictionaryMixin, PerMessageDeflate):
+    """
+    `permessage-deflate-dictionary` WebSocket extension processor.
+
+    Compressors and decompressors start out from the preset dictionary, so
+    even messages compressed without context takeover can refer back to the
+    keys and URIs that are repeated in every message.
+    """
+
+    @classmethod
+    def create_from_response_accept(cls, is_server, accept):
+        # accept: instance of PerMessageDeflateDictionaryResponseAccept
+        pmce = cls(is_server,
+                   accept.response.server_no_context_takeover,
+                   accept.no_context_takeover if accept.no_context_takeover is not None else accept.response.client_no_context_takeover,
+                   accept.response.server_max_window_bits,
+                   accept.window_bits if accept.window_bits is not None else accept.response.client_max_window_bits,
+                   accept.mem_level,
+                   accept.dictionary)
+        return pmce
+
+    @classmethod
+    def create_from_offer_accept(cls, is_server, accept):
+        # accept: instance of PerMessageDeflateDictionaryOfferAccept
+        pmce = cls(is_server,
+                   accept.no_context_takeover if accept.no_context_takeover is not None else accept.offer.request_no_context_takeover,
+                   accept.request_no_context_takeover,
+                   accept.window_bits if accept.window_bits is not None else accept.offer.request_max_window_bits,
+                   accept.request_max_window_bits,
+                   accept.mem_level,
+                   accept.dictionary)
+        return pmce
+
+    def __init__(self,
+                 is_server,
+                 server_no_context_takeover,
+                 client_no_context_takeover,
+                 server_max_window_bits,
+                 client_max_window_bits,
+                 mem_level,
+                 dictionary):
+        PerMessageDeflate.__init__(self,
+                                   is_server,
+                                   server_no_context_takeover,
+                                   client_no_context_takeover,
+                                   server_max_window_bits,
+                                   client_max_window_bits,
+                                   mem_level)
+        self.dictionary = dictionary
+        self.dictionary_id = _dictionary_id(dictionary)
+
+    def __json__(self):
+        obj = PerMessageDeflate.__json__(self)
+        obj['dictionary_id'] = self.dictionary_id
+        return obj
+
+    def __repr__(self):
+        return "PerMessageDeflateDictionary(is_server = %s, server_no_context_takeover = %s, client_no_context_takeover = %s, server_max_window_bits = %s, client_max_window_bits = %s, mem_level = %s, level = %s, strategy = %s, dictionary_id = %s)" % (self._is_server, self.server_no_context_takeover, self.client_no_context_takeover, self.server_max_window_bits, self.client_max_window_bits, self.mem_level, self.level, self.strategy, self.dictionary_id)
+
+    def set_pool(self, pool):
+        # resetting a compressor would also drop the preset dictionary,
+        # so compressors are not pooled
+        pass
+
+    def get_broadcast_key(self):
+        key = PerMessageDeflate.get_broadcast_key(self)
+        if key is not None:
+            key += (self.dictionary_id,)
+        return key
+
+    def _create_compressor(self, window_bits):
+        return zlib.compressobj(self.level, zlib.DEFLATED, -window_bits, self.mem_level, self.strategy, self.dictionary)
+
+    def _create_decompressor(self, window_bits):
+        return zlib.decompressobj(-window_bits, self.dictionary)
@@ -400,6 +400,15 @@ class PerMessageSnappy(PerMessageCompress, PerMessageSnappyMixin):
     def __repr__(self):
         return "PerMessageSnappy(is_server = %s, server_no_context_takeover = %s, client_no_context_takeover = %s)" % (self._is_server, self.server_no_context_takeover, self.client_no_context_takeover)
 
+    def get_broadcast_key(self):
+        if self._is_server:
+            if self.server_no_context_takeover:
+                return self.EXTENSION_NAME,
+        else:
+            if self.client_no_context_takeover:
+                return self.EXTENSION_NAME,
+        return None
+
     def start_compress_message(self):
         if self._is_server:
             if self._compressor is None or self.server_no_context_takeover:
@@ -412,7 +421,11 @@ class PerMessageSnappy(PerMessageCompress, PerMessageSnappyMixin):
         return self._compressor.add_chunk(data)
 
     def end_compress_message(self):
-        return ""
+        return b""
+
+    def discard_compress_message(self):
+        self._compressor = None
+        return True
 
     def start_decompress_message(self):
         if self._is_server:
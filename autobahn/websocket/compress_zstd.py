@@ -0,0 +1,603 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+from __future__ import absolute_import
+
+import zstandard
+
+from autobahn.websocket.compress_base import PerMessageCompressOffer, \
+    PerMessageCompressOfferAccept, \
+    PerMessageCompressResponse, \
+    PerMessageCompressResponseAccept, \
+    PerMessageCompress, \
+    _dictionary_id, \
+    _parse_dictionary_id
+
+__all__ = (
+    'PerMessageZstdMixin',
+    'PerMessageZstdOffer',
+    'PerMessageZstdOfferAccept',
+    'PerMessageZstdResponse',
+    'PerMessageZstdResponseAccept',
+    'PerMessageZstd',
+)
+
+
+class PerMessageZstdMixin(object):
+    """
+    Mixin class for this extension.
+    """
+
+    EXTENSION_NAME = "permessage-zstd"
+    """
+    Name of this WebSocket extension.
+    """
+
+    COMPRESS_LEVEL_PERMISSIBLE_VALUES = list(range(1, 20))
+    """
+    Permissible values for compression level parameter.
+    Higher values are slower, but produce smaller output. The default is 3.
+    """
+
+
+def _check_dictionary(dictionary, dictionary_id, peer):
+    """
+    Check that the given dictionary is the one the peer negotiated.
+
+    FOR INTERNAL USE ONLY!
+    """
+    if dictionary is None:
+        if dictionary_id is not None:
+            raise Exception("missing dictionary - %s requested dictionary %s" % (peer, dictionary_id))
+    else:
+        if type(dictionary) != bytes:
+            raise Exception("invalid type %s for dictionary" % type(dictionary))
+        if _dictionary_id(dictionary) != dictionary_id:
+            raise Exception("invalid value for dictionary - %s requested dictionary %s" % (peer, dictionary_id))
+
+
+class PerMessageZstdOffer(PerMessageCompressOffer, PerMessageZstdMixin):
+    """
+    Set of extension parameters for `permessage-zstd` WebSocket extension
+    offered by a client to a server.
+    """
+
+    @classmethod
+    def parse(cls, params):
+        """
+        Parses a WebSocket extension offer for `permessage-zstd` provided by a client to a server.
+
+        :param params: Output from :func:`autobahn.websocket.WebSocketProtocol._parseExtensionsHeader`.
+        :type params: list
+
+        :returns: A new instance of :class:`autobahn.compress.PerMessageZstdOffer`.
+        :rtype: obj
+        """
+        # extension parameter defaults
+        accept_no_context_takeover = False
+        request_no_context_takeover = False
+        dictionary_id = None
+
+        params = dict(params)
+        if 'dictionary_id' in params:
+            dictionary_id = _parse_dictionary_id(cls, params)
+
+        # verify/parse client ("client-to-server direction") parameters of permessage-zstd offer
+        for p in params:
+
+            if len(params[p]) > 1:
+                raise Exception("multiple occurrence of extension parameter '%s' for extension '%s'" % (p, cls.EXTENSION_NAME))
+
+            val = params[p][0]
+
+            if p == 'client_no_context_takeover':
+                # noinspection PySimplifyBooleanCheck
+                if val is not True:
+                    raise Exception("illegal extension parameter value '%s' for parameter '%s' of extension '%s'" % (val, p, cls.EXTENSION_NAME))
+                else:
+                    accept_no_context_takeover = True
+
+            elif p == 'server_no_context_takeover':
+                # noinspection PySimplifyBooleanCheck
+                if val is not True:
+                    raise Exception("illegal extension parameter value '%s' for parameter '%s' of extension '%s'" % (val, p, cls.EXTENSION_NAME))
+                else:
+                    request_no_context_takeover = True
+
+            else:
+                raise Exception("illegal extension parameter '%s' for extension '%s'" % (p, cls.EXTENSION_NAME))
+
+        offer = cls(accept_no_context_takeover,
+                    request_no_context_takeover)
+        offer.dictionary_id = dictionary_id
+        return offer
+
+    def __init__(self,
+                 accept_no_context_takeover=True,
+                 request_no_context_takeover=False,
+                 dictionary=None):
+        """
+
+        :param accept_no_context_takeover: Iff true, client accepts "no context takeover" feature.
+        :type accept_no_context_takeover: bool
+        :param request_no_context_takeover: Iff true, client request "no context takeover" feature.
+        :type request_no_context_takeover: bool
+        :param dictionary: If given, the client offers to compress with this dictionary, which
+            the server must know in advance (raw content or a dictionary trained with zstd).
+        :type dictionary: bytes
+        """
+        if type(accept_no_context_takeover) != bool:
+            raise Exception("invalid type %s for accept_no_context_takeover" % type(accept_no_context_takeover))
+
+        self.accept_no_context_takeover = accept_no_context_takeover
+
+        if type(request_no_context_takeover) != bool:
+            raise Exception("invalid type %s for request_no_context_takeover" % type(request_no_context_takeover))
+
+        self.request_no_context_takeover = request_no_context_takeover
+
+        if dictionary is not None and type(dictionary) != bytes:
+            raise Exception("invalid type %s for dictionary" % type(dictionary))
+
+        self.dictionary = dictionary
+        self.dictionary_id = _dictionary_id(dictionary) if dictionary is not None else None
+
+    def get_extension_string(self):
+        """
+        Returns the WebSocket extension configuration string as sent to the server.
+
+        :returns: PMCE configuration string.
+        :rtype: str
+        """
+        pmce_string = self.EXTENSION_NAME
+        if self.accept_no_context_takeover:
+            pmce_string += "; client_no_context_takeover"
+        if self.request_no_context_takeover:
+            pmce_string += "; server_no_context_takeover"
+        if self.dictionary_id is not None:
+            pmce_string += "; dictionary_id=%s" % self.dictionary_id
+        return pmce_string
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        return {'extension': self.EXTENSION_NAME,
+                'accept_no_context_takeover': self.accept_no_context_takeover,
+                'request_no_context_takeover': self.request_no_context_takeover,
+                'dictionary_id': self.dictionary_id}
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageZstdOffer(accept_no_context_takeover = %s, request_no_context_takeover = %s, dictionary_id = %s)" % (self.accept_no_context_takeover, self.request_no_context_takeover, self.dictionary_id)
+
+
+class PerMessageZstdOfferAccept(PerMessageCompressOfferAccept, PerMessageZstdMixin):
+    """
+    Set of parameters with which to accept an `permessage-zstd` offer
+    from a client by a server.
+    """
+
+    def __init__(self,
+                 offer,
+                 request_no_context_takeover=False,
+                 no_context_takeover=None,
+                 compress_level=None,
+                 dictionary=None):
+        """
+
+        :param offer: The offer being accepted.
+        :type offer: Instance of :class:`autobahn.compress.PerMessageZstdOffer`.
+        :param request_no_context_takeover: Iff true, server request "no context takeover" feature.
+        :type request_no_context_takeover: bool
+        :param no_context_takeover: Override server ("server-to-client direction") context takeover (this must be compatible with offer).
+        :type no_context_takeover: bool
+        :param compress_level: Set server ("server-to-client direction") compress level.
+        :type compress_level: int
+        :param dictionary: The dictionary offered by the client (required iff the client offered one).
+        :type dictionary: bytes
+        """
+        if not isinstance(offer, PerMessageZstdOffer):
+            raise Exception("invalid type %s for offer" % type(offer))
+
+        self.offer = offer
+
+        if type(request_no_context_takeover) != bool:
+            raise Exception("invalid type %s for request_no_context_takeover" % type(request_no_context_takeover))
+
+        if request_no_context_takeover and not offer.accept_no_context_takeover:
+            raise Exception("invalid value %s for request_no_context_takeover - feature unsupported by client" % request_no_context_takeover)
+
+        self.request_no_context_takeover = request_no_context_takeover
+
+        if no_context_takeover is not None:
+            if type(no_context_takeover) != bool:
+                raise Exception("invalid type %s for no_context_takeover" % type(no_context_takeover))
+
+            if offer.request_no_context_takeover and not no_context_takeover:
+                raise Exception("invalid value %s for no_context_takeover - client requested feature" % no_context_takeover)
+
+        self.no_context_takeover = no_context_takeover
+
+        if compress_level is not None:
+            if compress_level not in self.COMPRESS_LEVEL_PERMISSIBLE_VALUES:
+                raise Exception("invalid value %s for compress_level - permissible values %s" % (compress_level, self.COMPRESS_LEVEL_PERMISSIBLE_VALUES))
+
+        self.compress_level = compress_level
+
+        _check_dictionary(dictionary, offer.dictionary_id, 'client')
+
+        self.dictionary = dictionary
+
+    def get_extension_string(self):
+        """
+        Returns the WebSocket extension configuration string as sent to the server.
+
+        :returns: PMCE configuration string.
+        :rtype: str
+        """
+        pmce_string = self.EXTENSION_NAME
+        if self.offer.request_no_context_takeover:
+            pmce_string += "; server_no_context_takeover"
+        if self.request_no_context_takeover:
+            pmce_string += "; client_no_context_takeover"
+        if self.offer.dictionary_id is not None:
+            pmce_string += "; dictionary_id=%s" % self.offer.dictionary_id
+        return pmce_string
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        return {'extension': self.EXTENSION_NAME,
+                'offer': self.offer.__json__(),
+                'request_no_context_takeover': self.request_no_context_takeover,
+                'no_context_takeover': self.no_context_takeover,
+                'compress_level': self.compress_level}
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageZstdAccept(offer = %s, request_no_context_takeover = %s, no_context_takeover = %s, compress_level = %s)" % (self.offer.__repr__(), self.request_no_context_takeover, self.no_context_takeover, self.compress_level)
+
+
+class PerMessageZstdResponse(PerMessageCompressResponse, PerMessageZstdMixin):
+    """
+    Set of parameters for `permessage-zstd` responded by server.
+    """
+
+    @classmethod
+    def parse(cls, params):
+        """
+        Parses a WebSocket extension response for `permessage-zstd` provided by a server to a client.
+
+        :param params: Output from :func:`autobahn.websocket.WebSocketProtocol._parseExtensionsHeader`.
+        :type params: list
+
+        :returns: A new instance of :class:`autobahn.compress.PerMessageZstdResponse`.
+        :rtype: obj
+        """
+        client_no_context_takeover = False
+        server_no_context_takeover = False
+        dictionary_id = None
+
+        params = dict(params)
+        if 'dictionary_id' in params:
+            dictionary_id = _parse_dictionary_id(cls, params)
+
+        for p in params:
+
+            if len(params[p]) > 1:
+                raise Exception("multiple occurrence of extension parameter '%s' for extension '%s'" % (p, cls.EXTENSION_NAME))
+
+            val = params[p][0]
+
+            if p == 'client_no_context_takeover':
+                # noinspection PySimplifyBooleanCheck
+                if val is not True:
+                    raise Exception("illegal extension parameter value '%s' for parameter '%s' of extension '%s'" % (val, p, cls.EXTENSION_NAME))
+                else:
+                    client_no_context_takeover = True
+
+            elif p == 'server_no_context_takeover':
+                # noinspection PySimplifyBooleanCheck
+                if val is not True:
+                    raise Exception("illegal extension parameter value '%s' for parameter '%s' of extension '%s'" % (val, p, cls.EXTENSION_NAME))
+                else:
+                    server_no_context_takeover = True
+
+            else:
+                raise Exception("illegal extension parameter '%s' for extension '%s'" % (p, cls.EXTENSION_NAME))
+
+        response = cls(client_no_context_takeover,
+                       server_no_context_takeover,
+                       dictionary_id)
+        return response
+
+    def __init__(self,
+                 client_no_context_takeover,
+                 server_no_context_takeover,
+                 dictionary_id=None):
+        self.client_no_context_takeover = client_no_context_takeover
+        self.server_no_context_takeover = server_no_context_takeover
+        self.dictionary_id = dictionary_id
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        return {'extension': self.EXTENSION_NAME,
+                'client_no_context_takeover': self.client_no_context_takeover,
+                'server_no_context_takeover': self.server_no_context_takeover,
+                'dictionary_id': self.dictionary_id}
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageZstdResponse(client_no_context_takeover = %s, server_no_context_takeover = %s, dictionary_id = %s)" % (self.client_no_context_takeover, self.server_no_context_takeover, self.dictionary_id)
+
+
+class PerMessageZstdResponseAccept(PerMessageCompressResponseAccept, PerMessageZstdMixin):
+    """
+    Set of parameters with which to accept an `permessage-zstd` response
+    from a server by a client.
+    """
+
+    def __init__(self,
+                 response,
+                 no_context_takeover=None,
+                 compress_level=None,
+                 dictionary=None):
+        """
+
+        :param response: The response being accepted.
+        :type response: Instance of :class:`autobahn.compress.PerMessageZstdResponse`.
+        :param no_context_takeover: Override client ("client-to-server direction") context takeover (this must be compatible with response).
+        :type no_context_takeover: bool
+        :param compress_level: Set client ("client-to-server direction") compress level.
+        :type compress_level: int
+        :param dictionary: The dictionary the server accepted (required iff the server accepted one).
+        :type dictionary: bytes
+        """
+        if not isinstance(response, PerMessageZstdResponse):
+            raise Exception("invalid type %s for response" % type(response))
+
+        self.response = response
+
+        if no_context_takeover is not None:
+            if type(no_context_takeover) != bool:
+                raise Exception("invalid type %s for no_context_takeover" % type(no_context_takeover))
+
+            if response.client_no_context_takeover and not no_context_takeover:
+                raise Exception("invalid value %s for no_context_takeover - server requested feature" % no_context_takeover)
+
+        self.no_context_takeover = no_context_takeover
+
+        if compress_level is not None:
+            if compress_level not in self.COMPRESS_LEVEL_PERMISSIBLE_VALUES:
+                raise Exception("invalid value %s for compress_level - permissible values %s" % (compress_level, self.COMPRESS_LEVEL_PERMISSIBLE_VALUES))
+
+        self.compress_level = compress_level
+
+        _check_dictionary(dictionary, response.dictionary_id, 'server')
+
+        self.dictionary = dictionary
+
+    def __json__(self):
+        """
+        Returns a JSON serializable object representation.
+
+        :returns: JSON serializable representation.
+        :rtype: dict
+        """
+        return {'extension': self.EXTENSION_NAME,
+                'response': self.response.__json__(),
+                'no_context_takeover': self.no_context_takeover,
+                'compress_level': self.compress_level}
+
+    def __repr__(self):
+        """
+        Returns Python object representation that can be eval'ed to reconstruct the object.
+
+        :returns: Python string representation.
+        :rtype: str
+        """
+        return "PerMessageZstdResponseAccept(response = %s, no_context_takeover = %s, compress_level = %s)" % (self.response.__repr__(), self.no_context_takeover, self.compress_level)
+
+
+class PerMessageZstd(PerMessageCompress, PerMessageZstdMixin):
+    """
+    `permessage-zstd` WebSocket extension processor.
+
+    Without context takeover, every message is compressed into a zstd frame of
+    its own. With context takeover, all messages sent in one direction form a
+    single zstd frame, with every message ending on a flushed block. Such a
+    message cannot be discarded once compressed.
+    """
+
+    DEFAULT_COMPRESS_LEVEL = 3
+
+    MAX_WINDOW_SIZE = 8 * 1024 * 1024
+    """
+    Largest window the peer may make the decompressor allocate (8MB, which is what
+    levels up to 19 use at most).
+    """
+
+    DECOMPRESS_SLICE_SIZE = 16
+    """
+    Size of the first slice of compressed octets fed to the decompressor at once
+    by ``decompress_message_data_chunked``. A few octets of zstd can inflate to a
+    full block of 128KB, so this starts out small.
+    """
+
+    @classmethod
+    def create_from_response_accept(cls, is_server, accept):
+        pmce = cls(is_server,
+                   accept.response.server_no_context_takeover,
+                   accept.no_context_takeover if accept.no_context_takeover is not None else accept.response.client_no_context_takeover,
+                   accept.compress_level,
+                   accept.dictionary)
+        return pmce
+
+    @classmethod
+    def create_from_offer_accept(cls, is_server, accept):
+        pmce = cls(is_server,
+                   accept.no_context_takeover if accept.no_context_takeover is not None else accept.offer.request_no_context_takeover,
+                   accept.request_no_context_takeover,
+                   accept.compress_level,
+                   accept.dictionary)
+        return pmce
+
+    def __init__(self,
+                 is_server,
+                 server_no_context_takeover,
+                 client_no_context_takeover,
+                 compress_level=None,
+                 dictionary=None):
+        self._is_server = is_server
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self.compress_level = compress_level if compress_level else self.DEFAULT_COMPRESS_LEVEL
+
+        self.dictionary_id = _dictionary_id(dictionary) if dictionary is not None else None
+        self._dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+
+        # compression contexts (reused for every message) and the streaming
+        # (de)compressors of the current message
+        self._cctx = None
+        self._dctx = None
+        self._compressor = None
+        self._decompressor = None
+
+    def __json__(self):
+        return {'extension': self.EXTENSION_NAME,
+                'server_no_context_takeover': self.server_no_context_takeover,
+                'client_no_context_takeover': self.client_no_context_takeover,
+                'compress_level': self.compress_level,
+                'dictionary_id': self.dictionary_id}
+
+    def __repr__(self):
+        return "PerMessageZstd(is_server = %s, server_no_context_takeover = %s, client_no_context_takeover = %s, compress_level = %s, dictionary_id = %s)" % (self._is_server, self.server_no_context_takeover, self.client_no_context_takeover, self.compress_level, self.dictionary_id)
+
+    def get_broadcast_key(self):
+        if self._is_server:
+            if self.server_no_context_takeover:
+                return self.EXTENSION_NAME, self.compress_level, self.dictionary_id
+        else:
+            if self.client_no_context_takeover:
+                return self.EXTENSION_NAME, self.compress_level, self.dictionary_id
+        return None
+
+    def set_compress_options(self, level=None, strategy=None):
+        if level is not None and level != self.compress_level:
+            self.compress_level = level
+            self._cctx = None
+            self._compressor = None
+
+    def _no_context_takeover(self, sending):
+        return self.server_no_context_takeover if self._is_server == sending else self.client_no_context_takeover
+
+    def start_compress_message(self):
+        if self._compressor is None or self._no_context_takeover(True):
+            if self._cctx is None:
+                self._cctx = zstandard.ZstdCompressor(level=self.compress_level, dict_data=self._dictionary)
+            self._compressor = self._cctx.compressobj()
+
+    def compress_message_data(self, data):
+        return self._compressor.compress(data)
+
+    def end_compress_message(self):
+        if self._no_context_takeover(True):
+            data = self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+            self._compressor = None
+        else:
+            data = self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return data
+
+    def discard_compress_message(self):
+        # with context takeover, the message is part of the zstd frame shared
+        # with the messages before and after it, and cannot be taken out again
+        if not self._no_context_takeover(True):
+            return False
+        self._compressor = None
+        return True
+
+    def start_decompress_message(self):
+        if self._decompressor is None or self._no_context_takeover(False):
+            if self._dctx is None:
+                self._dctx = zstandard.ZstdDecompressor(dict_data=self._dictionary, max_window_size=self.MAX_WINDOW_SIZE)
+            self._decompressor = self._dctx.decompressobj()
+
+    def decompress_message_data(self, data):
+        return self._decompressor.decompress(data)
+
+    def decompress_message_data_chunked(self, data, max_length):
+        # zstd decompressors cannot bound their output, so the input is fed
+        # in slices, sized after the expansion ratio seen so far such that
+        # every slice inflates to about max_length octets
+        decompressor = self._decompressor
+        size = self.DECOMPRESS_SLICE_SIZE
+        consumed = produced = 0
+        yielded = False
+        while consumed < len(data):
+            chunk = decompressor.decompress(data[consumed:consumed + size])
+            consumed = min(consumed + size, len(data))
+            produced += len(chunk)
+            for i in range(0, len(chunk), max_length):
+                yield chunk[i:i + max_length]
+                yielded = True
+            if produced:
+                size = max(1, max_length * consumed // produced)
+            else:
+                size *= 2
+        if not yielded:
+            yield b''
+
+    def end_decompress_message(self):
+        if self._no_context_takeover(False):
+            self._decompressor = None
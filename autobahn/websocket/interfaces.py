@@ -112,16 +112,26 @@ class IWebSocketServerChannelFactory(object):
                            applyMask=None,
                            maxFramePayloadSize=None,
                            maxMessagePayloadSize=None,
+                           maxOpeningHandshakeSize=None,
                            autoFragmentSize=None,
+                           reassembleBytearray=None,
                            failByDrop=None,
                            echoCloseCodeReason=None,
                            openHandshakeTimeout=None,
                            closeHandshakeTimeout=None,
                            tcpNoDelay=None,
                            perMessageCompressionAccept=None,
+                           perMessageCompressionLevel=None,
+                           perMessageCompressionStrategy=None,
+                           perMessageCompressionMinSize=None,
+                           perMessageCompressionMaxRatio=None,
+                           perMessageCompressionPoolSize=None,
                            autoPingInterval=None,
                            autoPingTimeout=None,
                            autoPingSize=None,
+                           coalesceWrites=None,
+                           coalesceWritesMaxSize=None,
+                           coalesceWritesMaxDelay=None,
                            serveFlashSocketPolicy=None,
                            flashSocketPolicy=None,
                            allowedOrigins=None,
@@ -155,9 +165,15 @@ class IWebSocketServerChannelFactory(object):
         :param maxMessagePayloadSize: Maximum message payload size (after reassembly of fragmented messages) that will be accepted when receiving or `0` for unlimited (default: `0`).
         :type maxMessagePayloadSize: int or None
 
+        :param maxOpeningHandshakeSize: Maximum size of the HTTP request (server) or response (client) header in the opening handshake that will be accepted or `0` for unlimited (default: `65536`).
+        :type maxOpeningHandshakeSize: int or None
+
         :param autoFragmentSize: Automatic fragmentation of outgoing data messages (when using the message-based API) into frames with payload length `<=` this size or `0` for no auto-fragmentation (default: `0`).
         :type autoFragmentSize: int or None
 
+        :param reassembleBytearray: Reassemble incoming data messages into a `bytearray` preallocated from the frame lengths (never beyond `maxMessagePayloadSize`), and provide the message payload as that `bytearray` rather than `bytes`. This avoids holding on to all received chunks of a message and copying them once more when the message is complete (default: `False`).
+        :type reassembleBytearray: bool or None
+
         :param failByDrop: Fail connections by dropping the TCP connection without performing closing handshake (default: `True`).
         :type failbyDrop: bool or None
 
@@ -176,6 +192,21 @@ class IWebSocketServerChannelFactory(object):
         :param perMessageCompressionAccept: Acceptor function for offers.
         :type perMessageCompressionAccept: callable or None
 
+        :param perMessageCompressionLevel: Compression level messages sent are compressed with, e.g. `0` - `9` for permessage-deflate, or `None` for the extension's default (default: `None`).
+        :type perMessageCompressionLevel: int or None
+
+        :param perMessageCompressionStrategy: Compression strategy messages sent are compressed with, e.g. `zlib.Z_FILTERED` for permessage-deflate, or `None` for the extension's default (default: `None`).
+        :type perMessageCompressionStrategy: int or None
+
+        :param perMessageCompressionMinSize: Send messages with a payload smaller than this many octets uncompressed, since compressing them costs more CPU than it saves bandwidth (default: `0`).
+        :type perMessageCompressionMinSize: int or None
+
+        :param perMessageCompressionMaxRatio: Send messages uncompressed after all when compressing them does not reduce their size to at most this fraction of the payload (e.g. because they are compressed already). Set to `0` to disable (default: `0`).
+        :type perMessageCompressionMaxRatio: float or None
+
+        :param perMessageCompressionPoolSize: Share compressors between connections which compress messages without context takeover, keeping up to this many idle compressors per set of compression parameters. Set to `0` to disable (default: `0`).
+        :type perMessageCompressionPoolSize: int or None
+
         :param autoPingInterval: Automatically send WebSocket pings every given seconds. When the peer does not respond
            in `autoPingTimeout`, drop the connection. Set to `0` to disable. (default: `0`).
         :type autoPingInterval: float or None
@@ -187,6 +218,15 @@ class IWebSocketServerChannelFactory(object):
         :param autoPingSize: Payload size for automatic pings/pongs. Must be an integer from `[4, 125]`. (default: `4`).
         :type autoPingSize: int or None
 
+        :param coalesceWrites: Buffer outgoing frames written during one reactor/loop iteration, and write them to the transport as one chunk (default: `False`). Synched and chopped writes are never coalesced.
+        :type coalesceWrites: bool or None
+
+        :param coalesceWritesMaxSize: When coalescing writes, write out buffered octets as soon as at least this many are buffered (default: `65536`).
+        :type coalesceWritesMaxSize: int or None
+
+        :param coalesceWritesMaxDelay: When coalescing writes, write out buffered octets at the latest this many seconds after the first was buffered, or `0` for the next reactor/loop iteration (default: `0`).
+        :type coalesceWritesMaxDelay: float or None
+
         :param serveFlashSocketPolicy: Serve the Flash Socket Policy when we receive a policy file request on this protocol. (default: `False`).
         :type serveFlashSocketPolicy: bool or None
 
@@ -302,7 +342,9 @@ class IWebSocketClientChannelFactory(object):
                            applyMask=None,
                            maxFramePayloadSize=None,
                            maxMessagePayloadSize=None,
+                           maxOpeningHandshakeSize=None,
                            autoFragmentSize=None,
+                           reassembleBytearray=None,
                            failByDrop=None,
                            echoCloseCodeReason=None,
                            serverConnectionDropTimeout=None,
@@ -311,9 +353,17 @@ class IWebSocketClientChannelFactory(object):
                            tcpNoDelay=None,
                            perMessageCompressionOffers=None,
                            perMessageCompressionAccept=None,
+                           perMessageCompressionLevel=None,
+                           perMessageCompressionStrategy=None,
+                           perMessageCompressionMinSize=None,
+                           perMessageCompressionMaxRatio=None,
+                           perMessageCompressionPoolSize=None,
                            autoPingInterval=None,
                            autoPingTimeout=None,
-                           autoPingSize=None):
+                           autoPingSize=None,
+                           coalesceWrites=None,
+                           coalesceWritesMaxSize=None,
+                           coalesceWritesMaxDelay=None):
         """
         Set WebSocket protocol options used as defaults for _new_ protocol instances.
 
@@ -338,9 +388,15 @@ class IWebSocketClientChannelFactory(object):
         :param maxMessagePayloadSize: Maximum message payload size (after reassembly of fragmented messages) that will be accepted when receiving or `0` for unlimited (default: `0`).
         :type maxMessagePayloadSize: int
 
+        :param maxOpeningHandshakeSize: Maximum size of the HTTP request (server) or response (client) header in the opening handshake that will be accepted or `0` for unlimited (default: `65536`).
+        :type maxOpeningHandshakeSize: int
+
         :param autoFragmentSize: Automatic fragmentation of outgoing data messages (when using the message-based API) into frames with payload length `<=` this size or `0` for no auto-fragmentation (default: `0`).
         :type autoFragmentSize: int
 
+        :param reassembleBytearray: Reassemble incoming data messages into a `bytearray` preallocated from the frame lengths (never beyond `maxMessagePayloadSize`), and provide the message payload as that `bytearray` rather than `bytes`. This avoids holding on to all received chunks of a message and copying them once more when the message is complete (default: `False`).
+        :type reassembleBytearray: bool
+
         :param failByDrop: Fail connections by dropping the TCP connection without performing closing handshake (default: `True`).
         :type failbyDrop: bool
 
@@ -365,6 +421,21 @@ class IWebSocketClientChannelFactory(object):
         :param perMessageCompressionAccept: Acceptor function for responses.
         :type perMessageCompressionAccept: callable
 
+        :param perMessageCompressionLevel: Compression level messages sent are compressed with, e.g. `0` - `9` for permessage-deflate, or `None` for the extension's default (default: `None`).
+        :type perMessageCompressionLevel: int or None
+
+        :param perMessageCompressionStrategy: Compression strategy messages sent are compressed with, e.g. `zlib.Z_FILTERED` for permessage-deflate, or `None` for the extension's default (default: `None`).
+        :type perMessageCompressionStrategy: int or None
+
+        :param perMessageCompressionMinSize: Send messages with a payload smaller than this many octets uncompressed, since compressing them costs more CPU than it saves bandwidth (default: `0`).
+        :type perMessageCompressionMinSize: int
+
+        :param perMessageCompressionMaxRatio: Send messages uncompressed after all when compressing them does not reduce their size to at most this fraction of the payload (e.g. because they are compressed already). Set to `0` to disable (default: `0`).
+        :type perMessageCompressionMaxRatio: float
+
+        :param perMessageCompressionPoolSize: Share compressors between connections which compress messages without context takeover, keeping up to this many idle compressors per set of compression parameters. Set to `0` to disable (default: `0`).
+        :type perMessageCompressionPoolSize: int
+
         :param autoPingInterval: Automatically send WebSocket pings every given seconds. When the peer does not respond
            in `autoPingTimeout`, drop the connection. Set to `0` to disable. (default: `0`).
         :type autoPingInterval: float or None
@@ -375,6 +446,15 @@ class IWebSocketClientChannelFactory(object):
 
         :param autoPingSize: Payload size for automatic pings/pongs. Must be an integer from `[4, 125]`. (default: `4`).
         :type autoPingSize: int
+
+        :param coalesceWrites: Buffer outgoing frames written during one reactor/loop iteration, and write them to the transport as one chunk (default: `False`). Synched and chopped writes are never coalesced.
+        :type coalesceWrites: bool
+
+        :param coalesceWritesMaxSize: When coalescing writes, write out buffered octets as soon as at least this many are buffered (default: `65536`).
+        :type coalesceWritesMaxSize: int
+
+        :param coalesceWritesMaxDelay: When coalescing writes, write out buffered octets at the latest this many seconds after the first was buffered, or `0` for the next reactor/loop iteration (default: `0`).
+        :type coalesceWritesMaxDelay: float
         """
 
     @public
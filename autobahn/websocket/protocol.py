@@ -48,11 +48,12 @@ from autobahn.websocket.interfaces import IWebSocketChannel, \
 
 from autobahn.websocket.types import ConnectionRequest, ConnectionResponse, ConnectionDeny
 
-from autobahn.util import Stopwatch, newid, wildcards2patterns, encode_truncate
-from autobahn.util import _LazyHexFormatter
+from autobahn.util import Stopwatch, newid, wildcards2patterns, encode_truncate, rtime
+from autobahn.util import _LazyHexFormatter, _LazyPrettyFormatter
 from autobahn.websocket.utf8validator import Utf8Validator
 from autobahn.websocket.xormasker import XorMaskerNull, create_xor_masker
 from autobahn.websocket.compress import PERMESSAGE_COMPRESSION_EXTENSION
+from autobahn.websocket.compress import PerMessageDeflatePool
 from autobahn.websocket.util import parse_url
 
 from six.moves import urllib
@@ -150,6 +151,19 @@ def _is_same_origin(websocket_origin, host_scheme, host_port, host_policy):
 
 class TrafficStats(object):
 
+    __slots__ = ('outgoingOctetsWireLevel',
+                 'outgoingOctetsWebSocketLevel',
+                 'outgoingOctetsAppLevel',
+                 'outgoingWebSocketFrames',
+                 'outgoingWebSocketMessages',
+                 'incomingOctetsWireLevel',
+                 'incomingOctetsWebSocketLevel',
+                 'incomingOctetsAppLevel',
+                 'incomingWebSocketFrames',
+                 'incomingWebSocketMessages',
+                 'preopenOutgoingOctetsWireLevel',
+                 'preopenIncomingOctetsWireLevel')
+
     def __init__(self):
         self.reset()
 
@@ -220,6 +234,81 @@ class TrafficStats(object):
         return json.dumps(self.__json__())
 
 
+def _decode_frame_header(b0, b1):
+    """
+    Decode the first two octets of a WebSocket frame header.
+
+    FOR INTERNAL USE ONLY!
+
+    :param b0: First octet of the frame header.
+    :type b0: int
+    :param b1: Second octet of the frame header.
+    :type b1: int
+
+    :returns: tuple -- Frame FIN flag, RSV, opcode, mask flag, payload length
+        (7 bit field) and complete header length (including extended payload
+        length and mask).
+    """
+    frame_fin = (b0 & 0x80) != 0
+    frame_rsv = (b0 & 0x70) >> 4
+    frame_opcode = b0 & 0x0f
+    frame_masked = (b1 & 0x80) != 0
+    frame_payload_len1 = b1 & 0x7f
+
+    frame_header_len = 2
+    if frame_masked:
+        frame_header_len += 4
+    if frame_payload_len1 == 126:
+        frame_header_len += 2
+    elif frame_payload_len1 == 127:
+        frame_header_len += 8
+
+    return frame_fin, frame_rsv, frame_opcode, frame_masked, frame_payload_len1, frame_header_len
+
+
+def _build_frame_header_table():
+    """
+    Build the lookup table of decoded frame headers, indexed by the first two
+    octets of a frame header (as a 16 bit big endian integer). Only frame headers
+    passing all checks that don't depend on connection state have an entry,
+    all other entries are ``None``.
+
+    FOR INTERNAL USE ONLY!
+    """
+    table = [None] * 65536
+    for b0 in range(256):
+        frame_fin, frame_rsv, frame_opcode, _, _, _ = _decode_frame_header(b0, 0)
+
+        # RSV may only have the bit used by permessage-compress set, and
+        # control frames must not be fragmented
+        if frame_rsv not in [0, 4]:
+            continue
+        if frame_opcode > 7:
+            if not frame_fin or frame_opcode not in [8, 9, 10]:
+                continue
+        elif frame_opcode not in [0, 1, 2]:
+            continue
+
+        for b1 in range(256):
+            header = _decode_frame_header(b0, b1)
+            frame_payload_len1 = header[4]
+
+            # control frames must have a payload of 125 octets or less, and
+            # close frames must not have a 1 octet payload
+            if frame_opcode > 7:
+                if frame_payload_len1 > 125 or (frame_opcode == 8 and frame_payload_len1 == 1):
+                    continue
+
+            table[(b0 << 8) | b1] = header
+    return table
+
+
+_FRAME_HEADERS = _build_frame_header_table()
+
+_UINT16 = struct.Struct('!H')
+_UINT64 = struct.Struct('!Q')
+
+
 class FrameHeader(object):
     """
     Thin-wrapper for storing WebSocket frame metadata.
@@ -249,6 +338,204 @@ class FrameHeader(object):
         self.mask = mask
 
 
+if six.PY3:
+    _memview = memoryview
+else:
+    # Python 2 str.join() does not accept buffer objects, so we
+    # fall back to (copying) slices there
+    def _memview(data):
+        return data
+
+
+class ReceiveBuffer(object):
+    """
+    Buffer for incoming octets.
+
+    Received chunks are stored as-is, together with a read offset into the
+    first chunk. Consuming octets from the front of the buffer hence never
+    copies the octets remaining buffered, which keeps processing cost per
+    octet constant, no matter how the incoming octets are fragmented across
+    transport reads. The chunks are only held (in a deque) while octets are
+    buffered, so an idle connection doesn't carry an empty deque around.
+
+    FOR INTERNAL USE ONLY!
+    """
+
+    __slots__ = ('_chunks', '_offset', '_length')
+
+    def __init__(self, data=None):
+        """
+
+        :param data: Initial buffer content.
+        :type data: bytes or None
+        """
+        self._chunks = None
+        self._offset = 0
+        self._length = 0
+        if data:
+            self.append(data)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, data):
+        """
+        Append octets to the end of the buffer.
+
+        :param data: The octets to append.
+        :type data: bytes
+        """
+        if data:
+            if self._chunks is None:
+                self._chunks = deque()
+            self._chunks.append(data)
+            self._length += len(data)
+
+    def peek(self, n):
+        """
+        Get (up to) the first ``n`` buffered octets without consuming them.
+        Only the octets returned are copied.
+
+        :param n: Maximum number of octets to return.
+        :type n: int
+
+        :returns: bytes -- The octets.
+        """
+        n = min(n, self._length)
+        if n == 0:
+            return b''
+        offset = self._offset
+        chunk = self._chunks[0]
+        if len(chunk) - offset >= n:
+            return chunk[offset:offset + n]
+        parts = []
+        for chunk in self._chunks:
+            part = _memview(chunk)[offset:offset + n]
+            parts.append(part)
+            n -= len(part)
+            offset = 0
+            if n == 0:
+                break
+        return b''.join(parts)
+
+    def read(self, n):
+        """
+        Consume and return (up to) the next ``n`` buffered octets. When the
+        octets returned make up a complete received chunk, that chunk is
+        returned without copying.
+
+        :param n: Maximum number of octets to consume.
+        :type n: int
+
+        :returns: bytes -- The octets consumed.
+        """
+        n = min(n, self._length)
+        if n == 0:
+            return b''
+        chunks = self._chunks
+        offset = self._offset
+        chunk = chunks[0]
+        avail = len(chunk) - offset
+        if avail > n:
+            data = chunk[offset:offset + n]
+            offset += n
+        elif avail == n:
+            data = chunk[offset:] if offset else chunk
+            chunks.popleft()
+            offset = 0
+        else:
+            parts = []
+            remaining = n
+            while remaining > 0:
+                chunk = chunks[0]
+                avail = len(chunk) - offset
+                if avail <= remaining:
+                    parts.append(_memview(chunk)[offset:] if offset else chunk)
+                    chunks.popleft()
+                    remaining -= avail
+                    offset = 0
+                else:
+                    parts.append(_memview(chunk)[offset:offset + remaining])
+                    offset += remaining
+                    remaining = 0
+            data = b''.join(parts)
+        self._offset = offset
+        self._length -= n
+        if self._length == 0:
+            self._chunks = None
+        return data
+
+    def discard(self, n):
+        """
+        Consume (up to) the next ``n`` buffered octets without returning them.
+
+        :param n: Maximum number of octets to consume.
+        :type n: int
+        """
+        n = min(n, self._length)
+        self._length -= n
+        chunks = self._chunks
+        offset = self._offset + n
+        while chunks and offset >= len(chunks[0]):
+            offset -= len(chunks.popleft())
+        self._offset = offset
+        if self._length == 0:
+            self._chunks = None
+
+    def find(self, sub, start=0):
+        """
+        Find the first occurrence of ``sub`` in the buffered octets, at or after
+        position ``start``. Only the octets from ``start`` on are looked at, so
+        repeated searches for something not yet received can resume where the
+        previous search stopped, without going over the whole buffer again.
+
+        :param sub: The octets to find.
+        :type sub: bytes
+        :param start: The position to start searching at.
+        :type start: int
+
+        :returns: int -- The position of ``sub`` in the buffer, or ``-1``.
+        """
+        chunks = self._chunks
+        start = max(start, 0)
+        if not chunks or start >= self._length:
+            return -1
+
+        # walk back from the end of the buffer to the chunk holding position
+        # start, so that only the chunks received since are looked at (the
+        # first chunk starts at -offset, as its first octets were consumed)
+        index = len(chunks)
+        pos = self._length
+        while pos > start:
+            index -= 1
+            pos -= len(chunks[index])
+        skip = start - pos
+
+        if index == len(chunks) - 1:
+            i = chunks[index].find(sub, skip)
+            return -1 if i < 0 else start + i - skip
+
+        parts = [_memview(chunks[index])[skip:]]
+        for index in range(index + 1, len(chunks)):
+            parts.append(chunks[index])
+        i = b''.join(parts).find(sub)
+        return -1 if i < 0 else start + i
+
+    def getvalue(self):
+        """
+        Get all buffered octets (without consuming them) as one contiguous
+        bytes object.
+
+        :returns: bytes -- The buffered octets.
+        """
+        if self._length == 0:
+            return b''
+        if self._offset or len(self._chunks) > 1:
+            data = self.read(self._length)
+            self.append(data)
+        return self._chunks[0]
+
+
 def parseHttpHeader(data):
     """
     Parses the beginning of a HTTP request header (the data up to the \n\n line) into a pair
@@ -270,27 +557,42 @@ def parseHttpHeader(data):
     #   - http://tools.ietf.org/html/rfc5987
     #   - https://github.com/crossbario/autobahn-python/issues/533
     #
-    raw = data.decode('iso-8859-1').splitlines()
-    http_status_line = raw[0].strip()
+    lines = data.decode('iso-8859-1').split('\n')
+    http_status_line = lines[0].strip()
     http_headers = {}
     http_headers_cnt = {}
-    for h in raw[1:]:
-        i = h.find(":")
-        if i > 0:
+
+    # values of HTTP headers given more than once are collected here, and
+    # joined only once all headers have been parsed
+    repeated = None
+
+    for line in lines[1:]:
+        key, sep, value = line.partition(':')
+        if sep and key:
             # HTTP header keys are case-insensitive
-            key = h[:i].strip().lower()
-            value = h[i + 1:].strip()
+            key = key.strip().lower()
+            value = value.strip()
 
             # handle HTTP headers split across multiple lines
-            if key in http_headers:
-                http_headers[key] += ", %s" % value
+            if key in http_headers_cnt:
+                if repeated is None:
+                    repeated = {}
+                if key in repeated:
+                    repeated[key].append(value)
+                else:
+                    repeated[key] = [http_headers[key], value]
                 http_headers_cnt[key] += 1
             else:
                 http_headers[key] = value
                 http_headers_cnt[key] = 1
         else:
-            # skip bad HTTP header
+            # skip bad HTTP header (or the empty line ending the headers)
             pass
+
+    if repeated:
+        for key, values in repeated.items():
+            http_headers[key] = ', '.join(values)
+
     return http_status_line, http_headers, http_headers_cnt
 
 
@@ -356,6 +658,43 @@ class Timings(object):
         return pformat(self._timings)
 
 
+# names of the hooks of the message-based API (and the frame-based and streaming API)
+_MESSAGE_API_HOOKS = ('onMessageBegin',
+                      'onMessageFrameBegin',
+                      'onMessageFrameData',
+                      'onMessageFrameEnd',
+                      'onMessageFrame',
+                      'onMessageEnd')
+
+# protocol classes, and whether they use the default implementation of all those hooks
+_DEFAULT_MESSAGE_API = {}
+
+
+def _uses_default_message_api(proto):
+    """
+    Check if a protocol instance uses the default implementation of the hooks of the
+    message-based API, that is, just receives complete messages in ``onMessage``.
+
+    FOR INTERNAL USE ONLY!
+    """
+    cls = proto.__class__
+    default = _DEFAULT_MESSAGE_API.get(cls)
+    if default is None:
+        default = True
+        for name in _MESSAGE_API_HOOKS:
+            implementation = six.get_unbound_function(getattr(cls, name))
+            if implementation is not six.get_unbound_function(getattr(WebSocketProtocol, name)):
+                default = False
+                break
+        _DEFAULT_MESSAGE_API[cls] = default
+    if default:
+        # hooks might be overridden on the instance too
+        for name in _MESSAGE_API_HOOKS:
+            if name in proto.__dict__:
+                return False
+    return default
+
+
 class WebSocketProtocol(object):
     """
     Protocol base class for WebSocket.
@@ -409,6 +748,18 @@ class WebSocketProtocol(object):
     For synched/chopped writes, this is the reactor reentry delay in seconds.
     """
 
+    _SCATTER_WRITE_MIN_LENGTH = 1024
+    """
+    Frames with payloads at least this long are written as separate header and
+    payload buffers rather than first concatenating both (scatter/gather write).
+    """
+
+    _DECOMPRESS_CHUNK_SIZE = 65536
+    """
+    Maximum size of the chunks compressed incoming messages are decompressed in,
+    so that the payload size limit is checked before decompressing any further.
+    """
+
     MESSAGE_TYPE_TEXT = 1
     """
     WebSocket text message type (UTF-8 payload).
@@ -505,7 +856,14 @@ class WebSocketProtocol(object):
                            'applyMask',
                            'maxFramePayloadSize',
                            'maxMessagePayloadSize',
+                           'maxOpeningHandshakeSize',
                            'autoFragmentSize',
+                           'reassembleBytearray',
+                           'perMessageCompressionLevel',
+                           'perMessageCompressionStrategy',
+                           'perMessageCompressionMinSize',
+                           'perMessageCompressionMaxRatio',
+                           'perMessageCompressionPoolSize',
                            'failByDrop',
                            'echoCloseCodeReason',
                            'openHandshakeTimeout',
@@ -513,7 +871,10 @@ class WebSocketProtocol(object):
                            'tcpNoDelay',
                            'autoPingInterval',
                            'autoPingTimeout',
-                           'autoPingSize']
+                           'autoPingSize',
+                           'coalesceWrites',
+                           'coalesceWritesMaxSize',
+                           'coalesceWritesMaxDelay']
     """
     Configuration attributes common to servers and clients.
     """
@@ -544,6 +905,67 @@ class WebSocketProtocol(object):
     Configuration attributes specific to clients.
     """
 
+    # Per-connection state lives in slots rather than in the instance dictionary,
+    # which considerably reduces the memory taken by each (idle) connection. Instances
+    # still have a __dict__, so applications can set attributes of their own as usual.
+    __slots__ = tuple(CONFIG_ATTRS_COMMON) + ('__dict__',
+                                              '__weakref__',
+                                              'is_closed',
+                                              'state',
+                                              'send_state',
+                                              'send_queue',
+                                              'triggered',
+                                              'trafficStats',
+                                              'trackedTimings',
+                                              'utf8validator',
+                                              'utf8validateLast',
+                                              'utf8validateIncomingCurrentMessage',
+                                              'current_frame',
+                                              'inside_message',
+                                              'control_frame_data',
+                                              'frame_length',
+                                              'frame_data',
+                                              'message_is_binary',
+                                              'message_data',
+                                              'message_data_total_length',
+                                              'http_status_line',
+                                              'http_headers',
+                                              'http_request_data',
+                                              'http_response_data',
+                                              'websocket_version',
+                                              'websocket_protocol_in_use',
+                                              'websocket_extensions_in_use',
+                                              'wasMaxFramePayloadSizeExceeded',
+                                              'wasMaxMessagePayloadSizeExceeded',
+                                              'closedByMe',
+                                              'failedByMe',
+                                              'droppedByMe',
+                                              'wasClean',
+                                              'wasNotCleanReason',
+                                              'wasServerConnectionDropTimeout',
+                                              'wasOpenHandshakeTimeout',
+                                              'wasCloseHandshakeTimeout',
+                                              'wasServingFlashSocketPolicyFile',
+                                              'localCloseCode',
+                                              'localCloseReason',
+                                              'remoteCloseCode',
+                                              'remoteCloseReason',
+                                              'openHandshakeTimeoutCall',
+                                              'closeHandshakeTimeoutCall',
+                                              'autoPingTimeoutCall',
+                                              'autoPingPending',
+                                              'autoPingPendingCall',
+                                              '_receive_buffer',
+                                              '_http_header_scanned',
+                                              '_perMessageCompress',
+                                              '_isMessageCompressed',
+                                              '_message_decompressed_length',
+                                              '_message_into_bytearray',
+                                              '_message_data_length',
+                                              '_coalesce_buffer',
+                                              '_coalesce_size',
+                                              '_coalesce_call')
+
     def __init__(self):
         #: a Future/Deferred that fires when we hit STATE_CLOSED
         self.is_closed = txaio.create_future()
@@ -559,9 +981,16 @@ class WebSocketProtocol(object):
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.onMessageBegin`
         """
         self.message_is_binary = isBinary
-        self.message_data = []
         self.message_data_total_length = 0
 
+        # reassemble into a bytearray (preallocated from frame lengths), or a list of chunks
+        self._message_into_bytearray = self.reassembleBytearray and self.websocket_version != 0
+        if self._message_into_bytearray:
+            self.message_data = bytearray()
+            self._message_data_length = 0
+        else:
+            self.message_data = []
+
     def onMessageFrameBegin(self, length):
         """
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.onMessageFrameBegin`
@@ -583,6 +1012,11 @@ class WebSocketProtocol(object):
                     u'frame exceeds payload limit of {} octets'.format(self.maxFramePayloadSize)
                 )
 
+            # the length of uncompressed frames is exact, so we can preallocate the
+            # message payload right away (subsequent frames grow it as needed)
+            elif self._message_into_bytearray and len(self.message_data) == 0 and not self._isMessageCompressed:
+                self.message_data = bytearray(length)
+
     def onMessageFrameData(self, payload):
         """
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.onMessageFrameData`
@@ -597,6 +1031,12 @@ class WebSocketProtocol(object):
                         u'message exceeds payload limit of {} octets'.format(self.maxMessagePayloadSize)
                     )
                 self.message_data.append(payload)
+            elif self._message_into_bytearray:
+                # copy right away, so chunks aren't kept around until the message ends
+                i = self._message_data_length
+                j = i + len(payload)
+                self.message_data[i:j] = payload
+                self._message_data_length = j
             else:
                 self.frame_data.append(payload)
 
@@ -613,7 +1053,7 @@ class WebSocketProtocol(object):
         """
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.onMessageFrame`
         """
-        if not self.failedByMe:
+        if not self.failedByMe and not self._message_into_bytearray:
             self.message_data.extend(payload)
 
     def onMessageEnd(self):
@@ -621,7 +1061,12 @@ class WebSocketProtocol(object):
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.onMessageEnd`
         """
         if not self.failedByMe:
-            payload = b''.join(self.message_data)
+            if self._message_into_bytearray:
+                payload = self.message_data
+                if len(payload) > self._message_data_length:
+                    del payload[self._message_data_length:]
+            else:
+                payload = b''.join(self.message_data)
             if self.trackedTimings:
                 self.trackedTimings.track("onMessage")
             self._onMessage(payload, self.message_is_binary)
@@ -852,6 +1297,10 @@ class WebSocketProtocol(object):
             self.state = WebSocketProtocol.STATE_CLOSED
             txaio.resolve(self.is_closed, self)
 
+            # get out coalesced writes still buffered (e.g. a close frame)
+            if not abort:
+                self._flushWrites()
+
             self._closeConnection(abort)
         else:
             self.log.debug('dropping connection to peer {peer} skipped - connection already closed', peer=self.peer)
@@ -957,7 +1406,7 @@ class WebSocketProtocol(object):
                 configAttrSource = self.__class__.__name__
             configAttrLog.append((configAttr, getattr(self, configAttr), configAttrSource))
 
-        self.log.debug("\n{attrs}", attrs=pformat(configAttrLog))
+        self.log.debug("\n{attrs}", attrs=_LazyPrettyFormatter(configAttrLog))
 
         # permessage-compress extension
         self._perMessageCompress = None
@@ -975,16 +1424,24 @@ class WebSocketProtocol(object):
         else:
             self.state = WebSocketProtocol.STATE_CONNECTING
         self.send_state = WebSocketProtocol.SEND_STATE_GROUND
-        self.data = b''
+        self._receive_buffer = ReceiveBuffer()
+        self._http_header_scanned = 0
 
         # for chopped/synched sends, we need to queue to maintain
         # ordering when recalling the reactor to actually "force"
-        # the octets to wire (see test/trickling in the repo)
-        self.send_queue = deque()
+        # the octets to wire (see test/trickling in the repo). the
+        # queue (a deque) is only created when something is queued.
+        self.send_queue = None
         self.triggered = False
 
-        # incremental UTF8 validator
-        self.utf8validator = Utf8Validator()
+        # for coalesced writes, octets buffered for writing (as a list of chunks,
+        # created when something is buffered), and the timer for flushing those
+        self._coalesce_buffer = None
+        self._coalesce_size = 0
+        self._coalesce_call = None
+
+        # incremental UTF8 validator (created when the first text message is received)
+        self.utf8validator = None
 
         # track when frame/message payload sizes (incoming) were exceeded
         self.wasMaxFramePayloadSizeExceeded = False
@@ -1081,6 +1538,15 @@ class WebSocketProtocol(object):
             self.autoPingTimeoutCall.cancel()
             self.autoPingTimeoutCall = None
 
+        self.factory._openConnections.discard(self)
+
+        # drop coalesced writes not yet flushed
+        if self._coalesce_call is not None:
+            self._coalesce_call.cancel()
+            self._coalesce_call = None
+        self._coalesce_buffer = None
+        self._coalesce_size = 0
+
         # check required here because in some scenarios dropConnection
         # will already have resolved the Future/Deferred.
         if self.state != WebSocketProtocol.STATE_CLOSED:
@@ -1171,9 +1637,22 @@ class WebSocketProtocol(object):
 
         if self.logOctets:
             self.logRxOctets(data)
-        self.data += data
+        self._receive_buffer.append(data)
         self.consumeData()
 
+    @property
+    def data(self):
+        """
+        The incoming octets buffered and not yet consumed (as one contiguous
+        bytes object).
+        """
+        return self._receive_buffer.getvalue()
+
+    @data.setter
+    def data(self, data):
+        self._receive_buffer = ReceiveBuffer(data)
+        self._http_header_scanned = 0
+
     def consumeData(self):
         """
         Consume buffered (incoming) data.
@@ -1182,10 +1661,17 @@ class WebSocketProtocol(object):
         #
         if self.state == WebSocketProtocol.STATE_OPEN or self.state == WebSocketProtocol.STATE_CLOSING:
 
-            # process until no more buffered data left or WS was closed
+            # process until no more buffered data left or WS was closed. complete
+            # unfragmented data messages at the front of the buffer are taken out
+            # in batches, and everything else by the general frame processing.
             #
-            while self.processData() and self.state != WebSocketProtocol.STATE_CLOSED:
-                pass
+            while True:
+                if self.current_frame is None and self.state == WebSocketProtocol.STATE_OPEN:
+                    self.processMessagesBatched()
+                    if self.state == WebSocketProtocol.STATE_CLOSED:
+                        break
+                if not self.processData() or self.state == WebSocketProtocol.STATE_CLOSED:
+                    break
 
         # need to establish proxy connection
         #
@@ -1228,6 +1714,42 @@ class WebSocketProtocol(object):
         """
         raise Exception("must implement handshake (client or server) in derived class")
 
+    def _findEndOfHttpHeader(self):
+        """
+        Find the empty line ending the HTTP header in the data received so far.
+        Scanning resumes where the previous call stopped, so a HTTP header
+        trickling in over many reads is scanned only once.
+
+        FOR INTERNAL USE ONLY!
+
+        :returns: int -- The position of the empty line, or ``-1`` when the HTTP
+            header wasn't received completely yet.
+        """
+        end_of_header = self._receive_buffer.find(b"\x0d\x0a\x0d\x0a", self._http_header_scanned)
+        if end_of_header >= 0:
+            self._http_header_scanned = 0
+        else:
+            # the empty line might be split across reads
+            self._http_header_scanned = max(0, len(self._receive_buffer) - 3)
+        return end_of_header
+
+    def _isHttpHeaderTooLarge(self, end_of_header):
+        """
+        Check the HTTP header (received completely or not) against ``maxOpeningHandshakeSize``.
+
+        FOR INTERNAL USE ONLY!
+
+        :param end_of_header: The position of the empty line ending the HTTP header, or ``-1``.
+        :type end_of_header: int
+
+        :returns: bool -- ``True`` when the HTTP header is (or will be) too large.
+        """
+        if end_of_header >= 0:
+            size = end_of_header + 4
+        else:
+            size = len(self._receive_buffer)
+        return 0 < self.maxOpeningHandshakeSize < size
+
     def _trigger(self):
         """
         Trigger sending stuff from send queue (which is only used for
@@ -1239,46 +1761,118 @@ class WebSocketProtocol(object):
 
     def _send(self):
         """
-        Send out stuff from send queue. For details how this works, see
-        test/trickling in the repo.
+        Send out stuff from send queue: all entries queued by now, synched
+        entries each with a write of its own, and consecutive non-synched
+        entries at once. Entries queued meanwhile are sent after reentering
+        the reactor/loop once. For details how this works, see test/trickling
+        in the repo.
         """
-        if len(self.send_queue) > 0:
-            e = self.send_queue.popleft()
+        if self.send_queue:
+
+            while self.send_queue:
 
-            if self.state != WebSocketProtocol.STATE_CLOSED:
+                if self.state == WebSocketProtocol.STATE_CLOSED:
+                    self.log.debug("skipped delayed write, since connection is closed")
+                    self.send_queue = None
+                    self.triggered = False
+                    return
+
+                entries = [self.send_queue.popleft()]
+                if not entries[0][1]:
+                    while self.send_queue and not self.send_queue[0][1]:
+                        entries.append(self.send_queue.popleft())
+
+                if len(entries) == 1:
+                    data = entries[0][0]
+                else:
+                    data = b''.join([e[0] for e in entries])
 
-                self.transport.write(e[0])
+                self.transport.write(data)
 
                 if self.state == WebSocketProtocol.STATE_OPEN:
-                    self.trafficStats.outgoingOctetsWireLevel += len(e[0])
-                elif self.state == WebSocketProtocol.STATE_CONNECTING or self.state == WebSocketProtocol.STATE_PROXY_CONNECTING:
-                    self.trafficStats.preopenOutgoingOctetsWireLevel += len(e[0])
+                    self.trafficStats.outgoingOctetsWireLevel += len(data)
+                elif self.state in (WebSocketProtocol.STATE_CONNECTING, WebSocketProtocol.STATE_PROXY_CONNECTING):
+                    self.trafficStats.preopenOutgoingOctetsWireLevel += len(data)
 
                 if self.logOctets:
-                    self.logTxOctets(e[0], e[1])
-            else:
-                self.log.debug("skipped delayed write, since connection is closed")
+                    for e in entries:
+                        self.logTxOctets(e[0], e[1])
 
             # we need to reenter the reactor to make the latter
             # reenter the OS network stack, so that octets
             # can get on the wire. Note: this is a "heuristic",
             # since there is no (easy) way to really force out
             # octets from the OS network stack to wire.
-            txaio.call_later(WebSocketProtocol._QUEUED_WRITE_DELAY, self._send)
+            self._resumeSendQueue()
         else:
+            self.send_queue = None
             self.triggered = False
 
+    def _resumeSendQueue(self):
+        """
+        Arrange for :meth:`_send` to be called again, after reentering the
+        reactor/loop. Networking framework adapters override this when they
+        can reenter the reactor/loop without a timer delay.
+        """
+        txaio.call_later(WebSocketProtocol._QUEUED_WRITE_DELAY, self._send)
+
+    def _writeCoalesced(self, data):
+        """
+        Buffer octets for writing, and write out everything buffered as one
+        chunk once enough octets are buffered, or latest when the maximum delay
+        has passed (with no delay, in the next reactor/loop iteration).
+
+        FOR INTERNAL USE ONLY!
+        """
+        if self._coalesce_buffer is None:
+            self._coalesce_buffer = []
+        self._coalesce_buffer.append(data)
+        self._coalesce_size += len(data)
+        if self._coalesce_size >= self.coalesceWritesMaxSize:
+            self._flushWrites()
+        elif self._coalesce_call is None:
+            self._coalesce_call = txaio.call_later(self.coalesceWritesMaxDelay, self._onCoalesceTimeout)
+
+    def _onCoalesceTimeout(self):
+        self._coalesce_call = None
+        self._flushWrites()
+
+    def _flushWrites(self):
+        """
+        Write out everything buffered for coalesced writes.
+
+        FOR INTERNAL USE ONLY!
+        """
+        if self._coalesce_call is not None:
+            self._coalesce_call.cancel()
+            self._coalesce_call = None
+
+        if self._coalesce_buffer:
+            data = self._coalesce_buffer
+            self._coalesce_buffer = None
+            self._coalesce_size = 0
+            if len(data) == 1:
+                self.transport.write(data[0])
+            else:
+                self.transport.write(b''.join(data))
+
     def sendData(self, data, sync=False, chopsize=None):
         """
         Wrapper for self.transport.write which allows to give a chopsize.
-        When asked to chop up writing to TCP stream, we write only chopsize
-        octets and then give up control to select() in underlying reactor so
-        that bytes get onto wire immediately. Note that this is different from
+        When asked to chop up writing to TCP stream, we write chopsize octets
+        at a time, every chunk with a write of its own, and then give up
+        control to select() in underlying reactor once so that bytes get onto
+        wire immediately. Note that this is different from
         and unrelated to WebSocket data message fragmentation. Note that this
         is also different from the TcpNoDelay option which can be set on the
         socket.
         """
         if chopsize and chopsize > 0:
+            # coalesced writes still buffered must go out first
+            if self._coalesce_buffer:
+                self._flushWrites()
+            if self.send_queue is None:
+                self.send_queue = deque()
             i = 0
             n = len(data)
             done = False
@@ -1291,11 +1885,18 @@ class WebSocketProtocol(object):
                 i += chopsize
             self._trigger()
         else:
-            if sync or len(self.send_queue) > 0:
+            if sync or self.send_queue:
+                if self._coalesce_buffer:
+                    self._flushWrites()
+                if self.send_queue is None:
+                    self.send_queue = deque()
                 self.send_queue.append((data, sync))
                 self._trigger()
             else:
-                self.transport.write(data)
+                if self.coalesceWrites:
+                    self._writeCoalesced(data)
+                else:
+                    self.transport.write(data)
 
                 if self.state == WebSocketProtocol.STATE_OPEN:
                     self.trafficStats.outgoingOctetsWireLevel += len(data)
@@ -1305,21 +1906,164 @@ class WebSocketProtocol(object):
                 if self.logOctets:
                     self.logTxOctets(data, False)
 
+    def _sendDataSequence(self, data):
+        """
+        Write a sequence of octet strings to the transport without
+        concatenating them first (scatter/gather write).
+
+        Only used when nothing is queued for sending, and sending
+        neither is synched nor chopped.
+
+        :param data: The octet strings to write (in order).
+        :type data: list of bytes
+        """
+        if self._coalesce_buffer:
+            self._flushWrites()
+
+        self._writeSequence(data)
+
+        n = 0
+        for d in data:
+            n += len(d)
+
+        if self.state == WebSocketProtocol.STATE_OPEN:
+            self.trafficStats.outgoingOctetsWireLevel += n
+        elif self.state in (WebSocketProtocol.STATE_CONNECTING, WebSocketProtocol.STATE_PROXY_CONNECTING):
+            self.trafficStats.preopenOutgoingOctetsWireLevel += n
+
+        if self.logOctets:
+            self.logTxOctets(b''.join(data), False)
+
+    def _writeSequence(self, data):
+        """
+        Write a sequence of octet strings to the transport. Networking framework
+        adapters override this to use the transport's native scatter/gather write.
+        """
+        for d in data:
+            self.transport.write(d)
+
     def sendPreparedMessage(self, preparedMsg):
         """
         Implements :func:`autobahn.websocket.interfaces.IWebSocketChannel.sendPreparedMessage`
         """
-        if self._perMessageCompress is None or preparedMsg.doNotCompress:
+        if self._perMessageCompress is None or preparedMsg.doNotCompress or len(preparedMsg.payload) < self.perMessageCompressionMinSize:
             self.sendData(preparedMsg.payloadHybi)
         else:
-            self.sendMessage(preparedMsg.payload, preparedMsg.binary)
+            frame = preparedMsg.getCompressedFrame(self._perMessageCompress, self.perMessageCompressionMaxRatio)
+            if frame is not None:
+                self.sendData(frame)
+            else:
+                self.sendMessage(preparedMsg.payload, preparedMsg.binary)
+
+    def processMessagesBatched(self):
+        """
+        Fast path for processing incoming octets, which takes out complete,
+        unfragmented and uncompressed data messages (with payload up to 64k)
+        from the front of the receive buffer in one pass, and fires
+        ``onMessage`` for those directly.
+
+        This stops at the first frame which isn't such a message (or isn't
+        completely received yet), which is then left to :meth:`processData`.
+        The fast path is only taken when the message-based API is used with
+        its default implementation, and when frames are neither logged nor
+        timings tracked.
+        """
+        if self.inside_message or self.websocket_version == 0 or self.failedByMe:
+            return
+        if self.logFrames or self.trackedTimings or self.reassembleBytearray:
+            return
+        if not _uses_default_message_api(self):
+            return
+
+        buf = self._receive_buffer
+        stats = self.trafficStats
+        isServer = self.factory.isServer
+        maxPayloadSize = self.maxMessagePayloadSize
+        if maxPayloadSize <= 0 or 0 < self.maxFramePayloadSize < maxPayloadSize:
+            maxPayloadSize = self.maxFramePayloadSize
+
+        while len(buf) >= 2:
+
+            # the frame needs to be complete within the first buffered chunk
+            #
+            chunk = buf._chunks[0]
+            h = buf._offset
+            avail = len(chunk) - h
+            if avail < 2:
+                return
+
+            if six.PY3:
+                decoded = _FRAME_HEADERS[(chunk[h] << 8) | chunk[h + 1]]
+            else:
+                decoded = _FRAME_HEADERS[(ord(chunk[h]) << 8) | ord(chunk[h + 1])]
+            if decoded is None:
+                return
+            frame_fin, frame_rsv, frame_opcode, frame_masked, frame_payload_len1, frame_header_len = decoded
+
+            # unfragmented text or binary message, not compressed
+            #
+            if not frame_fin or frame_rsv != 0 or frame_opcode == 0 or frame_opcode > 7:
+                return
+
+            # masking as required
+            #
+            if isServer:
+                if self.requireMaskedClientFrames and not frame_masked:
+                    return
+            elif not self.acceptMaskedServerFrames and frame_masked:
+                return
+
+            if frame_payload_len1 < 126:
+                frame_payload_len = frame_payload_len1
+            elif frame_payload_len1 == 126 and avail >= 4:
+                frame_payload_len = _UINT16.unpack_from(chunk, h + 2)[0]
+                if frame_payload_len < 126:
+                    return
+            else:
+                return
+
+            if avail < frame_header_len + frame_payload_len:
+                return
+            if 0 < maxPayloadSize < frame_payload_len:
+                return
+
+            i = h + frame_header_len
+            payload = chunk[i:i + frame_payload_len]
+            if frame_masked and frame_payload_len > 0 and self.applyMask:
+                payload = create_xor_masker(chunk[i - 4:i], frame_payload_len).process(payload)
+
+            # text messages must be valid UTF-8 as a whole
+            #
+            if frame_opcode == WebSocketProtocol.MESSAGE_TYPE_TEXT and self.utf8validateIncoming:
+                if self.utf8validator is None:
+                    self.utf8validator = Utf8Validator()
+                else:
+                    self.utf8validator.reset()
+                valid, endsOnCodePoint, _, _ = self.utf8validator.validate(payload)
+                if not (valid and endsOnCodePoint):
+                    return
+
+            buf.discard(frame_header_len + frame_payload_len)
+
+            stats.incomingOctetsWebSocketLevel += frame_payload_len
+            stats.incomingOctetsAppLevel += frame_payload_len
+            stats.incomingWebSocketFrames += 1
+            stats.incomingWebSocketMessages += 1
+
+            self._onMessage(payload, frame_opcode == WebSocketProtocol.MESSAGE_TYPE_BINARY)
+
+            # the message handler might have closed (or failed) the connection
+            #
+            if self.state != WebSocketProtocol.STATE_OPEN or self.failedByMe:
+                return
 
     def processData(self):
         """
         After WebSocket handshake has been completed, this procedure will do
         all subsequent processing of incoming bytes.
         """
-        buffered_len = len(self.data)
+        buf = self._receive_buffer
+        buffered_len = len(buf)
 
         # outside a frame, that is we are awaiting data which starts a new frame
         #
@@ -1329,24 +2073,30 @@ class WebSocketProtocol(object):
             #
             if buffered_len >= 2:
 
-                # FIN, RSV, OPCODE
+                # get (up to) the maximum frame header length of octets, without
+                # consuming from the receive buffer yet. when the first buffered
+                # chunk has all of those, the frame header is decoded right from there
                 #
-                if six.PY3:
-                    b = self.data[0]
-                else:
-                    b = ord(self.data[0])
-                frame_fin = (b & 0x80) != 0
-                frame_rsv = (b & 0x70) >> 4
-                frame_opcode = b & 0x0f
-
-                # MASK, PAYLOAD LEN 1
+                header = buf._chunks[0]
+                h = buf._offset
+                if len(header) - h < 14 and len(header) - h < buffered_len:
+                    header = buf.peek(14)
+                    h = 0
+
+                # FIN, RSV, OPCODE, MASK, PAYLOAD LEN 1 and complete header length: the
+                # lookup table has all frame headers passing the checks not depending
+                # on connection state. any other frame header is decoded here, and will
+                # fail those checks below.
                 #
                 if six.PY3:
-                    b = self.data[1]
+                    b0, b1 = header[h], header[h + 1]
                 else:
-                    b = ord(self.data[1])
-                frame_masked = (b & 0x80) != 0
-                frame_payload_len1 = b & 0x7f
+                    b0, b1 = ord(header[h]), ord(header[h + 1])
+                decoded = _FRAME_HEADERS[(b0 << 8) | b1]
+                checked = decoded is not None
+                if not checked:
+                    decoded = _decode_frame_header(b0, b1)
+                frame_fin, frame_rsv, frame_opcode, frame_masked, frame_payload_len1, frame_header_len = decoded
 
                 # MUST be 0 when no extension defining
                 # the semantics of RSV has been negotiated
@@ -1374,30 +2124,33 @@ class WebSocketProtocol(object):
                 #
                 if frame_opcode > 7:  # control frame (have MSB in opcode set)
 
-                    # control frames MUST NOT be fragmented
-                    #
-                    if not frame_fin:
-                        if self._protocol_violation(u'fragmented control frame'):
-                            return False
+                    if not checked:
 
-                    # control frames MUST have payload 125 octets or less
-                    #
-                    if frame_payload_len1 > 125:
-                        if self._protocol_violation(u'control frame with payload length > 125 octets'):
-                            return False
+                        # control frames MUST NOT be fragmented
+                        #
+                        if not frame_fin:
+                            if self._protocol_violation(u'fragmented control frame'):
+                                return False
 
-                    # check for reserved control frame opcodes
-                    #
-                    if frame_opcode not in [8, 9, 10]:
-                        if self._protocol_violation(u'control frame using reserved opcode {}'.format(frame_opcode)):
-                            return False
+                        # control frames MUST have payload 125 octets or less
+                        #
+                        if frame_payload_len1 > 125:
+                            if self._protocol_violation(u'control frame with payload length > 125 octets'):
+                                return False
 
-                    # close frame : if there is a body, the first two bytes of the body MUST be a 2-byte
-                    # unsigned integer (in network byte order) representing a status code
-                    #
-                    if frame_opcode == 8 and frame_payload_len1 == 1:
-                        if self._protocol_violation(u'received close control frame with payload len 1'):
-                            return False
+                        # check for reserved control frame opcodes
+                        #
+                        if frame_opcode not in [8, 9, 10]:
+                            reason = u'control frame using reserved opcode {}'.format(frame_opcode)
+                            if self._protocol_violation(reason):
+                                return False
+
+                        # close frame : if there is a body, the first two bytes of the body MUST be a 2-byte
+                        # unsigned integer (in network byte order) representing a status code
+                        #
+                        if frame_opcode == 8 and frame_payload_len1 == 1:
+                            if self._protocol_violation(u'received close control frame with payload len 1'):
+                                return False
 
                     # control frames MUST NOT be compressed
                     #
@@ -1409,7 +2162,7 @@ class WebSocketProtocol(object):
 
                     # check for reserved data frame opcodes
                     #
-                    if frame_opcode not in [0, 1, 2]:
+                    if not checked and frame_opcode not in [0, 1, 2]:
                         if self._protocol_violation(u'data frame using reserved opcode {}'.format(frame_opcode)):
                             return False
 
@@ -1431,22 +2184,6 @@ class WebSocketProtocol(object):
                         if self._protocol_violation(u'received continuation data frame with compress bit set [{}]'.format(self._perMessageCompress.EXTENSION_NAME)):
                             return False
 
-                # compute complete header length
-                #
-                if frame_masked:
-                    mask_len = 4
-                else:
-                    mask_len = 0
-
-                if frame_payload_len1 < 126:
-                    frame_header_len = 2 + mask_len
-                elif frame_payload_len1 == 126:
-                    frame_header_len = 2 + 2 + mask_len
-                elif frame_payload_len1 == 127:
-                    frame_header_len = 2 + 8 + mask_len
-                else:
-                    raise Exception("logic error")
-
                 # only proceed when we have enough data buffered for complete
                 # frame header (which includes extended payload len + mask)
                 #
@@ -1454,18 +2191,18 @@ class WebSocketProtocol(object):
 
                     # minimum frame header length (already consumed)
                     #
-                    i = 2
+                    i = h + 2
 
                     # extract extended payload length
                     #
                     if frame_payload_len1 == 126:
-                        frame_payload_len = struct.unpack("!H", self.data[i:i + 2])[0]
+                        frame_payload_len = _UINT16.unpack_from(header, i)[0]
                         if frame_payload_len < 126:
                             if self._protocol_violation(u'invalid data frame length (not using minimal length encoding)'):
                                 return False
                         i += 2
                     elif frame_payload_len1 == 127:
-                        frame_payload_len = struct.unpack("!Q", self.data[i:i + 8])[0]
+                        frame_payload_len = _UINT64.unpack_from(header, i)[0]
                         if frame_payload_len > 0x7FFFFFFFFFFFFFFF:  # 2**63
                             if self._protocol_violation(u'invalid data frame length (>2^63)'):
                                 return False
@@ -1480,7 +2217,7 @@ class WebSocketProtocol(object):
                     #
                     frame_mask = None
                     if frame_masked:
-                        frame_mask = self.data[i:i + 4]
+                        frame_mask = header[i:i + 4]
                         i += 4
 
                     if frame_masked and frame_payload_len > 0 and self.applyMask:
@@ -1488,9 +2225,9 @@ class WebSocketProtocol(object):
                     else:
                         self.current_frame_masker = XorMaskerNull()
 
-                    # remember rest (payload of current frame after header and everything thereafter)
+                    # consume frame header (the rest is payload of current frame and everything thereafter)
                     #
-                    self.data = self.data[i:]
+                    buf.discard(frame_header_len)
 
                     # ok, got complete frame header
                     #
@@ -1506,7 +2243,7 @@ class WebSocketProtocol(object):
 
                     # reprocess when frame has no payload or and buffered data left
                     #
-                    return frame_payload_len == 0 or len(self.data) > 0
+                    return frame_payload_len == 0 or len(buf) > 0
 
                 else:
                     return False  # need more data
@@ -1520,14 +2257,8 @@ class WebSocketProtocol(object):
             # cut out rest of frame payload
             #
             rest = self.current_frame.length - self.current_frame_masker.pointer()
-            if buffered_len >= rest:
-                data = self.data[:rest]
-                length = rest
-                self.data = self.data[rest:]
-            else:
-                data = self.data
-                length = buffered_len
-                self.data = b''
+            data = buf.read(rest)
+            length = len(data)
 
             if length > 0:
                 # unmask payload
@@ -1557,7 +2288,7 @@ class WebSocketProtocol(object):
 
             # reprocess when no error occurred and buffered data left
             #
-            return len(self.data) > 0
+            return len(buf) > 0
 
     def onFrameBegin(self):
         """
@@ -1576,6 +2307,7 @@ class WebSocketProtocol(object):
                 #
                 if self._perMessageCompress is not None and self.current_frame.rsv == 4:
                     self._isMessageCompressed = True
+                    self._message_decompressed_length = 0
                     self._perMessageCompress.start_decompress_message()
                 else:
                     self._isMessageCompressed = False
@@ -1583,7 +2315,10 @@ class WebSocketProtocol(object):
                 # setup UTF8 validator
                 #
                 if self.current_frame.opcode == WebSocketProtocol.MESSAGE_TYPE_TEXT and self.utf8validateIncoming:
-                    self.utf8validator.reset()
+                    if self.utf8validator is None:
+                        self.utf8validator = Utf8Validator()
+                    else:
+                        self.utf8validator.reset()
                     self.utf8validateIncomingCurrentMessage = True
                     self.utf8validateLast = (True, True, 0, 0)
                 else:
@@ -1606,37 +2341,64 @@ class WebSocketProtocol(object):
         """
         if self.current_frame.opcode > 7:
             self.control_frame_data.append(payload)
-        else:
-            # decompress frame payload
+
+        elif self._isMessageCompressed:
+
+            # don't decompress anything further once the connection was failed
+            # (e.g. because the decompressed message got too big)
             #
-            if self._isMessageCompressed:
-                compressedLen = len(payload)
-                self.log.debug(
-                    "RX compressed [length]: octets",
-                    legnth=compressedLen,
-                    octets=_LazyHexFormatter(payload),
-                )
+            if self.failedByMe:
+                return
 
-                payload = self._perMessageCompress.decompress_message_data(payload)
-                uncompressedLen = len(payload)
-            else:
-                l = len(payload)
-                compressedLen = l
-                uncompressedLen = l
+            compressedLen = len(payload)
+            self.log.debug(
+                "RX compressed [length]: octets",
+                legnth=compressedLen,
+                octets=_LazyHexFormatter(payload),
+            )
 
             if self.state == WebSocketProtocol.STATE_OPEN:
                 self.trafficStats.incomingOctetsWebSocketLevel += compressedLen
-                self.trafficStats.incomingOctetsAppLevel += uncompressedLen
 
-            # incrementally validate UTF-8 payload
+            # decompress frame payload in chunks of bounded size, so that
+            # a decompressed message exceeding the payload size limit is
+            # detected before having decompressed (much) more than that
             #
-            if self.utf8validateIncomingCurrentMessage:
-                self.utf8validateLast = self.utf8validator.validate(payload)
-                if not self.utf8validateLast[0]:
-                    if self._invalid_payload(u'encountered invalid UTF-8 while processing text message at payload octet index {}'.format(self.utf8validateLast[3])):
-                        return False
+            for data in self._perMessageCompress.decompress_message_data_chunked(payload, self._DECOMPRESS_CHUNK_SIZE):
+                self._message_decompressed_length += len(data)
+                if 0 < self.maxMessagePayloadSize < self._message_decompressed_length:
+                    self.wasMaxMessagePayloadSizeExceeded = True
+                    self._fail_connection(
+                        WebSocketProtocol.CLOSE_STATUS_CODE_MESSAGE_TOO_BIG,
+                        u'message exceeds payload limit of {} octets'.format(self.maxMessagePayloadSize)
+                    )
+                    return
+
+                if self._onFrameDataDecoded(data) is False:
+                    return False
+
+        else:
+            if self.state == WebSocketProtocol.STATE_OPEN:
+                self.trafficStats.incomingOctetsWebSocketLevel += len(payload)
+
+            return self._onFrameDataDecoded(payload)
+
+    def _onFrameDataDecoded(self, payload):
+        """
+        Data frame payload (decompressed, if the message is compressed) received.
+        """
+        if self.state == WebSocketProtocol.STATE_OPEN:
+            self.trafficStats.incomingOctetsAppLevel += len(payload)
+
+        # incrementally validate UTF-8 payload
+        #
+        if self.utf8validateIncomingCurrentMessage:
+            self.utf8validateLast = self.utf8validator.validate(payload)
+            if not self.utf8validateLast[0]:
+                if self._invalid_payload(u'encountered invalid UTF-8 while processing text message at payload octet index {}'.format(self.utf8validateLast[3])):
+                    return False
 
-            self._onMessageFrameData(payload)
+        self._onMessageFrameData(payload)
 
     def onFrameEnd(self):
         """
@@ -1656,9 +2418,10 @@ class WebSocketProtocol(object):
 
             if self.current_frame.fin:
 
-                # handle end of compressed message
+                # handle end of compressed message (when the connection was failed,
+                # the message was not necessarily decompressed until the end)
                 #
-                if self._isMessageCompressed:
+                if self._isMessageCompressed and not self.failedByMe:
                     self._perMessageCompress.end_decompress_message()
 
                 # verify UTF8 has actually ended
@@ -1825,9 +2588,9 @@ class WebSocketProtocol(object):
             raise Exception("invalid payload length")
 
         if six.PY3:
-            raw = b''.join([b0.to_bytes(1, 'big'), b1.to_bytes(1, 'big'), el, mv, plm])
+            header = b''.join([b0.to_bytes(1, 'big'), b1.to_bytes(1, 'big'), el, mv])
         else:
-            raw = b''.join([chr(b0), chr(b1), el, mv, plm])
+            header = b''.join([chr(b0), chr(b1), el, mv])
 
         if opcode in [0, 1, 2]:
             self.trafficStats.outgoingWebSocketFrames += 1
@@ -1838,7 +2601,12 @@ class WebSocketProtocol(object):
 
         # send frame octets
         #
-        self.sendData(raw, sync, chopsize)
+        if l >= self._SCATTER_WRITE_MIN_LENGTH and not sync and not chopsize and not self.send_queue:
+            # write header and payload as separate buffers, so that
+            # the payload isn't copied only to put the header in front
+            self._sendDataSequence([header, plm])
+        else:
+            self.sendData(b''.join([header, plm]), sync, chopsize)
 
     def sendPing(self, payload=None):
         """
@@ -2178,26 +2946,30 @@ class WebSocketProtocol(object):
 
         self.trafficStats.outgoingWebSocketMessages += 1
 
-        # setup compressor
-        #
-        if self._perMessageCompress is not None and not doNotCompress:
-            sendCompressed = True
+        l = len(payload)
+        self.trafficStats.outgoingOctetsAppLevel += l
 
+        # compress, unless the message is too small to be worth it
+        #
+        sendCompressed = False
+        if self._perMessageCompress is not None and not doNotCompress and l >= self.perMessageCompressionMinSize:
             self._perMessageCompress.start_compress_message()
 
-            self.trafficStats.outgoingOctetsAppLevel += len(payload)
-
             payload1 = self._perMessageCompress.compress_message_data(payload)
             payload2 = self._perMessageCompress.end_compress_message()
-            payload = b''.join([payload1, payload2])
+            compressed = b''.join([payload1, payload2])
+
+            # send the message uncompressed after all when it did not compress well
+            # (e.g. because it was compressed already), unless the extension
+            # cannot take back what it compressed
+            discarded = False
+            if self.perMessageCompressionMaxRatio and len(compressed) > self.perMessageCompressionMaxRatio * l:
+                discarded = self._perMessageCompress.discard_compress_message()
+            if not discarded:
+                sendCompressed = True
+                payload = compressed
 
-            self.trafficStats.outgoingOctetsWebSocketLevel += len(payload)
-
-        else:
-            sendCompressed = False
-            l = len(payload)
-            self.trafficStats.outgoingOctetsAppLevel += l
-            self.trafficStats.outgoingOctetsWebSocketLevel += l
+        self.trafficStats.outgoingOctetsWebSocketLevel += len(payload)
 
         # explicit fragmentSize arguments overrides autoFragmentSize setting
         #
@@ -2302,49 +3074,108 @@ class PreparedMessage(object):
             # compression is on, and context takeover is off)
             self.payload = payload
             self.binary = isBinary
+            self.applyMask = applyMask
+
+            # compressed frames by compression parameters (see getCompressedFrame())
+            self._compressedFrames = {}
         self.doNotCompress = doNotCompress
 
-        l = len(payload)
+        self.payloadHybi = _frame_message(payload, isBinary, applyMask)
+
+    def getCompressedFrame(self, perMessageCompress, maxRatio=0):
+        """
+        Get the message compressed and framed for sending on a connection using
+        the given compression. The compressed frame is computed only once for all
+        connections that compress messages in the same way (no context takeover
+        and equal parameters).
+
+        :param perMessageCompress: The compression in use on the connection.
+        :type perMessageCompress: instance of :class:`autobahn.websocket.compress.PerMessageCompress`
+        :param maxRatio: When non-zero, the uncompressed frame is returned instead
+            when the compressed payload is larger than this fraction of the payload
+            (see option ``perMessageCompressionMaxRatio``).
+        :type maxRatio: float
+
+        :returns: bytes or None -- The frame octets, or ``None`` if the compressed
+            message would be specific to the connection (context takeover).
+        """
+        key = perMessageCompress.get_broadcast_key()
+        if key is None:
+            return None
+        compressed = self._compressedFrames.get(key, None)
+        if compressed is None:
+            perMessageCompress.start_compress_message()
+            payload = b''.join([perMessageCompress.compress_message_data(self.payload),
+                                perMessageCompress.end_compress_message()])
+            frame = _frame_message(payload, self.binary, self.applyMask, compressed=True)
+            self._compressedFrames[key] = compressed = (frame, len(payload))
+        frame, length = compressed
+        # send the message uncompressed after all when it did not compress well
+        if maxRatio and length > maxRatio * len(self.payload):
+            return self.payloadHybi
+        return frame
+
+
+def _frame_message(payload, isBinary, applyMask, compressed=False):
+    """
+    Frame a complete WebSocket message as a single frame.
 
-        # first byte
-        #
-        b0 = ((1 << 7) | 2) if isBinary else ((1 << 7) | 1)
+    FOR INTERNAL USE ONLY!
 
-        # second byte, payload len bytes and mask
-        #
-        if applyMask:
-            b1 = 1 << 7
-            # see note above about getrandbits
-            mask = struct.pack("!I", random.getrandbits(32))
-            if l == 0:
-                plm = payload
-            else:
-                plm = create_xor_masker(mask, l).process(payload)
-        else:
-            b1 = 0
-            mask = b''
-            plm = payload
+    :param payload: The message payload (already compressed when ``compressed``).
+    :type payload: bytes
+    :param isBinary: Provide `True` for binary payload.
+    :type isBinary: bool
+    :param applyMask: Provide `True` if WebSocket message is to be masked.
+    :type applyMask: bool
+    :param compressed: Provide `True` to set the RSV1 ("compressed") bit.
+    :type compressed: bool
 
-        # payload extended length
-        #
-        el = b''
-        if l <= 125:
-            b1 |= l
-        elif l <= 0xFFFF:
-            b1 |= 126
-            el = struct.pack("!H", l)
-        elif l <= 0x7FFFFFFFFFFFFFFF:
-            b1 |= 127
-            el = struct.pack("!Q", l)
-        else:
-            raise Exception("invalid payload length")
+    :returns: bytes -- The octets of the frame.
+    """
+    l = len(payload)
 
-        # raw WS message (single frame)
-        #
-        if six.PY3:
-            self.payloadHybi = b''.join([b0.to_bytes(1, 'big'), b1.to_bytes(1, 'big'), el, mask, plm])
+    # first byte
+    #
+    b0 = ((1 << 7) | 2) if isBinary else ((1 << 7) | 1)
+    if compressed:
+        b0 |= 4 << 4
+
+    # second byte, payload len bytes and mask
+    #
+    if applyMask:
+        b1 = 1 << 7
+        # see note above about getrandbits
+        mask = struct.pack("!I", random.getrandbits(32))
+        if l == 0:
+            plm = payload
         else:
-            self.payloadHybi = b''.join([chr(b0), chr(b1), el, mask, plm])
+            plm = create_xor_masker(mask, l).process(payload)
+    else:
+        b1 = 0
+        mask = b''
+        plm = payload
+
+    # payload extended length
+    #
+    el = b''
+    if l <= 125:
+        b1 |= l
+    elif l <= 0xFFFF:
+        b1 |= 126
+        el = struct.pack("!H", l)
+    elif l <= 0x7FFFFFFFFFFFFFFF:
+        b1 |= 127
+        el = struct.pack("!Q", l)
+    else:
+        raise Exception("invalid payload length")
+
+    # raw WS message (single frame)
+    #
+    if six.PY3:
+        return b''.join([b0.to_bytes(1, 'big'), b1.to_bytes(1, 'big'), el, mask, plm])
+    else:
+        return b''.join([chr(b0), chr(b1), el, mask, plm])
 
 
 class WebSocketFactory(object):
@@ -2354,6 +3185,21 @@ class WebSocketFactory(object):
     :class:`autobahn.websocket.protocol.WebSocketServerFactory`.
     """
 
+    _per_message_compression_pool = None
+
+    def getPerMessageCompressionPool(self):
+        """
+        Get the pool of compressors shared by the connections of this factory
+        (see option ``perMessageCompressionPoolSize``). The pool is created
+        when first used.
+
+        :returns: obj -- An instance of :class:`autobahn.websocket.compress.PerMessageDeflatePool`,
+            which counts its hits and misses.
+        """
+        if self._per_message_compression_pool is None:
+            self._per_message_compression_pool = PerMessageDeflatePool(self.perMessageCompressionPoolSize)
+        return self._per_message_compression_pool
+
     def prepareMessage(self, payload, isBinary=False, doNotCompress=False):
         """
         Prepare a WebSocket message. This can be later sent on multiple
@@ -2380,6 +3226,87 @@ class WebSocketFactory(object):
         applyMask = not self.isServer
         return PreparedMessage(payload, isBinary, applyMask, doNotCompress)
 
+    def broadcast(self, payload, isBinary=False, connections=None, doNotCompress=False):
+        """
+        Send a WebSocket message to many connections at once.
+
+        Connections are grouped by the compression parameters negotiated, and the
+        message is compressed and framed only once per group. Connections with
+        compression that has context takeover on our side need to compress the
+        message on their own, and are sent the message one by one.
+
+        :param payload: The message payload.
+        :type payload: bytes
+        :param isBinary: `True` iff payload is binary, else the payload must be
+            UTF-8 encoded text.
+        :type isBinary: bool
+        :param connections: The connections to send the message to. If not given,
+            send to all connections of this factory that are open.
+        :type connections: iterable of :class:`autobahn.websocket.protocol.WebSocketProtocol`
+        :param doNotCompress: Iff `True`, never compress this message.
+        :type doNotCompress: bool
+
+        :returns: dict -- Statistics and timings (in seconds) of the broadcast.
+        """
+        assert(type(payload) == bytes)
+
+        started = rtime()
+
+        if connections is None:
+            connections = self._openConnections
+
+        # group connections by how the message has to be framed
+        groups = {}
+        single = []
+        for proto in connections:
+            if proto.state != WebSocketProtocol.STATE_OPEN:
+                continue
+            if proto._perMessageCompress is None or doNotCompress or len(payload) < proto.perMessageCompressionMinSize:
+                key = None
+            else:
+                key = proto._perMessageCompress.get_broadcast_key()
+                if key is None:
+                    single.append(proto)
+                    continue
+                key = (key, proto.perMessageCompressionMaxRatio)
+            group = groups.get(key, None)
+            if group is None:
+                groups[key] = group = []
+            group.append(proto)
+
+        grouped = rtime()
+
+        # compress and frame the message once for every group
+        preparedMsg = self.prepareMessage(payload, isBinary, doNotCompress)
+        frames = []
+        for key, group in groups.items():
+            if key is None:
+                frames.append((preparedMsg.payloadHybi, group))
+            else:
+                frames.append((preparedMsg.getCompressedFrame(group[0]._perMessageCompress,
+                                                              group[0].perMessageCompressionMaxRatio), group))
+
+        prepared = rtime()
+
+        # send out
+        for frame, group in frames:
+            for proto in group:
+                proto.sendData(frame)
+        for proto in single:
+            proto.sendMessage(payload, isBinary)
+
+        finished = rtime()
+
+        return {
+            'recipients': len(single) + sum(len(group) for group in groups.values()),
+            'groups': len(groups),
+            'single': len(single),
+            'groupTime': grouped - started,
+            'prepareTime': prepared - grouped,
+            'sendTime': finished - prepared,
+            'totalTime': finished - started,
+        }
+
 
 _SERVER_STATUS_TEMPLATE = """<!DOCTYPE html>
 <html>
@@ -2426,6 +3353,15 @@ class WebSocketServerProtocol(WebSocketProtocol):
 
     CONFIG_ATTRS = WebSocketProtocol.CONFIG_ATTRS_COMMON + WebSocketProtocol.CONFIG_ATTRS_SERVER
 
+    __slots__ = tuple(WebSocketProtocol.CONFIG_ATTRS_SERVER) + ('http_request_uri',
+                                                                'http_request_path',
+                                                                'http_request_params',
+                                                                'http_request_host',
+                                                                'websocket_origin',
+                                                                'websocket_protocols',
+                                                                'websocket_extensions',
+                                                                '_wskey')
+
     def onConnect(self, request):
         """
         Callback fired during WebSocket opening handshake when new WebSocket client
@@ -2476,7 +3412,13 @@ class WebSocketServerProtocol(WebSocketProtocol):
         """
         # only proceed when we have fully received the HTTP request line and all headers
         #
-        end_of_header = self.data.find(b"\x0d\x0a\x0d\x0a")
+        end_of_header = self._findEndOfHttpHeader()
+        if self._isHttpHeaderTooLarge(end_of_header):
+            return self.failHandshake(
+                "HTTP request header exceeds size limit of {} octets".format(self.maxOpeningHandshakeSize),
+                code=431,  # Request Header Fields Too Large
+            )
+
         if end_of_header >= 0:
 
             self.http_request_data = self.data[:end_of_header + 4]
@@ -2757,7 +3699,7 @@ class WebSocketServerProtocol(WebSocketProtocol):
 
             # Ok, got complete HS input, remember rest (if any)
             #
-            self.data = self.data[end_of_header + 4:]
+            self._receive_buffer.discard(end_of_header + 4)
 
             # store WS key
             #
@@ -2895,6 +3837,9 @@ class WebSocketServerProtocol(WebSocketProtocol):
             if accept is not None:
                 PMCE = PERMESSAGE_COMPRESSION_EXTENSION[accept.EXTENSION_NAME]
                 self._perMessageCompress = PMCE['PMCE'].create_from_offer_accept(self.factory.isServer, accept)
+                self._perMessageCompress.set_compress_options(self.perMessageCompressionLevel, self.perMessageCompressionStrategy)
+                if self.perMessageCompressionPoolSize > 0:
+                    self._perMessageCompress.set_pool(self.factory.getPerMessageCompressionPool())
                 self.websocket_extensions_in_use.append(self._perMessageCompress)
                 extensionResponse.append(accept.get_extension_string())
             else:
@@ -2970,6 +3915,7 @@ class WebSocketServerProtocol(WebSocketProtocol):
         # opening handshake completed, move WebSocket connection into OPEN state
         #
         self.state = WebSocketProtocol.STATE_OPEN
+        self.factory._openConnections.add(self)
 
         # cancel any opening HS timer if present
         #
@@ -2999,7 +3945,7 @@ class WebSocketServerProtocol(WebSocketProtocol):
 
         # process rest, if any
         #
-        if len(self.data) > 0:
+        if len(self._receive_buffer) > 0:
             self.consumeData()
 
     def failHandshake(self, reason, code=400, responseHeaders=None):
@@ -3098,6 +4044,9 @@ class WebSocketServerFactory(WebSocketFactory):
             chunk_size=1000,
         )
 
+        # connections currently open (see broadcast())
+        self._openConnections = set()
+
         # seed RNG which is used for WS frame masks generation
         random.seed()
 
@@ -3158,7 +4107,9 @@ class WebSocketServerFactory(WebSocketFactory):
         self.applyMask = True
         self.maxFramePayloadSize = 0
         self.maxMessagePayloadSize = 0
+        self.maxOpeningHandshakeSize = 65536
         self.autoFragmentSize = 0
+        self.reassembleBytearray = False
         self.failByDrop = True
         self.echoCloseCodeReason = False
         self.openHandshakeTimeout = 5
@@ -3172,6 +4123,11 @@ class WebSocketServerFactory(WebSocketFactory):
         # permessage-XXX extension
         #
         self.perMessageCompressionAccept = lambda _: None
+        self.perMessageCompressionLevel = None
+        self.perMessageCompressionStrategy = None
+        self.perMessageCompressionMinSize = 0
+        self.perMessageCompressionMaxRatio = 0
+        self.perMessageCompressionPoolSize = 0
 
         # automatic ping/pong ("heartbeating")
         #
@@ -3179,6 +4135,12 @@ class WebSocketServerFactory(WebSocketFactory):
         self.autoPingTimeout = 0
         self.autoPingSize = 4
 
+        # coalescing of small writes
+        #
+        self.coalesceWrites = False
+        self.coalesceWritesMaxSize = 65536
+        self.coalesceWritesMaxDelay = 0
+
         # check WebSocket origin against this list
         self.allowedOrigins = ["*"]
         self.allowedOriginsPatterns = wildcards2patterns(self.allowedOrigins)
@@ -3199,16 +4161,26 @@ class WebSocketServerFactory(WebSocketFactory):
                            applyMask=None,
                            maxFramePayloadSize=None,
                            maxMessagePayloadSize=None,
+                           maxOpeningHandshakeSize=None,
                            autoFragmentSize=None,
+                           reassembleBytearray=None,
                            failByDrop=None,
                            echoCloseCodeReason=None,
                            openHandshakeTimeout=None,
                            closeHandshakeTimeout=None,
                            tcpNoDelay=None,
                            perMessageCompressionAccept=None,
+                           perMessageCompressionLevel=None,
+                           perMessageCompressionStrategy=None,
+                           perMessageCompressionMinSize=None,
+                           perMessageCompressionMaxRatio=None,
+                           perMessageCompressionPoolSize=None,
                            autoPingInterval=None,
                            autoPingTimeout=None,
                            autoPingSize=None,
+                           coalesceWrites=None,
+                           coalesceWritesMaxSize=None,
+                           coalesceWritesMaxDelay=None,
                            serveFlashSocketPolicy=None,
                            flashSocketPolicy=None,
                            allowedOrigins=None,
@@ -3246,9 +4218,16 @@ class WebSocketServerFactory(WebSocketFactory):
         if maxMessagePayloadSize is not None and maxMessagePayloadSize != self.maxMessagePayloadSize:
             self.maxMessagePayloadSize = maxMessagePayloadSize
 
+        if maxOpeningHandshakeSize is not None and maxOpeningHandshakeSize != self.maxOpeningHandshakeSize:
+            assert(type(maxOpeningHandshakeSize) in six.integer_types and maxOpeningHandshakeSize >= 0)
+            self.maxOpeningHandshakeSize = maxOpeningHandshakeSize
+
         if autoFragmentSize is not None and autoFragmentSize != self.autoFragmentSize:
             self.autoFragmentSize = autoFragmentSize
 
+        if reassembleBytearray is not None and reassembleBytearray != self.reassembleBytearray:
+            self.reassembleBytearray = reassembleBytearray
+
         if failByDrop is not None and failByDrop != self.failByDrop:
             self.failByDrop = failByDrop
 
@@ -3267,6 +4246,29 @@ class WebSocketServerFactory(WebSocketFactory):
         if perMessageCompressionAccept is not None and perMessageCompressionAccept != self.perMessageCompressionAccept:
             self.perMessageCompressionAccept = perMessageCompressionAccept
 
+        if perMessageCompressionLevel is not None and perMessageCompressionLevel != self.perMessageCompressionLevel:
+            assert(type(perMessageCompressionLevel) in six.integer_types)
+            self.perMessageCompressionLevel = perMessageCompressionLevel
+
+        if perMessageCompressionStrategy is not None and perMessageCompressionStrategy != self.perMessageCompressionStrategy:
+            assert(type(perMessageCompressionStrategy) in six.integer_types)
+            self.perMessageCompressionStrategy = perMessageCompressionStrategy
+
+        if perMessageCompressionMinSize is not None and perMessageCompressionMinSize != self.perMessageCompressionMinSize:
+            assert(type(perMessageCompressionMinSize) in six.integer_types and perMessageCompressionMinSize >= 0)
+            self.perMessageCompressionMinSize = perMessageCompressionMinSize
+
+        if perMessageCompressionMaxRatio is not None and perMessageCompressionMaxRatio != self.perMessageCompressionMaxRatio:
+            assert(type(perMessageCompressionMaxRatio) == float or type(perMessageCompressionMaxRatio) in six.integer_types)
+            assert(perMessageCompressionMaxRatio >= 0)
+            self.perMessageCompressionMaxRatio = perMessageCompressionMaxRatio
+
+        if perMessageCompressionPoolSize is not None and perMessageCompressionPoolSize != self.perMessageCompressionPoolSize:
+            assert(type(perMessageCompressionPoolSize) in six.integer_types and perMessageCompressionPoolSize >= 0)
+            self.perMessageCompressionPoolSize = perMessageCompressionPoolSize
+            if self._per_message_compression_pool is not None:
+                self._per_message_compression_pool.max_size = perMessageCompressionPoolSize
+
         if autoPingInterval is not None and autoPingInterval != self.autoPingInterval:
             self.autoPingInterval = autoPingInterval
 
@@ -3278,6 +4280,18 @@ class WebSocketServerFactory(WebSocketFactory):
             assert(4 <= autoPingSize <= 125)
             self.autoPingSize = autoPingSize
 
+        if coalesceWrites is not None and coalesceWrites != self.coalesceWrites:
+            self.coalesceWrites = coalesceWrites
+
+        if coalesceWritesMaxSize is not None and coalesceWritesMaxSize != self.coalesceWritesMaxSize:
+            assert(type(coalesceWritesMaxSize) in six.integer_types and coalesceWritesMaxSize > 0)
+            self.coalesceWritesMaxSize = coalesceWritesMaxSize
+
+        if coalesceWritesMaxDelay is not None and coalesceWritesMaxDelay != self.coalesceWritesMaxDelay:
+            assert(type(coalesceWritesMaxDelay) == float or type(coalesceWritesMaxDelay) in six.integer_types)
+            assert(coalesceWritesMaxDelay >= 0)
+            self.coalesceWritesMaxDelay = coalesceWritesMaxDelay
+
         if serveFlashSocketPolicy is not None and serveFlashSocketPolicy != self.serveFlashSocketPolicy:
             self.serveFlashSocketPolicy = serveFlashSocketPolicy
 
@@ -3320,6 +4334,9 @@ class WebSocketClientProtocol(WebSocketProtocol):
 
     CONFIG_ATTRS = WebSocketProtocol.CONFIG_ATTRS_COMMON + WebSocketProtocol.CONFIG_ATTRS_CLIENT
 
+    __slots__ = tuple(WebSocketProtocol.CONFIG_ATTRS_CLIENT) + ('websocket_key',
+                                                                'serverConnectionDropTimeoutCall')
+
     def onConnect(self, response):
         """
         Callback fired directly after WebSocket opening handshake when new WebSocket server
@@ -3376,7 +4393,12 @@ class WebSocketClientProtocol(WebSocketProtocol):
         """
         # only proceed when we have fully received the HTTP request line and all headers
         #
-        end_of_header = self.data.find(b"\x0d\x0a\x0d\x0a")
+        end_of_header = self._findEndOfHttpHeader()
+        if self._isHttpHeaderTooLarge(end_of_header):
+            return self.failProxyConnect(
+                "HTTP response header exceeds size limit of {} octets".format(self.maxOpeningHandshakeSize)
+            )
+
         if end_of_header >= 0:
 
             http_response_data = self.data[:end_of_header + 4]
@@ -3432,7 +4454,7 @@ class WebSocketClientProtocol(WebSocketProtocol):
 
             # Ok, got complete response for HTTP/CONNECT, remember rest (if any)
             #
-            self.data = self.data[end_of_header + 4:]
+            self._receive_buffer.discard(end_of_header + 4)
 
             # opening handshake completed, move WebSocket connection into OPEN state
             #
@@ -3440,7 +4462,7 @@ class WebSocketClientProtocol(WebSocketProtocol):
 
             # process rest of buffered data, if any
             #
-            if len(self.data) > 0:
+            if len(self._receive_buffer) > 0:
                 self.consumeData()
 
             # now start WebSocket opening handshake
@@ -3534,7 +4556,12 @@ class WebSocketClientProtocol(WebSocketProtocol):
         """
         # only proceed when we have fully received the HTTP request line and all headers
         #
-        end_of_header = self.data.find(b"\x0d\x0a\x0d\x0a")
+        end_of_header = self._findEndOfHttpHeader()
+        if self._isHttpHeaderTooLarge(end_of_header):
+            return self.failHandshake(
+                "HTTP response header exceeds size limit of {} octets".format(self.maxOpeningHandshakeSize)
+            )
+
         if end_of_header >= 0:
 
             self.http_response_data = self.data[:end_of_header + 4]
@@ -3670,6 +4697,9 @@ class WebSocketClientProtocol(WebSocketProtocol):
                             return self.failHandshake("WebSocket permessage-compress extension response from server denied by client")
 
                         self._perMessageCompress = PMCE['PMCE'].create_from_response_accept(self.factory.isServer, accept)
+                        self._perMessageCompress.set_compress_options(self.perMessageCompressionLevel, self.perMessageCompressionStrategy)
+                        if self.perMessageCompressionPoolSize > 0:
+                            self._perMessageCompress.set_pool(self.factory.getPerMessageCompressionPool())
 
                         self.websocket_extensions_in_use.append(self._perMessageCompress)
 
@@ -3693,11 +4723,12 @@ class WebSocketClientProtocol(WebSocketProtocol):
 
             # Ok, got complete HS input, remember rest (if any)
             #
-            self.data = self.data[end_of_header + 4:]
+            self._receive_buffer.discard(end_of_header + 4)
 
             # opening handshake completed, move WebSocket connection into OPEN state
             #
             self.state = WebSocketProtocol.STATE_OPEN
+            self.factory._openConnections.add(self)
 
             # cancel any opening HS timer if present
             #
@@ -3745,7 +4776,7 @@ class WebSocketClientProtocol(WebSocketProtocol):
 
             # process rest, if any
             #
-            if len(self.data) > 0:
+            if len(self._receive_buffer) > 0:
                 self.consumeData()
 
     def failHandshake(self, reason):
@@ -3800,6 +4831,9 @@ class WebSocketClientFactory(WebSocketFactory):
             chunk_size=1000,
         )
 
+        # connections currently open (see broadcast())
+        self._openConnections = set()
+
         # seed RNG which is used for WS opening handshake key and WS frame masks generation
         random.seed()
 
@@ -3849,7 +4883,9 @@ class WebSocketClientFactory(WebSocketFactory):
         self.applyMask = True
         self.maxFramePayloadSize = 0
         self.maxMessagePayloadSize = 0
+        self.maxOpeningHandshakeSize = 65536
         self.autoFragmentSize = 0
+        self.reassembleBytearray = False
         self.failByDrop = True
         self.echoCloseCodeReason = False
         self.serverConnectionDropTimeout = 1
@@ -3861,6 +4897,11 @@ class WebSocketClientFactory(WebSocketFactory):
         #
         self.perMessageCompressionOffers = []
         self.perMessageCompressionAccept = lambda _: None
+        self.perMessageCompressionLevel = None
+        self.perMessageCompressionStrategy = None
+        self.perMessageCompressionMinSize = 0
+        self.perMessageCompressionMaxRatio = 0
+        self.perMessageCompressionPoolSize = 0
 
         # automatic ping/pong ("heartbeating")
         #
@@ -3868,6 +4909,12 @@ class WebSocketClientFactory(WebSocketFactory):
         self.autoPingTimeout = 0
         self.autoPingSize = 4
 
+        # coalescing of small writes
+        #
+        self.coalesceWrites = False
+        self.coalesceWritesMaxSize = 65536
+        self.coalesceWritesMaxDelay = 0
+
     def setProtocolOptions(self,
                            version=None,
                            utf8validateIncoming=None,
@@ -3876,7 +4923,9 @@ class WebSocketClientFactory(WebSocketFactory):
                            applyMask=None,
                            maxFramePayloadSize=None,
                            maxMessagePayloadSize=None,
+                           maxOpeningHandshakeSize=None,
                            autoFragmentSize=None,
+                           reassembleBytearray=None,
                            failByDrop=None,
                            echoCloseCodeReason=None,
                            serverConnectionDropTimeout=None,
@@ -3885,9 +4934,17 @@ class WebSocketClientFactory(WebSocketFactory):
                            tcpNoDelay=None,
                            perMessageCompressionOffers=None,
                            perMessageCompressionAccept=None,
+                           perMessageCompressionLevel=None,
+                           perMessageCompressionStrategy=None,
+                           perMessageCompressionMinSize=None,
+                           perMessageCompressionMaxRatio=None,
+                           perMessageCompressionPoolSize=None,
                            autoPingInterval=None,
                            autoPingTimeout=None,
-                           autoPingSize=None):
+                           autoPingSize=None,
+                           coalesceWrites=None,
+                           coalesceWritesMaxSize=None,
+                           coalesceWritesMaxDelay=None):
         """
         Implements :func:`autobahn.websocket.interfaces.IWebSocketClientChannelFactory.setProtocolOptions`
         """
@@ -3915,9 +4972,16 @@ class WebSocketClientFactory(WebSocketFactory):
         if maxMessagePayloadSize is not None and maxMessagePayloadSize != self.maxMessagePayloadSize:
             self.maxMessagePayloadSize = maxMessagePayloadSize
 
+        if maxOpeningHandshakeSize is not None and maxOpeningHandshakeSize != self.maxOpeningHandshakeSize:
+            assert(type(maxOpeningHandshakeSize) in six.integer_types and maxOpeningHandshakeSize >= 0)
+            self.maxOpeningHandshakeSize = maxOpeningHandshakeSize
+
         if autoFragmentSize is not None and autoFragmentSize != self.autoFragmentSize:
             self.autoFragmentSize = autoFragmentSize
 
+        if reassembleBytearray is not None and reassembleBytearray != self.reassembleBytearray:
+            self.reassembleBytearray = reassembleBytearray
+
         if failByDrop is not None and failByDrop != self.failByDrop:
             self.failByDrop = failByDrop
 
@@ -3948,6 +5012,29 @@ class WebSocketClientFactory(WebSocketFactory):
         if perMessageCompressionAccept is not None and perMessageCompressionAccept != self.perMessageCompressionAccept:
             self.perMessageCompressionAccept = perMessageCompressionAccept
 
+        if perMessageCompressionLevel is not None and perMessageCompressionLevel != self.perMessageCompressionLevel:
+            assert(type(perMessageCompressionLevel) in six.integer_types)
+            self.perMessageCompressionLevel = perMessageCompressionLevel
+
+        if perMessageCompressionStrategy is not None and perMessageCompressionStrategy != self.perMessageCompressionStrategy:
+            assert(type(perMessageCompressionStrategy) in six.integer_types)
+            self.perMessageCompressionStrategy = perMessageCompressionStrategy
+
+        if perMessageCompressionMinSize is not None and perMessageCompressionMinSize != self.perMessageCompressionMinSize:
+            assert(type(perMessageCompressionMinSize) in six.integer_types and perMessageCompressionMinSize >= 0)
+            self.perMessageCompressionMinSize = perMessageCompressionMinSize
+
+        if perMessageCompressionMaxRatio is not None and perMessageCompressionMaxRatio != self.perMessageCompressionMaxRatio:
+            assert(type(perMessageCompressionMaxRatio) == float or type(perMessageCompressionMaxRatio) in six.integer_types)
+            assert(perMessageCompressionMaxRatio >= 0)
+            self.perMessageCompressionMaxRatio = perMessageCompressionMaxRatio
+
+        if perMessageCompressionPoolSize is not None and perMessageCompressionPoolSize != self.perMessageCompressionPoolSize:
+            assert(type(perMessageCompressionPoolSize) in six.integer_types and perMessageCompressionPoolSize >= 0)
+            self.perMessageCompressionPoolSize = perMessageCompressionPoolSize
+            if self._per_message_compression_pool is not None:
+                self._per_message_compression_pool.max_size = perMessageCompressionPoolSize
+
         if autoPingInterval is not None and autoPingInterval != self.autoPingInterval:
             self.autoPingInterval = autoPingInterval
 
@@ -3958,3 +5045,15 @@ class WebSocketClientFactory(WebSocketFactory):
             assert(type(autoPingSize) == float or type(autoPingSize) in six.integer_types)
             assert(4 <= autoPingSize <= 125)
             self.autoPingSize = autoPingSize
+
+        if coalesceWrites is not None and coalesceWrites != self.coalesceWrites:
+            self.coalesceWrites = coalesceWrites
+
+        if coalesceWritesMaxSize is not None and coalesceWritesMaxSize != self.coalesceWritesMaxSize:
+            assert(type(coalesceWritesMaxSize) in six.integer_types and coalesceWritesMaxSize > 0)
+            self.coalesceWritesMaxSize = coalesceWritesMaxSize
+
+        if coalesceWritesMaxDelay is not None and coalesceWritesMaxDelay != self.coalesceWritesMaxDelay:
+            assert(type(coalesceWritesMaxDelay) == float or type(coalesceWritesMaxDelay) in six.integer_types)
+            assert(coalesceWritesMaxDelay >= 0)
+            self.coalesceWritesMaxDelay = coalesceWritesMaxDelay
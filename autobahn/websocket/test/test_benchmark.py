@@ -0,0 +1,803 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""
+Micro benchmarks for the WebSocket protocol implementation.
+
+These are skipped by default. To run them, set the environment
+variable ``AUTOBAHN_BENCHMARK``, e.g.
+
+    AUTOBAHN_BENCHMARK=1 trial autobahn.websocket.test.test_benchmark
+"""
+
+from __future__ import absolute_import, print_function
+
+import gc
+import os
+import time
+import unittest2 as unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from autobahn.websocket import utf8validator
+from autobahn.websocket.compress import PerMessageDeflate
+from autobahn.websocket import xormasker
+from autobahn.websocket.protocol import WebSocketServerProtocol
+from autobahn.websocket.protocol import WebSocketServerFactory
+from autobahn.websocket.protocol import WebSocketClientProtocol
+from autobahn.websocket.protocol import WebSocketClientFactory
+
+if os.environ.get('USE_TWISTED', False):
+    from twisted.internet.task import Clock
+    from txaio.testutil import replace_loop
+    from autobahn.twisted.websocket import WebSocketServerProtocol as TwistedWebSocketServerProtocol
+    from autobahn.twisted.websocket import WebSocketServerFactory as TwistedWebSocketServerFactory
+    from twisted.internet.address import IPv4Address
+
+if os.environ.get('USE_ASYNCIO', False):
+    import asyncio
+    from autobahn.asyncio.websocket import WebSocketServerFactory as AsyncioWebSocketServerFactory
+
+KB = 1024
+MB = 1024 * KB
+
+
+class CollectingTransport(object):
+    """
+    Transport that just collects all octets written (in chunks).
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def getvalue(self):
+        return b''.join(self.chunks)
+
+    def loseConnection(self):
+        pass
+
+
+def _open(proto, factory):
+    proto.factory = factory
+    proto.transport = CollectingTransport()
+    proto._connectionMade()
+    proto.state = proto.STATE_OPEN
+    proto.websocket_version = 18
+    proto.inside_message = False
+    proto.current_frame = None
+    proto.transport.chunks = []
+    return proto
+
+
+class BenchmarkServerProtocol(WebSocketServerProtocol):
+    """
+    Networking framework agnostic server protocol which just counts
+    the messages received.
+    """
+
+    def __init__(self):
+        WebSocketServerProtocol.__init__(self)
+        self.received = 0
+
+    def _onMessageBegin(self, isBinary):
+        self.onMessageBegin(isBinary)
+
+    def _onMessageFrameBegin(self, length):
+        self.onMessageFrameBegin(length)
+
+    def _onMessageFrameData(self, payload):
+        self.onMessageFrameData(payload)
+
+    def _onMessageFrameEnd(self):
+        self.onMessageFrameEnd()
+
+    def _onMessageFrame(self, payload):
+        self.onMessageFrame(payload)
+
+    def _onMessageEnd(self):
+        self.onMessageEnd()
+
+    def _onMessage(self, payload, isBinary):
+        self.received += 1
+
+    def _closeConnection(self, abort=False):
+        pass
+
+
+def create_server(**options):
+    """
+    Create an open server protocol instance (default options plus the given ones).
+    """
+    factory = WebSocketServerFactory()
+    factory.setProtocolOptions(openHandshakeTimeout=0, **options)
+    return _open(BenchmarkServerProtocol(), factory)
+
+
+def create_client_frames(payload, isBinary=True, fragmentSize=None, **options):
+    """
+    Encode the payload as (masked) client-to-server WebSocket frames.
+    """
+    factory = WebSocketClientFactory()
+    factory.setProtocolOptions(openHandshakeTimeout=0, **options)
+    proto = _open(WebSocketClientProtocol(), factory)
+    proto.sendMessage(payload, isBinary=isBinary, fragmentSize=fragmentSize)
+    return proto.transport.getvalue()
+
+
+def timeit(func, repeat=3):
+    """
+    Run the function a couple of times and return the best time in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        func()
+        elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class ReceiveBenchmark(unittest.TestCase):
+    """
+    Processing cost of incoming messages per octet, for different message sizes
+    and different fragmentation of the octets across transport reads.
+    """
+
+    SIZES = [64 * KB, 256 * KB, MB, 4 * MB, 16 * MB]
+    READ_SIZES = [1460, 64 * KB, None]
+    FRAGMENT_SIZE = 4 * KB
+
+    def _receive(self, frames, read_size):
+        server = create_server(applyMask=False)
+        n = len(frames)
+        read_size = read_size or n
+
+        def run():
+            for i in range(0, n, read_size):
+                server._dataReceived(frames[i:i + read_size])
+
+        elapsed = timeit(run)
+        self.assertEqual(server.received, 3)
+        return elapsed
+
+    def test_receive_fragmented(self):
+        print()
+        print('{:>10} {:>10} {:>12}'.format('size', 'read size', 'ns/octet'))
+        for read_size in self.READ_SIZES:
+            costs = []
+            for size in self.SIZES:
+                frames = create_client_frames(b'*' * size, fragmentSize=self.FRAGMENT_SIZE, applyMask=False)
+                cost = 10**9 * self._receive(frames, read_size) / size
+                costs.append(cost)
+                print('{:>10} {:>10} {:>12.2f}'.format(size, read_size or 'all', cost))
+
+            # processing cost per octet must not grow with the message size
+            self.assertTrue(max(costs) < 4 * min(costs))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class FrameParserBenchmark(unittest.TestCase):
+    """
+    Frames parsed per second for small (masked) frames with payloads
+    of 0 up to 125 octets, all received in 64 KB reads.
+    """
+
+    FRAMES = 100000
+    READ_SIZE = 64 * KB
+
+    def test_parse(self):
+        frames = b''.join([create_client_frames(b'*' * size) for size in range(126)])
+        data = frames * (self.FRAMES // 126)
+        count = 126 * (self.FRAMES // 126)
+        server = create_server()
+
+        def run():
+            for i in range(0, len(data), self.READ_SIZE):
+                server._dataReceived(data[i:i + self.READ_SIZE])
+
+        elapsed = timeit(run)
+        self.assertEqual(server.received, 3 * count)
+        print()
+        print('{:.0f} frames/s'.format(count / elapsed))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(tracemalloc is None, 'tracemalloc not available')
+class ReassemblyBenchmark(unittest.TestCase):
+    """
+    Time and peak memory for reassembling large messages from many reads,
+    collecting chunks (default) vs. a preallocated bytearray (``reassembleBytearray``).
+    """
+
+    SIZE = 32 * MB
+    READ_SIZE = 64 * KB
+    FRAGMENT_SIZES = [None, MB]
+
+    def _reassemble(self, frames, reassembleBytearray):
+        server = create_server(applyMask=False, reassembleBytearray=reassembleBytearray)
+
+        # every read allocates a fresh buffer, as with a real transport
+        tracemalloc.start()
+        started = time.time()
+        for i in range(0, len(frames), self.READ_SIZE):
+            server._dataReceived(frames[i:i + self.READ_SIZE])
+        elapsed = time.time() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(server.received, 1)
+        return elapsed, peak
+
+    def test_reassemble(self):
+        print()
+        print('{:>10} {:>10} {:>10} {:>12}'.format('fragment', 'mode', 'ms', 'peak MB'))
+        for fragment_size in self.FRAGMENT_SIZES:
+            frames = create_client_frames(b'*' * self.SIZE, fragmentSize=fragment_size, applyMask=False)
+            peaks = {}
+            for mode in [False, True]:
+                elapsed, peak = self._reassemble(frames, mode)
+                peaks[mode] = peak
+                print('{:>10} {:>10} {:>10.1f} {:>12.1f}'.format(fragment_size or 'none',
+                                                                 'bytearray' if mode else 'chunks',
+                                                                 1000. * elapsed, float(peak) / MB))
+
+            # the chunks are never held on to in addition to the reassembled message
+            self.assertTrue(peaks[True] < peaks[False])
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class XorMaskerBenchmark(unittest.TestCase):
+    """
+    Throughput of the available XOR maskers for different payload sizes.
+    """
+
+    SIZES = [10, 100, KB, 10 * KB, 100 * KB, MB, 10 * MB]
+
+    def test_maskers(self):
+        maskers = []
+        for name in ['XorMaskerSimple', 'XorMaskerShifted1', 'XorMaskerBigInt']:
+            if hasattr(xormasker, name):
+                maskers.append((name, getattr(xormasker, name)))
+        maskers.append(('create_xor_masker', xormasker.create_xor_masker))
+
+        mask = os.urandom(4)
+        print()
+        print('accelerator: {}'.format(xormasker.ACCELERATOR))
+        print('{:>20} {:>10} {:>12}'.format('masker', 'size', 'MB/s'))
+        for size in self.SIZES:
+            data = os.urandom(size)
+            count = max(1, MB // size)
+            for name, klass in maskers:
+
+                def run():
+                    for _ in range(count):
+                        klass(mask).process(data)
+
+                elapsed = timeit(run, repeat=1 if size >= MB else 3)
+                print('{:>20} {:>10} {:>12.1f}'.format(name, size, float(count * size) / MB / elapsed))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class Utf8ValidatorBenchmark(unittest.TestCase):
+    """
+    Throughput of the UTF-8 validator in use for different payload sizes.
+    """
+
+    SIZES = [100, KB, 10 * KB, 100 * KB, MB]
+
+    PAYLOADS = [
+        ('ascii', u'{"id": 123, "name": "hello world", "tags": ["a", "b"]}, '),
+        ('mixed', u'{"id": 123, "name": "hällo wörld", "price": "3 €"}, '),
+    ]
+
+    def test_validate(self):
+        print()
+        print('accelerator: {}'.format(utf8validator.ACCELERATOR))
+        print('{:>10} {:>10} {:>12}'.format('payload', 'size', 'MB/s'))
+        for name, text in self.PAYLOADS:
+            text = text.encode('utf8')
+            for size in self.SIZES:
+                data = (text * (size // len(text) + 1))[:size]
+                count = max(1, MB // size)
+
+                def run():
+                    for _ in range(count):
+                        utf8validator.Utf8Validator().validate(data)
+
+                elapsed = timeit(run)
+                print('{:>10} {:>10} {:>12.1f}'.format(name, size, float(count * size) / MB / elapsed))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class BroadcastBenchmark(unittest.TestCase):
+    """
+    Fan-out of one message to many connections: sending the message on every
+    connection versus a factory broadcast.
+    """
+
+    COUNTS = [1000, 20000]
+
+    def _connections(self, count, compress):
+        factory = WebSocketServerFactory()
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+        connections = []
+        for _ in range(count):
+            proto = _open(BenchmarkServerProtocol(), factory)
+            if compress:
+                proto._perMessageCompress = PerMessageDeflate(True, True, True, 15, 15, 8)
+            factory._openConnections.add(proto)
+            connections.append(proto)
+        return factory, connections
+
+    def test_broadcast(self):
+        payload = b'{"symbol": "ACME", "bid": 123.45, "ask": 123.47, "size": 100}' * 8
+        print()
+        print('{:>8} {:>10} {:>14} {:>14}'.format('conns', 'compress', 'loop [ms]', 'broadcast [ms]'))
+        for count in self.COUNTS:
+            for compress in [False, True]:
+                factory, connections = self._connections(count, compress)
+
+                def loop():
+                    for proto in connections:
+                        proto.sendMessage(payload)
+
+                def broadcast():
+                    factory.broadcast(payload)
+
+                loop_time = timeit(loop)
+                broadcast_time = timeit(broadcast)
+                print('{:>8} {:>10} {:>14.1f} {:>14.1f}'.format(
+                    count, str(compress), 1000 * loop_time, 1000 * broadcast_time))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class CompressionPoolBenchmark(unittest.TestCase):
+    """
+    Sending compressed messages (without context takeover) on many connections,
+    with compressors created for every message versus taken from the factory pool.
+    """
+
+    CONNECTIONS = 1000
+    MESSAGES = 10
+
+    def _connections(self, poolSize):
+        factory = WebSocketServerFactory()
+        factory.setProtocolOptions(openHandshakeTimeout=0, perMessageCompressionPoolSize=poolSize)
+        connections = []
+        for _ in range(self.CONNECTIONS):
+            proto = _open(BenchmarkServerProtocol(), factory)
+            proto._perMessageCompress = PerMessageDeflate(True, True, True, 15, 15, 8)
+            if poolSize:
+                proto._perMessageCompress.set_pool(factory.getPerMessageCompressionPool())
+            connections.append(proto)
+        return factory, connections
+
+    def test_pool(self):
+        payload = b'[36,5512315355,4429313566,{},["ACME",123.45,123.47,100]]'
+        print()
+        print('{:>10} {:>14} {:>10} {:>10}'.format('pool size', 'messages/s', 'hits', 'misses'))
+        for poolSize in [0, 16]:
+            factory, connections = self._connections(poolSize)
+
+            def send():
+                for _ in range(self.MESSAGES):
+                    for proto in connections:
+                        proto.sendMessage(payload)
+                    for proto in connections:
+                        proto.transport.chunks = []
+
+            elapsed = timeit(send)
+            stats = factory.getPerMessageCompressionPool().__json__() if poolSize else {'hits': '-', 'misses': '-'}
+            print('{:>10} {:>14.0f} {:>10} {:>10}'.format(
+                poolSize, self.CONNECTIONS * self.MESSAGES / elapsed, stats['hits'], stats['misses']))
+
+
+WAMP_PAYLOADS = [
+    b'[48,%d,{},"com.example.add2",[23,7]]',
+    b'[50,%d,{},[30]]',
+    b'[16,%d,{"acknowledge":true},"com.example.oncounter",[666]]',
+    b'[36,5512315355,%d,{},["ACME",123.45,123.47,100],{"exchange":"NYSE","currency":"USD"}]',
+    b'[36,5512315355,%d,{"publisher":7212312,"trustlevel":0},[{"id":1,"name":"sensor.temperature","value":21.5,"unit":"C","tags":["kitchen","first-floor"]},{"id":2,"name":"sensor.humidity","value":48.0,"unit":"%%","tags":["kitchen","first-floor"]}]]',
+]
+"""
+Templates of typical WAMP messages (JSON serialized), with a varying request or publication ID.
+"""
+
+
+def create_wamp_payloads(count):
+    """
+    Create WAMP message payloads from the templates, with IDs counting up.
+    """
+    return [WAMP_PAYLOADS[i % len(WAMP_PAYLOADS)] % (4429313566 + i) for i in range(count)]
+
+
+def negotiate_compression_accepts(extension, no_context_takeover, dictionary=None, **options):
+    """
+    Negotiate a compression extension between a client and a server, going
+    through the extension header strings exchanged. Further options are passed
+    to the offer accept of the server. Returns the classes of the extension and
+    the offer and response accepts, or ``None`` if the extension doesn't
+    support the combination.
+    """
+    from autobahn.websocket.compress import PERMESSAGE_COMPRESSION_EXTENSION
+    pmce = PERMESSAGE_COMPRESSION_EXTENSION[extension]
+
+    offer_options, accept_options = {}, dict(options)
+    if extension != 'permessage-bzip2':
+        offer_options['request_no_context_takeover'] = no_context_takeover
+        accept_options['request_no_context_takeover'] = no_context_takeover
+    if extension in ['permessage-deflate-dictionary', 'permessage-zstd'] and dictionary is not None:
+        offer_options['dictionary'] = dictionary
+        accept_options['dictionary'] = dictionary
+    elif extension == 'permessage-deflate-dictionary':
+        return None
+    elif extension == 'permessage-bzip2' and not no_context_takeover:
+        return None
+
+    parse = WebSocketServerProtocol()._parseExtensionsHeader
+    offer = pmce['Offer'](**offer_options)
+    _, params = parse(offer.get_extension_string())[0]
+    offer_accept = pmce['OfferAccept'](pmce['Offer'].parse(params), **accept_options)
+    _, params = parse(offer_accept.get_extension_string())[0]
+    response = pmce['Response'].parse(params)
+    if 'dictionary' in accept_options:
+        response_accept = pmce['ResponseAccept'](response, dictionary=dictionary)
+    else:
+        response_accept = pmce['ResponseAccept'](response)
+    return pmce, offer_accept, response_accept
+
+
+def negotiate_compression(extension, no_context_takeover, dictionary=None, **options):
+    """
+    Negotiate a compression extension between a client and a server (see
+    :func:`negotiate_compression_accepts`). Returns the server and client
+    extension processors.
+    """
+    accepts = negotiate_compression_accepts(extension, no_context_takeover, dictionary, **options)
+    if accepts is None:
+        return None
+    pmce, offer_accept, response_accept = accepts
+    return (pmce['PMCE'].create_from_offer_accept(True, offer_accept),
+            pmce['PMCE'].create_from_response_accept(False, response_accept))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class CompressionExtensionBenchmark(unittest.TestCase):
+    """
+    Compression ratio and per message compress / decompress times of all
+    registered compression extensions on WAMP messages.
+    """
+
+    MESSAGES = 10000
+
+    def test_extensions(self):
+        from autobahn.websocket.compress import PERMESSAGE_COMPRESSION_EXTENSION
+        payloads = create_wamp_payloads(self.MESSAGES)
+        dictionary = b''.join(create_wamp_payloads(len(WAMP_PAYLOADS)))
+        size = sum(len(payload) for payload in payloads)
+
+        print()
+        print('{:>32} {:>8} {:>6} {:>8} {:>16} {:>18}'.format(
+            'extension', 'context', 'dict', 'ratio', 'compress [us]', 'decompress [us]'))
+        for extension in sorted(PERMESSAGE_COMPRESSION_EXTENSION):
+            for no_context_takeover in [True, False]:
+                for dict_data in [None, dictionary]:
+                    pair = negotiate_compression(extension, no_context_takeover, dict_data)
+                    if pair is None or (dict_data is not None and pair[0].__json__().get('dictionary_id') is None):
+                        continue
+                    server, client = pair
+
+                    compressed = []
+
+                    def compress():
+                        del compressed[:]
+                        for payload in payloads:
+                            server.start_compress_message()
+                            compressed.append(server.compress_message_data(payload) + server.end_compress_message())
+
+                    def decompress():
+                        for data in compressed:
+                            client.start_decompress_message()
+                            client.decompress_message_data(data)
+                            client.end_decompress_message()
+
+                    # a context is carried over from one message to the next, so the
+                    # messages need to be decompressed in the order they were compressed
+                    compress_time = timeit(compress, repeat=1)
+                    decompress_time = timeit(decompress, repeat=1)
+
+                    count = self.MESSAGES
+                    ratio = float(sum(len(data) for data in compressed)) / size
+                    print('{:>32} {:>8} {:>6} {:>8.3f} {:>16.2f} {:>18.2f}'.format(
+                        extension, 'no' if no_context_takeover else 'yes', 'no' if dict_data is None else 'yes',
+                        ratio, 1e6 * compress_time / count, 1e6 * decompress_time / count))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(not os.environ.get('USE_TWISTED', False), 'only for Twisted')
+class SendQueueBenchmark(unittest.TestCase):
+    """
+    Writes, timers created and time taken for writing out chopped messages via
+    the send queue, reentering the reactor via a delayed timer versus right away.
+    """
+
+    SIZE = 10 * MB
+    CHOP_SIZES = [1400, 64 * KB]
+
+    def _send(self, transport, chopsize, delayed):
+        factory = TwistedWebSocketServerFactory()
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+        proto = TwistedWebSocketServerProtocol()
+        proto.factory = factory
+        proto.transport = transport
+        proto._connectionMade()
+        proto.state = proto.STATE_OPEN
+        proto.websocket_version = 18
+        if delayed:
+            proto._resumeSendQueue = lambda: WebSocketServerProtocol._resumeSendQueue(proto)
+
+        clock = Clock()
+        timers = []
+        call_later = clock.callLater
+
+        def counting_call_later(*args, **kwargs):
+            call = call_later(*args, **kwargs)
+            timers.append(call)
+            return call
+        clock.callLater = counting_call_later
+
+        payload = b'*' * self.SIZE
+        started = time.time()
+        with replace_loop(clock):
+            proto.sendFrame(opcode=2, payload=payload, chopsize=chopsize)
+            while clock.calls:
+                clock.advance(proto._QUEUED_WRITE_DELAY)
+        elapsed = time.time() - started
+
+        self.assertEqual(len(transport.getvalue()), self.SIZE + 10)
+        return len(transport.chunks), len(timers), elapsed
+
+    def test_chopped(self):
+        print()
+        print('{:>10} {:>14} {:>10} {:>10} {:>10}'.format('chop size', 'reentry', 'writes', 'timers', 'ms'))
+        for chopsize in self.CHOP_SIZES:
+            for name, delayed in [('delayed', True), ('right away', False)]:
+                writes, timers, elapsed = self._send(CollectingTransport(), chopsize, delayed)
+                print('{:>10} {:>14} {:>10} {:>10} {:>10.1f}'.format(chopsize, name, writes, timers, 1000 * elapsed))
+
+                # all chunks queued at once are written within one reactor turn
+                self.assertTrue(timers < writes)
+
+
+class IdleTransport(object):
+    """
+    Transport for idle connections, which discards everything written.
+    """
+
+    def write(self, data):
+        pass
+
+    def writeSequence(self, data):
+        pass
+
+    def writelines(self, data):
+        pass
+
+    def loseConnection(self):
+        pass
+
+    def abortConnection(self):
+        pass
+
+    def close(self):
+        pass
+
+    def getPeer(self):
+        return IPv4Address('TCP', '127.0.0.1', 54321)
+
+    def getHost(self):
+        return IPv4Address('TCP', '127.0.0.1', 9000)
+
+    def get_extra_info(self, name, default=None):
+        if name == 'peername':
+            return ('127.0.0.1', 54321)
+        return default
+
+
+def create_handshake_request():
+    """
+    Create the opening handshake request of a client.
+    """
+    factory = WebSocketClientFactory(u'ws://127.0.0.1:9000')
+    factory.setProtocolOptions(openHandshakeTimeout=0)
+    proto = WebSocketClientProtocol()
+    proto.factory = factory
+    proto.transport = CollectingTransport()
+    proto._connectionMade()
+    return proto.transport.getvalue()
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+@unittest.skipIf(tracemalloc is None, 'tracemalloc not available')
+class IdleConnectionMemoryBenchmark(unittest.TestCase):
+    """
+    Memory taken by every idle (open) connection, including the protocol
+    instance and everything it holds on to, but not the transport.
+    """
+
+    CONNECTIONS = 2000
+
+    def _measure(self, connect):
+        request = create_handshake_request()
+        transports = [IdleTransport() for _ in range(self.CONNECTIONS)]
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        connections = [connect(transport, request) for transport in transports]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        for proto in connections:
+            self.assertEqual(proto.state, proto.STATE_OPEN)
+        return float(after - before) / len(connections)
+
+    @unittest.skipIf(not os.environ.get('USE_TWISTED', False), 'only for Twisted')
+    def test_twisted(self):
+        factory = TwistedWebSocketServerFactory(u'ws://127.0.0.1:9000')
+        factory.protocol = TwistedWebSocketServerProtocol
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+
+        def connect(transport, request):
+            proto = factory.buildProtocol(None)
+            proto.makeConnection(transport)
+            proto.dataReceived(request)
+            return proto
+
+        print()
+        print('Twisted: {:.0f} bytes per idle connection'.format(self._measure(connect)))
+
+    @unittest.skipIf(not os.environ.get('USE_ASYNCIO', False), 'only for asyncio')
+    def test_asyncio(self):
+        loop = asyncio.new_event_loop()
+        factory = AsyncioWebSocketServerFactory(u'ws://127.0.0.1:9000', loop=loop)
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+
+        def connect(transport, request):
+            proto = factory()
+            proto.connection_made(transport)
+            proto.data_received(request)
+            # incoming data is processed in a later loop iteration
+            loop.run_until_complete(asyncio.sleep(0, loop=loop))
+            return proto
+
+        try:
+            print()
+            print('asyncio: {:.0f} bytes per idle connection'.format(self._measure(connect)))
+        finally:
+            loop.close()
+
+
+BROWSER_HANDSHAKE_REQUEST = b'\r\n'.join([
+    b'GET /ws HTTP/1.1',
+    b'Host: 127.0.0.1:9000',
+    b'Connection: Upgrade',
+    b'Pragma: no-cache',
+    b'Cache-Control: no-cache',
+    b'User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    b'Chrome/67.0.3396.99 Safari/537.36',
+    b'Upgrade: websocket',
+    b'Origin: http://127.0.0.1:8080',
+    b'Sec-WebSocket-Version: 13',
+    b'Accept-Encoding: gzip, deflate, br',
+    b'Accept-Language: en-US,en;q=0.9,de;q=0.8',
+    b'Cookie: session=0123456789abcdef0123456789abcdef; theme=dark; _ga=GA1.1.123456789.1530000000',
+    b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==',
+    b'Sec-WebSocket-Extensions: permessage-deflate; client_max_window_bits',
+    b'Sec-WebSocket-Protocol: wamp.2.json.batched, wamp.2.json',
+    b'',
+    b'',
+])
+"""
+Opening handshake request like the ones sent by web browsers (with a lot more headers than sent by Autobahn).
+"""
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class HandshakeBenchmark(unittest.TestCase):
+    """
+    Opening handshakes per second (on one core) processed by a server, with
+    the request received in one read, or trickling in over many reads.
+    """
+
+    HANDSHAKES = 5000
+    CHOP_SIZES = [0, 64, 8, 1]
+
+    def _measure(self, connect):
+        print()
+        print('{:>10} {:>14}'.format('chop size', 'handshakes/s'))
+        for chopsize in self.CHOP_SIZES:
+            request = BROWSER_HANDSHAKE_REQUEST
+            if chopsize:
+                chunks = [request[i:i + chopsize] for i in range(0, len(request), chopsize)]
+            else:
+                chunks = [request]
+            handshakes = self.HANDSHAKES if chopsize == 0 or chopsize > 8 else self.HANDSHAKES // 10
+            connections = []
+
+            def run():
+                del connections[:]
+                for _ in range(handshakes):
+                    connections.append(connect(IdleTransport(), chunks))
+
+            elapsed = timeit(run)
+            for proto in connections:
+                self.assertEqual(proto.state, proto.STATE_OPEN)
+            print('{:>10} {:>14.0f}'.format(chopsize or 'none', handshakes / elapsed))
+
+    @unittest.skipIf(not os.environ.get('USE_TWISTED', False), 'only for Twisted')
+    def test_twisted(self):
+        factory = TwistedWebSocketServerFactory(u'ws://127.0.0.1:9000')
+        factory.protocol = TwistedWebSocketServerProtocol
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+
+        def connect(transport, chunks):
+            proto = factory.buildProtocol(None)
+            proto.makeConnection(transport)
+            for chunk in chunks:
+                proto.dataReceived(chunk)
+            return proto
+
+        self._measure(connect)
+
+    @unittest.skipIf(not os.environ.get('USE_ASYNCIO', False), 'only for asyncio')
+    def test_asyncio(self):
+        loop = asyncio.new_event_loop()
+        factory = AsyncioWebSocketServerFactory(u'ws://127.0.0.1:9000', loop=loop)
+        factory.setProtocolOptions(openHandshakeTimeout=0)
+
+        def connect(transport, chunks):
+            proto = factory()
+            proto.connection_made(transport)
+            for chunk in chunks:
+                proto.data_received(chunk)
+            # incoming data is processed in a later loop iteration
+            loop.run_until_complete(asyncio.sleep(0, loop=loop))
+            return proto
+
+        try:
+            self._measure(connect)
+        finally:
+            loop.close()
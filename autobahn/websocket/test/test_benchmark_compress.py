@@ -0,0 +1,319 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""
+Benchmark and tuning harness for the WebSocket compression extensions.
+
+Every extension in :data:`autobahn.websocket.compress.PERMESSAGE_COMPRESSION_EXTENSION`
+is run over corpora of JSON, MessagePack and random binary messages, for all
+combinations of its parameters (context takeover, window bits and memory level
+for permessage-deflate, compression level for the others). For every
+combination, throughput, compression ratio and the memory held per compressor
+are measured.
+
+This is skipped by default. To run it, set the environment variable
+``AUTOBAHN_BENCHMARK``, and to get the results as JSON (for tracking
+regressions), name an output file in ``AUTOBAHN_BENCHMARK_OUTPUT``, e.g.
+
+    AUTOBAHN_BENCHMARK=1 AUTOBAHN_BENCHMARK_OUTPUT=compress.json \\
+        trial autobahn.websocket.test.test_benchmark_compress
+
+Running the module as a script writes the JSON results to stdout:
+
+    python -m autobahn.websocket.test.test_benchmark_compress > compress.json
+"""
+
+from __future__ import absolute_import, print_function
+
+import gc
+import json
+import mmap
+import os
+import platform
+import random
+import sys
+import unittest2 as unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from autobahn.websocket.compress import PERMESSAGE_COMPRESSION_EXTENSION
+from autobahn.websocket.compress import PerMessageDeflateMixin
+from autobahn.websocket.compress import build_deflate_dictionary
+from autobahn.wamp.serializer import JsonObjectSerializer
+from autobahn.websocket.test.test_benchmark import negotiate_compression_accepts
+from autobahn.websocket.test.test_benchmark import timeit
+
+try:
+    from autobahn.wamp.serializer import MsgPackObjectSerializer
+except ImportError:
+    MsgPackObjectSerializer = None
+
+MB = 1024 * 1024
+
+
+def create_wamp_messages(count, seed=0):
+    """
+    Create WAMP messages (as lists, before serialization): calls, results and
+    events, with IDs counting up and (reproducibly) random arguments.
+    """
+    rng = random.Random(seed)
+    names = [u'temperature', u'humidity', u'pressure', u'voltage']
+    places = [u'kitchen', u'garage', u'first-floor', u'basement']
+    messages = []
+    for i in range(count):
+        request = 4429313566 + i
+        if i % 3 == 0:
+            messages.append([48, request, {}, u'com.example.procedure%d' % rng.randint(1, 20),
+                             [rng.randint(0, 1000), rng.random()]])
+        elif i % 3 == 1:
+            messages.append([50, request, {}, [rng.random()]])
+        else:
+            messages.append([36, 5512315355, request, {}, [],
+                             {u'name': u'sensor.' + rng.choice(names), u'value': round(rng.uniform(-20, 40), 2),
+                              u'tags': rng.sample(places, 2)}])
+    return messages
+
+
+def create_random_payloads(count, seed=0, min_size=16, max_size=1024):
+    """
+    Create (reproducibly) random, incompressible binary payloads.
+    """
+    rng = random.Random(seed)
+    return [bytes(bytearray(rng.getrandbits(8) for _ in range(rng.randint(min_size, max_size))))
+            for _ in range(count)]
+
+
+def create_corpora(count):
+    """
+    Create the corpora to run the compression extensions over: a dict mapping
+    the corpus name to a list of message payloads.
+    """
+    corpora = {
+        'json': [JsonObjectSerializer().serialize(msg) for msg in create_wamp_messages(count)],
+        'random': create_random_payloads(count),
+    }
+    if MsgPackObjectSerializer is not None:
+        corpora['msgpack'] = [MsgPackObjectSerializer().serialize(msg) for msg in create_wamp_messages(count)]
+    return corpora
+
+
+def parameter_combinations(extension):
+    """
+    Generate all parameter combinations of a compression extension to run: as
+    dicts with the keyword arguments to :func:`negotiate_compression_accepts`.
+    """
+    for no_context_takeover in [True, False]:
+        if extension in ['permessage-deflate', 'permessage-deflate-dictionary']:
+            for window_bits in PerMessageDeflateMixin.WINDOW_SIZE_PERMISSIBLE_VALUES:
+                for mem_level in PerMessageDeflateMixin.MEM_LEVEL_PERMISSIBLE_VALUES:
+                    yield {'no_context_takeover': no_context_takeover,
+                           'dictionary': extension == 'permessage-deflate-dictionary',
+                           'window_bits': window_bits,
+                           'mem_level': mem_level}
+        elif extension == 'permessage-zstd':
+            for compress_level in [1, 3, 9, 19]:
+                for dictionary in [False, True]:
+                    yield {'no_context_takeover': no_context_takeover,
+                           'dictionary': dictionary,
+                           'compress_level': compress_level}
+        elif extension == 'permessage-bzip2':
+            for compress_level in [1, 5, 9]:
+                yield {'no_context_takeover': no_context_takeover,
+                       'compress_level': compress_level}
+        else:
+            yield {'no_context_takeover': no_context_takeover}
+
+
+def resident_memory():
+    """
+    Return the resident memory of this process in bytes, or ``None`` if this
+    cannot be determined on this platform.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (IOError, OSError):
+        return None
+
+
+def measure_compressor_memory(pmce, offer_accept, payloads, count):
+    """
+    Return the memory held by a compressor (the extension processor on the
+    server side after it has compressed a couple of messages), both as traced
+    by Python and as resident memory. Either is ``None`` if not available.
+    """
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    resident_before = resident_memory()
+
+    compressors = []
+    for _ in range(count):
+        compressor = pmce['PMCE'].create_from_offer_accept(True, offer_accept)
+        for payload in payloads:
+            compressor.start_compress_message()
+            compressor.compress_message_data(payload)
+            compressor.end_compress_message()
+        compressors.append(compressor)
+
+    gc.collect()
+    traced, resident = None, None
+    if tracemalloc is not None:
+        traced = float(tracemalloc.get_traced_memory()[0] - traced_before) / count
+        tracemalloc.stop()
+    if resident_before is not None:
+        resident = float(resident_memory() - resident_before) / count
+    return traced, resident
+
+
+def run_combination(extension, corpus, payloads, parameters, dictionary, compressors=16):
+    """
+    Run one compression extension with one parameter combination over a
+    corpus. Returns a dict with the results, or ``None`` if the extension
+    doesn't support the combination.
+    """
+    options = dict(parameters)
+    no_context_takeover = options.pop('no_context_takeover')
+    accepts = negotiate_compression_accepts(extension, no_context_takeover,
+                                            dictionary if options.pop('dictionary', False) else None,
+                                            **options)
+    if accepts is None:
+        return None
+    pmce, offer_accept, response_accept = accepts
+
+    result = {'extension': extension,
+              'corpus': corpus,
+              'parameters': parameters,
+              'messages': len(payloads),
+              'size': sum(len(payload) for payload in payloads)}
+    try:
+        server = pmce['PMCE'].create_from_offer_accept(True, offer_accept)
+        client = pmce['PMCE'].create_from_response_accept(False, response_accept)
+
+        compressed = []
+
+        def compress():
+            for payload in payloads:
+                server.start_compress_message()
+                compressed.append(server.compress_message_data(payload) + server.end_compress_message())
+
+        def decompress():
+            for data in compressed:
+                client.start_decompress_message()
+                client.decompress_message_data(data)
+                client.end_decompress_message()
+
+        # a context is carried over from one message to the next, so every message is
+        # compressed just once, and decompressed in the order it was compressed
+        compress_time = timeit(compress, repeat=1)
+        decompress_time = timeit(decompress, repeat=1)
+        traced, resident = measure_compressor_memory(pmce, offer_accept, payloads[:16], compressors)
+    except Exception as e:
+        # e.g. zlib doesn't support a raw deflate window of 8 bits
+        result['error'] = str(e)
+        return result
+
+    result['compressed_size'] = sum(len(data) for data in compressed)
+    result['ratio'] = float(result['compressed_size']) / result['size']
+    result['compress_mb_per_sec'] = result['size'] / compress_time / MB if compress_time else None
+    result['decompress_mb_per_sec'] = result['size'] / decompress_time / MB if decompress_time else None
+    result['memory_traced'] = traced
+    result['memory_resident'] = resident
+    return result
+
+
+def run_benchmark(messages=1000, extensions=None):
+    """
+    Run all (or the given) compression extensions with all their parameter
+    combinations over all corpora.
+
+    :param messages: Number of messages in every corpus.
+    :type messages: int
+    :param extensions: Names of the extensions to run, default all.
+    :type extensions: list of str
+
+    :returns: dict -- The results, ready to be serialized to JSON.
+    """
+    corpora = create_corpora(messages)
+    results = []
+    for extension in sorted(extensions or PERMESSAGE_COMPRESSION_EXTENSION):
+        for corpus in sorted(corpora):
+            payloads = corpora[corpus]
+            dictionary = build_deflate_dictionary(payloads[:100])
+            for parameters in parameter_combinations(extension):
+                result = run_combination(extension, corpus, payloads, parameters, dictionary)
+                if result is not None:
+                    results.append(result)
+    return {'python': '%s %s' % (platform.python_implementation(), platform.python_version()),
+            'platform': platform.platform(),
+            'corpora': sorted(corpora),
+            'results': results}
+
+
+def print_results(results):
+    """
+    Print the results of :func:`run_benchmark` as a table.
+    """
+    print()
+    print('{:>30} {:>8} {:>40} {:>7} {:>10} {:>12} {:>12} {:>12}'.format(
+        'extension', 'corpus', 'parameters', 'ratio', 'comp MB/s', 'decomp MB/s', 'traced [B]', 'resident [B]'))
+    for result in results['results']:
+        parameters = ' '.join('{}={}'.format(key, int(value)) for key, value in sorted(result['parameters'].items()))
+        parameters = parameters.replace('no_context_takeover', 'nct').replace('dictionary', 'dict')
+        if 'error' in result:
+            print('{:>30} {:>8} {:>40} {}'.format(result['extension'], result['corpus'], parameters, result['error']))
+            continue
+        print('{:>30} {:>8} {:>40} {:>7.3f} {:>10.1f} {:>12.1f} {:>12} {:>12}'.format(
+            result['extension'], result['corpus'], parameters, result['ratio'],
+            result['compress_mb_per_sec'] or 0, result['decompress_mb_per_sec'] or 0,
+            '-' if result['memory_traced'] is None else '{:.0f}'.format(result['memory_traced']),
+            '-' if result['memory_resident'] is None else '{:.0f}'.format(result['memory_resident'])))
+
+
+@unittest.skipIf(not os.environ.get('AUTOBAHN_BENCHMARK'), 'set AUTOBAHN_BENCHMARK to run benchmarks')
+class CompressionTuningBenchmark(unittest.TestCase):
+    """
+    Throughput, compression ratio and memory per compressor of all compression
+    extensions and parameter combinations.
+    """
+
+    def test_all(self):
+        results = run_benchmark()
+        print_results(results)
+
+        output = os.environ.get('AUTOBAHN_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    json.dump(run_benchmark(), sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
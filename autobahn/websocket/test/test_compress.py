@@ -0,0 +1,300 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+from __future__ import absolute_import
+
+import zlib
+
+import unittest2 as unittest
+
+from autobahn.websocket.protocol import WebSocketProtocol
+from autobahn.websocket.compress import PERMESSAGE_COMPRESSION_EXTENSION
+from autobahn.websocket.compress_deflate import PerMessageDeflate, PerMessageDeflatePool
+
+try:
+    from autobahn.websocket.compress import PerMessageDeflateDictionaryOffer, \
+        PerMessageDeflateDictionaryOfferAccept, \
+        PerMessageDeflateDictionaryResponseAccept, \
+        build_deflate_dictionary
+except ImportError:
+    PerMessageDeflateDictionaryOffer = None
+
+try:
+    from autobahn.websocket.compress import PerMessageZstdOffer, \
+        PerMessageZstdOfferAccept, \
+        PerMessageZstdResponseAccept
+except ImportError:
+    PerMessageZstdOffer = None
+
+try:
+    from autobahn.websocket.compress import PerMessageSnappy
+except ImportError:
+    PerMessageSnappy = None
+
+
+MESSAGES = [
+    b'[48,7813495,{},"com.example.add2",[23,7]]',
+    b'[48,7813496,{},"com.example.add2",[1,2]]',
+    b'[16,239714735,{"acknowledge":true},"com.example.oncounter",[666]]',
+    b'[16,239714736,{"acknowledge":true},"com.example.oncounter",[667]]',
+]
+
+
+def _negotiate(offer, accept_offer, accept_response):
+    """
+    Negotiate an extension from the client offer up to the client's accept of
+    the server response, going through the header strings exchanged.
+    """
+    parse = WebSocketProtocol()._parseExtensionsHeader
+    extension, params = parse(offer.get_extension_string())[0]
+    pmce = PERMESSAGE_COMPRESSION_EXTENSION[extension]
+    offer_accept = accept_offer(pmce['Offer'].parse(params))
+    server = pmce['PMCE'].create_from_offer_accept(True, offer_accept)
+
+    extension, params = parse(offer_accept.get_extension_string())[0]
+    pmce = PERMESSAGE_COMPRESSION_EXTENSION[extension]
+    response_accept = accept_response(pmce['Response'].parse(params))
+    client = pmce['PMCE'].create_from_response_accept(False, response_accept)
+    return server, client
+
+
+def _roundtrip(sender, receiver, payload):
+    sender.start_compress_message()
+    data = sender.compress_message_data(payload) + sender.end_compress_message()
+    receiver.start_decompress_message()
+    result = receiver.decompress_message_data(data)
+    receiver.end_decompress_message()
+    return data, result
+
+
+class PerMessageDeflatePoolTests(unittest.TestCase):
+
+    def test_shared_compressors(self):
+        pool = PerMessageDeflatePool(max_size=2)
+        servers = [PerMessageDeflate(True, True, False, 15, 15, 8) for _ in range(3)]
+        for server in servers:
+            server.set_pool(pool)
+
+        # the decompressor of the first client is kept across messages, the
+        # second one starts over for every message
+        clients = [PerMessageDeflate(False, False, False, 15, 15, 8),
+                   PerMessageDeflate(False, True, False, 15, 15, 8)]
+
+        for i in range(3):
+            for payload in MESSAGES:
+                for server in servers:
+                    for client in clients:
+                        data, result = _roundtrip(server, client, payload)
+                        self.assertEqual(result, payload)
+                        self.assertIsNone(server._compressor)
+
+        self.assertEqual(pool.misses, 1)
+        self.assertEqual(pool.hits, 3 * len(MESSAGES) * len(servers) * len(clients) - 1)
+        self.assertEqual(pool.__json__()['idle'], 1)
+
+    def test_pool_keys(self):
+        pool = PerMessageDeflatePool()
+        server1 = PerMessageDeflate(True, True, False, 15, 15, 8)
+        server2 = PerMessageDeflate(True, True, False, 15, 15, 8)
+        server2.set_compress_options(level=1)
+        for server in [server1, server2]:
+            server.set_pool(pool)
+            server.start_compress_message()
+
+        self.assertEqual(pool.misses, 2)
+        server1.end_compress_message()
+        server2.end_compress_message()
+        self.assertEqual(len(pool._compressors), 2)
+
+    def test_context_takeover_not_pooled(self):
+        pool = PerMessageDeflatePool()
+        server = PerMessageDeflate(True, False, False, 15, 15, 8)
+        server.set_pool(pool)
+        client = PerMessageDeflate(False, False, False, 15, 15, 8)
+
+        for payload in MESSAGES:
+            data, result = _roundtrip(server, client, payload)
+            self.assertEqual(result, payload)
+
+        self.assertEqual(pool.hits + pool.misses, 0)
+        self.assertIsNotNone(server._compressor)
+
+
+@unittest.skipIf(PerMessageDeflateDictionaryOffer is None, 'zlib does not support preset dictionaries')
+class PerMessageDeflateDictionaryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dictionary = build_deflate_dictionary(MESSAGES)
+
+    def _negotiate(self, dictionary=None):
+        offer = PerMessageDeflateDictionaryOffer(request_no_context_takeover=True, dictionary=self.dictionary)
+        return _negotiate(offer,
+                          lambda offer: PerMessageDeflateDictionaryOfferAccept(offer, request_no_context_takeover=True, dictionary=dictionary or self.dictionary),
+                          lambda response: PerMessageDeflateDictionaryResponseAccept(response, dictionary=self.dictionary))
+
+    def test_build_dictionary(self):
+        dictionary = build_deflate_dictionary([b'a', b'b', b'b', b'c', b'a', b'b'])
+        self.assertEqual(dictionary, b'cab')
+        self.assertEqual(build_deflate_dictionary([b'a', b'b', b'b'], max_size=1), b'b')
+
+    def test_negotiate(self):
+        server, client = self._negotiate()
+
+        self.assertEqual(server.EXTENSION_NAME, 'permessage-deflate-dictionary')
+        self.assertTrue(server.server_no_context_takeover)
+        self.assertTrue(client.client_no_context_takeover)
+        self.assertEqual(server.__json__()['dictionary_id'], client.__json__()['dictionary_id'])
+        self.assertEqual(len(server.dictionary_id), 16)
+        self.assertEqual(server.get_broadcast_key()[-1], server.dictionary_id)
+
+    def test_negotiate_other_dictionary(self):
+        self.assertRaises(Exception, self._negotiate, b'some other dictionary')
+
+    def test_parse_missing_dictionary_id(self):
+        params = WebSocketProtocol()._parseExtensionsHeader('permessage-deflate-dictionary; client_max_window_bits')[0][1]
+        self.assertRaises(Exception, PerMessageDeflateDictionaryOffer.parse, params)
+
+    def test_roundtrip(self):
+        server, client = self._negotiate()
+        plain = PerMessageDeflate(True, True, True, 15, 15, 8)
+
+        for i in range(3):
+            for payload in MESSAGES:
+                data, result = _roundtrip(server, client, payload)
+                self.assertEqual(result, payload)
+                data, result = _roundtrip(client, server, payload)
+                self.assertEqual(result, payload)
+
+                # without context takeover, the dictionary is what makes messages compress well
+                plain.start_compress_message()
+                plain_data = plain.compress_message_data(payload) + plain.end_compress_message()
+                self.assertLess(len(data), len(plain_data))
+
+    def test_decompress_without_dictionary(self):
+        server, client = self._negotiate()
+        server.start_compress_message()
+        data = server.compress_message_data(MESSAGES[0]) + server.end_compress_message()
+        self.assertRaises(zlib.error, zlib.decompressobj(-15).decompress, data + b'\x00\x00\xff\xff')
+
+
+@unittest.skipIf(PerMessageSnappy is None, 'python-snappy not installed')
+class PerMessageSnappyTests(unittest.TestCase):
+
+    def test_roundtrip(self):
+        server = PerMessageSnappy(True, False, False)
+        client = PerMessageSnappy(False, False, False)
+        for payload in MESSAGES:
+            data, result = _roundtrip(server, client, payload)
+            self.assertEqual(result, payload)
+
+
+@unittest.skipIf(PerMessageZstdOffer is None, 'zstandard not installed')
+class PerMessageZstdTests(unittest.TestCase):
+
+    def _negotiate(self, no_context_takeover, dictionary=None, compress_level=None):
+        offer = PerMessageZstdOffer(request_no_context_takeover=no_context_takeover, dictionary=dictionary)
+        return _negotiate(offer,
+                          lambda offer: PerMessageZstdOfferAccept(offer, request_no_context_takeover=no_context_takeover, compress_level=compress_level, dictionary=dictionary),
+                          lambda response: PerMessageZstdResponseAccept(response, dictionary=dictionary))
+
+    def _roundtrips(self, server, client):
+        for i in range(3):
+            for payload in MESSAGES + [b'']:
+                data, result = _roundtrip(server, client, payload)
+                self.assertEqual(result, payload)
+                data, result = _roundtrip(client, server, payload)
+                self.assertEqual(result, payload)
+
+    def test_no_context_takeover(self):
+        server, client = self._negotiate(True, compress_level=10)
+        self.assertTrue(server.server_no_context_takeover)
+        self.assertTrue(client.client_no_context_takeover)
+        self.assertEqual(server.compress_level, 10)
+        self.assertEqual(server.get_broadcast_key(), ('permessage-zstd', 10, None))
+        self._roundtrips(server, client)
+
+    def test_context_takeover(self):
+        server, client = self._negotiate(False)
+        self.assertIsNone(server.get_broadcast_key())
+        self._roundtrips(server, client)
+
+        # later messages refer back to earlier ones
+        first, _ = _roundtrip(server, client, MESSAGES[0] * 4)
+        second, _ = _roundtrip(server, client, MESSAGES[0] * 4)
+        self.assertLess(len(second), len(first))
+
+    def test_discard(self):
+        # a message compressed without context takeover can be discarded ...
+        server, client = self._negotiate(True)
+        server.start_compress_message()
+        server.compress_message_data(MESSAGES[0])
+        server.end_compress_message()
+        self.assertTrue(server.discard_compress_message())
+        self._roundtrips(server, client)
+
+        # ... but not when it is part of the stream of all messages
+        server, client = self._negotiate(False)
+        _roundtrip(server, client, MESSAGES[0])
+        server.start_compress_message()
+        data = server.compress_message_data(MESSAGES[1]) + server.end_compress_message()
+        self.assertFalse(server.discard_compress_message())
+        client.start_decompress_message()
+        self.assertEqual(client.decompress_message_data(data), MESSAGES[1])
+        client.end_decompress_message()
+        self._roundtrips(server, client)
+
+    def test_decompress_chunked(self):
+        server, client = self._negotiate(False)
+        payload = b'\x00' * 10 * 2**20
+        server.start_compress_message()
+        data = server.compress_message_data(payload) + server.end_compress_message()
+        client.start_decompress_message()
+        chunks = list(client.decompress_message_data_chunked(data, 65536))
+        client.end_decompress_message()
+        self.assertEqual(b''.join(chunks), payload)
+        self.assertTrue(max([len(chunk) for chunk in chunks]) <= 65536)
+
+        # empty input still produces a chunk
+        client.start_decompress_message()
+        self.assertEqual(list(client.decompress_message_data_chunked(b'', 65536)), [b''])
+        client.end_decompress_message()
+        self._roundtrips(server, client)
+
+    def test_dictionary(self):
+        dictionary = b''.join(MESSAGES)
+        server, client = self._negotiate(True, dictionary=dictionary)
+        self.assertEqual(server.__json__()['dictionary_id'], client.__json__()['dictionary_id'])
+        self._roundtrips(server, client)
+
+        plain, _ = self._negotiate(True)
+        self.assertLess(len(_roundtrip(server, client, MESSAGES[0])[0]),
+                        len(_roundtrip(plain, client, MESSAGES[0])[0]))
+
+    def test_dictionary_mismatch(self):
+        offer = PerMessageZstdOffer(dictionary=b'dictionary')
+        self.assertRaises(Exception, PerMessageZstdOfferAccept, offer)
+        self.assertRaises(Exception, PerMessageZstdOfferAccept, offer, dictionary=b'other dictionary')
+        self.assertRaises(Exception, PerMessageZstdOfferAccept, PerMessageZstdOffer(), dictionary=b'dictionary')
@@ -26,8 +26,10 @@
 
 from __future__ import absolute_import, print_function
 
+import os
 from hashlib import sha1
 from base64 import b64encode
+import zlib
 import unittest2 as unittest
 
 from autobahn.websocket.protocol import WebSocketServerProtocol
@@ -35,10 +37,167 @@ from autobahn.websocket.protocol import WebSocketServerFactory
 from autobahn.websocket.protocol import WebSocketClientProtocol
 from autobahn.websocket.protocol import WebSocketClientFactory
 from autobahn.websocket.protocol import WebSocketProtocol
+from autobahn.websocket.protocol import ReceiveBuffer
+from autobahn.websocket.protocol import parseHttpHeader
+from autobahn.websocket.protocol import _frame_message
+from autobahn.websocket.compress import PerMessageDeflate
 from autobahn.test import FakeTransport
 
 from mock import Mock
 
+try:
+    import zstandard
+    from autobahn.websocket.compress import PerMessageZstd
+except ImportError:
+    PerMessageZstd = None
+
+
+class ReceiveBufferTests(unittest.TestCase):
+
+    def test_read_within_chunk(self):
+        buf = ReceiveBuffer(b'abcdef')
+        self.assertEqual(buf.read(2), b'ab')
+        self.assertEqual(buf.read(3), b'cde')
+        self.assertEqual(len(buf), 1)
+        self.assertEqual(buf.read(10), b'f')
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(buf.read(1), b'')
+
+    def test_read_across_chunks(self):
+        buf = ReceiveBuffer()
+        for chunk in [b'ab', b'cde', b'f', b'ghij']:
+            buf.append(chunk)
+        self.assertEqual(len(buf), 10)
+        self.assertEqual(buf.read(1), b'a')
+        self.assertEqual(buf.read(6), b'bcdefg')
+        self.assertEqual(buf.read(3), b'hij')
+        self.assertEqual(len(buf), 0)
+
+    def test_read_whole_chunk_is_not_copied(self):
+        chunk = b'x' * 100
+        buf = ReceiveBuffer()
+        buf.append(chunk)
+        self.assertTrue(buf.read(100) is chunk)
+
+    def test_peek_does_not_consume(self):
+        buf = ReceiveBuffer()
+        buf.append(b'a')
+        buf.append(b'bc')
+        self.assertEqual(buf.peek(14), b'abc')
+        self.assertEqual(buf.peek(2), b'ab')
+        self.assertEqual(len(buf), 3)
+
+    def test_discard(self):
+        buf = ReceiveBuffer()
+        buf.append(b'abc')
+        buf.append(b'def')
+        buf.discard(4)
+        self.assertEqual(len(buf), 2)
+        self.assertEqual(buf.getvalue(), b'ef')
+        buf.discard(10)
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(buf.getvalue(), b'')
+
+    def test_drained_buffer_releases_chunks(self):
+        buf = ReceiveBuffer()
+        buf.append(b'abc')
+        buf.append(b'de')
+        buf.read(4)
+        self.assertTrue(buf._chunks is not None)
+        buf.discard(1)
+        self.assertTrue(buf._chunks is None)
+        buf.append(b'f')
+        self.assertEqual(buf.read(1), b'f')
+        self.assertTrue(buf._chunks is None)
+
+    def test_find(self):
+        buf = ReceiveBuffer()
+        for chunk in [b'xab', b'cd\r', b'\n', b'\r\nyz']:
+            buf.append(chunk)
+        buf.discard(1)
+        self.assertEqual(buf.find(b'\r\n\r\n'), 4)
+        self.assertEqual(buf.find(b'\r\n\r\n', 4), 4)
+        self.assertEqual(buf.find(b'\r\n\r\n', 5), -1)
+        self.assertEqual(buf.find(b'yz', 7), 8)
+        self.assertEqual(buf.find(b'b'), 1)
+        self.assertEqual(buf.find(b'b', 2), -1)
+        self.assertEqual(buf.find(b'z', 100), -1)
+        self.assertEqual(ReceiveBuffer().find(b'a'), -1)
+
+
+class ParseHttpHeaderTests(unittest.TestCase):
+
+    def test_headers(self):
+        status_line, headers, headers_cnt = parseHttpHeader(
+            b'GET /ws HTTP/1.1\r\n'
+            b'Host: example.com\r\n'
+            b'Sec-WebSocket-Protocol: wamp.2.json\r\n'
+            b'Bad Header\r\n'
+            b'sec-websocket-protocol:  wamp.2.cbor \r\n'
+            b'Sec-WebSocket-Protocol: wamp.2.msgpack\r\n'
+            b'X-Latin-1: \xe4\r\n'
+            b'\r\n')
+        self.assertEqual(status_line, u'GET /ws HTTP/1.1')
+        self.assertEqual(headers, {u'host': u'example.com',
+                                   u'sec-websocket-protocol': u'wamp.2.json, wamp.2.cbor, wamp.2.msgpack',
+                                   u'x-latin-1': u'\xe4'})
+        self.assertEqual(headers_cnt, {u'host': 1, u'sec-websocket-protocol': 3, u'x-latin-1': 1})
+
+
+class WebSocketServerHandshakeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = WebSocketServerFactory()
+        self.factory.setProtocolOptions(openHandshakeTimeout=0)
+        self.protocol = WebSocketServerProtocol()
+        self.protocol.factory = self.factory
+        self.protocol.transport = FakeTransport()
+        self.protocol._onOpen = lambda: None
+        self.protocol._closeConnection = lambda abort=False: None
+        self.protocol._connectionMade()
+
+    def _request(self, *headers):
+        return b'\r\n'.join([
+            b'GET /ws HTTP/1.1',
+            b'Host: www.example.com',
+            b'Sec-WebSocket-Version: 13',
+            b'Sec-WebSocket-Key: tXAxWFUqnhi86Ajj7dRY5g==',
+            b'Connection: Upgrade',
+            b'Upgrade: websocket',
+        ] + list(headers)) + b'\r\n\r\n'
+
+    def test_request_trickling_in(self):
+        """
+        A request received one octet at a time (splitting the empty line
+        ending it, too) completes the handshake, and the octets following it
+        are kept.
+        """
+        data = self._request() + b'\x81\x80'
+        for i in range(len(data)):
+            self.protocol._dataReceived(data[i:i + 1])
+        self.assertEqual(self.protocol.state, WebSocketProtocol.STATE_OPEN)
+        self.assertIn(b'HTTP/1.1 101', self.protocol.transport._written)
+        self.assertEqual(self.protocol.http_headers[u'host'], u'www.example.com')
+        self.assertEqual(self.protocol.data, b'\x81\x80')
+
+    def test_request_too_large(self):
+        """
+        A request larger than maxOpeningHandshakeSize is failed as soon as
+        the octets received exceed it, without waiting for the rest.
+        """
+        self.protocol.maxOpeningHandshakeSize = 1000
+        data = self._request(b'Cookie: ' + b'x' * 2000)
+        self.protocol._dataReceived(data[:900])
+        self.assertEqual(self.protocol.state, WebSocketProtocol.STATE_CONNECTING)
+        self.protocol._dataReceived(data[900:1100])
+        self.assertEqual(self.protocol.state, WebSocketProtocol.STATE_CLOSED)
+        self.assertTrue(self.protocol.transport._written.startswith(b'HTTP/1.1 431'))
+
+    def test_request_size_unlimited(self):
+        self.protocol.maxOpeningHandshakeSize = 0
+        self.protocol._dataReceived(self._request(b'Cookie: ' + b'x' * 100000))
+        self.assertEqual(self.protocol.state, WebSocketProtocol.STATE_OPEN)
+
 
 class WebSocketClientProtocolTests(unittest.TestCase):
 
@@ -134,6 +293,354 @@ class WebSocketServerProtocolTests(unittest.TestCase):
 
         self.assertTrue(self.protocol.autoPingPendingCall is not None)
 
+    def _receive_messages(self):
+        messages = []
+        self.protocol.inside_message = False
+        self.protocol.current_frame = None
+        self.protocol._onMessageBegin = self.protocol.onMessageBegin
+        self.protocol._onMessageFrameBegin = self.protocol.onMessageFrameBegin
+        self.protocol._onMessageFrameData = self.protocol.onMessageFrameData
+        self.protocol._onMessageFrameEnd = self.protocol.onMessageFrameEnd
+        self.protocol._onMessageFrame = self.protocol.onMessageFrame
+        self.protocol._onMessageEnd = self.protocol.onMessageEnd
+        self.protocol._onMessage = lambda payload, isBinary: messages.append(payload)
+        return messages
+
+    def _client_frames(self, payloads, fragmentSize=None, isBinary=True):
+        frames = b''
+        for payload in payloads:
+            client = WebSocketClientProtocol()
+            client.factory = WebSocketClientFactory()
+            client.transport = FakeTransport()
+            client._connectionMade()
+            client.openHandshakeTimeoutCall.cancel()
+            client.state = client.STATE_OPEN
+            client.transport._written = b''
+            client.sendMessage(payload, isBinary=isBinary, fragmentSize=fragmentSize)
+            frames += client.transport._written
+        return frames
+
+    def test_fragmented_reads(self):
+        """
+        A message split across many small reads (down to single octets,
+        and cutting through frame headers) is reassembled correctly.
+        """
+        messages = self._receive_messages()
+
+        # two masked client frames, the first one using a 16-bit extended length
+        payload1 = b'*' * 300
+        payload2 = b'hello'
+        frames = self._client_frames([payload1, payload2])
+
+        for i in range(len(frames)):
+            self.protocol._dataReceived(frames[i:i + 1])
+
+        self.assertEqual(messages, [payload1, payload2])
+        self.assertEqual(self.protocol.data, b'')
+
+    def test_batched_messages(self):
+        """
+        Many complete messages received at once are all delivered in order,
+        also when interleaved with fragmented messages and control frames,
+        and are accounted for like messages processed one by one.
+        """
+        messages = self._receive_messages()
+        self.protocol._onPing = Mock()
+
+        payloads = [b'*' * n for n in [0, 1, 125, 126, 300, 70000]]
+        frames = self._client_frames(payloads)
+        frames += self._client_frames([u'h\u00e9llo'.encode('utf8')], isBinary=False)
+        frames += self._client_frames([b'fragmented' * 10], fragmentSize=7)
+        frames += b'\x89\x80\x00\x00\x00\x00'
+        frames += self._client_frames(payloads)
+        self.protocol.trafficStats.reset()
+
+        self.protocol._dataReceived(frames)
+
+        expected = payloads + [u'h\u00e9llo'.encode('utf8'), b'fragmented' * 10] + payloads
+        self.assertEqual(messages, expected)
+        self.assertEqual(self.protocol._onPing.call_count, 1)
+        stats = self.protocol.trafficStats
+        self.assertEqual(stats.incomingWebSocketMessages, len(expected))
+        self.assertEqual(stats.incomingWebSocketFrames, len(expected) - 1 + 15)
+        self.assertEqual(stats.incomingOctetsAppLevel, sum([len(m) for m in expected]))
+        self.assertEqual(len(self.protocol._receive_buffer), 0)
+
+    def test_batched_messages_invalid_utf8(self):
+        """
+        A text message with invalid UTF-8 in a batch is reported as before,
+        after the messages in front of it were delivered.
+        """
+        messages = self._receive_messages()
+        self.protocol._invalid_payload = Mock(return_value=True)
+
+        frames = self._client_frames([b'ok', b'\xff'], isBinary=False)
+        self.protocol._dataReceived(frames)
+
+        self.assertEqual(messages, [b'ok'])
+        self.protocol._invalid_payload.assert_called_once_with(
+            u'encountered invalid UTF-8 while processing text message at payload octet index 0')
+
+    def test_batched_messages_streaming_api(self):
+        """
+        Messages are not batched when the streaming (or frame-based) API is used.
+        """
+        frame_data = []
+        self.protocol.onMessageFrameData = frame_data.append
+        messages = self._receive_messages()
+
+        self.protocol._dataReceived(self._client_frames([b'a', b'b']))
+
+        self.assertEqual(frame_data, [b'a', b'b'])
+        self.assertEqual(messages, [b'', b''])
+
+    def _compressed_client_frame(self, payload):
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return _frame_message(data[:-4], True, True, compressed=True)
+
+    def _receive_decompressed_chunks(self):
+        chunks = []
+
+        def onMessageFrameData(payload):
+            chunks.append(len(payload))
+            self.protocol.onMessageFrameData(payload)
+        self.protocol._perMessageCompress = PerMessageDeflate(True, False, False, 15, 15, 8)
+        self.protocol._onMessageFrameData = onMessageFrameData
+        return chunks
+
+    def test_decompress_chunked(self):
+        """
+        Compressed messages are decompressed in chunks of bounded size.
+        """
+        messages = self._receive_messages()
+        chunks = self._receive_decompressed_chunks()
+
+        payload = b'0123456789' * 30000
+        self.protocol._dataReceived(self._compressed_client_frame(payload))
+
+        self.assertEqual(messages, [payload])
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(max(chunks) <= self.protocol._DECOMPRESS_CHUNK_SIZE)
+
+    def test_decompress_limit(self):
+        """
+        A compressed message is failed as soon as it decompresses to more than
+        maxMessagePayloadSize, without decompressing it any further.
+        """
+        self.protocol.maxMessagePayloadSize = 100000
+        self.protocol._closeConnection = Mock()
+        messages = self._receive_messages()
+        chunks = self._receive_decompressed_chunks()
+
+        # 10 MB decompressed, about 10 KB compressed
+        self.protocol._dataReceived(self._compressed_client_frame(b'\x00' * 10 * 2**20))
+
+        self.assertTrue(self.protocol.wasMaxMessagePayloadSizeExceeded)
+        self.assertEqual(messages, [])
+        self.assertTrue(sum(chunks) <= 100000)
+        self.assertTrue(self.protocol._message_decompressed_length <= 100000 + self.protocol._DECOMPRESS_CHUNK_SIZE)
+
+    @unittest.skipIf(PerMessageZstd is None, 'zstandard not installed')
+    def test_decompress_limit_zstd(self):
+        """
+        A message compressed with zstd is failed as soon as it decompresses to
+        more than maxMessagePayloadSize, though zstd cannot bound its output.
+        """
+        self.protocol.maxMessagePayloadSize = 100000
+        self.protocol._closeConnection = Mock()
+        messages = self._receive_messages()
+        chunks = self._receive_decompressed_chunks()
+        self.protocol._perMessageCompress = PerMessageZstd(True, True, True)
+
+        # 200 MB decompressed, about 6 KB compressed
+        data = zstandard.ZstdCompressor().compressobj().compress(b'\x00' * 200 * 2**20)
+        self.protocol._dataReceived(_frame_message(data, True, True, compressed=True))
+
+        self.assertTrue(self.protocol.wasMaxMessagePayloadSizeExceeded)
+        self.assertEqual(messages, [])
+        self.assertTrue(max(chunks) <= self.protocol._DECOMPRESS_CHUNK_SIZE)
+        self.assertTrue(self.protocol._message_decompressed_length <= 100000 + self.protocol._DECOMPRESS_CHUNK_SIZE)
+
+    def test_reassemble_bytearray(self):
+        """
+        With reassembleBytearray, messages (single frame and fragmented) are
+        reassembled into, and delivered as, a bytearray.
+        """
+        self.protocol.reassembleBytearray = True
+        messages = self._receive_messages()
+
+        payload1 = b'abcdefghij' * 100
+        payload2 = b'0123456789' * 30
+        payload3 = b''
+        frames = self._client_frames([payload1, payload2, payload3], fragmentSize=128)
+
+        for i in range(0, len(frames), 77):
+            self.protocol._dataReceived(frames[i:i + 77])
+
+        self.assertEqual(messages, [payload1, payload2, payload3])
+        for message in messages:
+            self.assertIsInstance(message, bytearray)
+
+    def test_reassemble_bytearray_limit(self):
+        """
+        With reassembleBytearray, a frame announcing more than maxMessagePayloadSize
+        fails the connection before anything is preallocated.
+        """
+        self.protocol.reassembleBytearray = True
+        self.protocol.maxMessagePayloadSize = 1000
+        self.protocol._closeConnection = Mock()
+        messages = self._receive_messages()
+
+        self.protocol._dataReceived(self._client_frames([b'*' * 1001])[:14])
+
+        self.assertTrue(self.protocol.wasMaxMessagePayloadSizeExceeded)
+        self.assertEqual(len(self.protocol.message_data), 0)
+        self.assertEqual(messages, [])
+
+    def test_frame_header_violations(self):
+        """
+        Frame headers failing the checks are reported as protocol violations,
+        with the first check failing giving the reason.
+        """
+        headers = [
+            (b'\x82\x80', None),
+            (b'\x82\x05', 'unmasked client-to-server frame'),
+            (b'\xa2\x80', 'RSV = 2 and no extension negotiated'),
+            (b'\xc2\x80', 'RSV = 4 and no extension negotiated'),
+            (b'\x09\x80', 'fragmented control frame'),
+            (b'\x89\xfe', 'control frame with payload length > 125 octets'),
+            (b'\x8b\x80', 'control frame using reserved opcode 11'),
+            (b'\x88\x81', 'received close control frame with payload len 1'),
+            (b'\x83\x80', 'data frame using reserved opcode 3'),
+            (b'\x80\x80', 'received continuation data frame outside fragmented message'),
+            (b'\x82\xfe\x00\x7d', 'invalid data frame length (not using minimal length encoding)'),
+            (b'\x82\xff\x00\x00\x00\x00\x00\x00\xff\xff',
+             'invalid data frame length (not using minimal length encoding)'),
+        ]
+        for header, reason in headers:
+            self.tearDown()
+            self.setUp()
+            self._receive_messages()
+            self.protocol._protocol_violation = Mock(return_value=True)
+            self.protocol._dataReceived(header + b'\x00' * 4)
+            if reason is None:
+                self.assertFalse(self.protocol._protocol_violation.called)
+            else:
+                self.protocol._protocol_violation.assert_called_once_with(reason)
+
+    def test_lazy_state(self):
+        """
+        The send queue and the UTF8 validator are only created when needed,
+        and per-connection state is kept in slots.
+        """
+        self.assertTrue(self.protocol.send_queue is None)
+        self.assertTrue(self.protocol.utf8validator is None)
+        self.assertNotIn('trafficStats', self.protocol.__dict__)
+
+        messages = self._receive_messages()
+        self.protocol._dataReceived(b'\x81\x85\x00\x00\x00\x00hello')
+        self.assertEqual(messages, [b'hello'])
+        self.assertTrue(self.protocol.utf8validator is not None)
+
+        self.protocol.sendMessage(b'hello', isBinary=True, sync=True)
+        self.assertEqual(len(self.protocol.send_queue), 0)
+        self.assertEqual(self.transport._written, b'\x82\x05hello')
+
+    def test_sendMessage_scatter_gather(self):
+        """
+        The payload of a large unmasked frame is written as a buffer of its
+        own, without being copied, and still accounted for in traffic stats.
+        """
+        written = []
+        self.protocol._writeSequence = written.extend
+        self.protocol.trafficStats.reset()
+
+        payload = b'*' * 2000
+        self.protocol.sendMessage(payload, isBinary=True)
+
+        self.assertEqual(len(written), 2)
+        self.assertEqual(written[0], b'\x82\x7e\x07\xd0')
+        self.assertIs(written[1], payload)
+        self.assertEqual(self.protocol.trafficStats.outgoingOctetsWireLevel, 2004)
+
+    def test_sendMessage_small_single_write(self):
+        """
+        Small frames are written in one piece.
+        """
+        self.protocol.sendMessage(b'hello', isBinary=True)
+        self.assertEqual(self.transport._written, b'\x82\x05hello')
+
+    def test_sendMessage_compression_min_size(self):
+        """
+        Messages smaller than perMessageCompressionMinSize are sent uncompressed.
+        """
+        self.protocol._perMessageCompress = PerMessageDeflate(True, False, False, 15, 15, 8)
+        self.protocol.perMessageCompressionMinSize = 64
+
+        self.protocol.sendMessage(b'hello', isBinary=True)
+        self.assertEqual(self.transport._written, b'\x82\x05hello')
+
+        self.transport._written = b''
+        payload = b'hello' * 20
+        self.protocol.sendMessage(payload, isBinary=True)
+        frame = self.transport._written
+        self.assertEqual(frame[0:1], b'\xc2')
+        self.assertEqual(zlib.decompressobj(-15).decompress(frame[2:] + b'\x00\x00\xff\xff'), payload)
+
+    def test_sendMessage_compression_max_ratio(self):
+        """
+        Messages which do not compress well are sent uncompressed, and do not
+        disturb the compression context of later messages.
+        """
+        self.protocol._perMessageCompress = PerMessageDeflate(True, False, False, 15, 15, 8)
+        self.protocol.perMessageCompressionMaxRatio = 0.9
+        decompressor = zlib.decompressobj(-15)
+
+        payload = b'hello' * 20
+        self.protocol.sendMessage(payload, isBinary=True)
+        frame = self.transport._written
+        self.assertEqual(frame[0:1], b'\xc2')
+        self.assertEqual(decompressor.decompress(frame[2:] + b'\x00\x00\xff\xff'), payload)
+
+        self.transport._written = b''
+        incompressible = os.urandom(100)
+        self.protocol.sendMessage(incompressible, isBinary=True)
+        self.assertEqual(self.transport._written, b'\x82' + bytes(bytearray([len(incompressible)])) + incompressible)
+
+        self.transport._written = b''
+        payload = b'world' * 20
+        self.protocol.sendMessage(payload, isBinary=True)
+        frame = self.transport._written
+        self.assertEqual(frame[0:1], b'\xc2')
+        self.assertEqual(decompressor.decompress(frame[2:] + b'\x00\x00\xff\xff'), payload)
+
+    @unittest.skipIf(PerMessageZstd is None, 'zstandard not installed')
+    def test_sendMessage_compression_max_ratio_zstd(self):
+        """
+        With zstd context takeover, messages which do not compress well are
+        sent compressed all the same, as they cannot be taken out of the
+        compressed stream again. Without context takeover, they are sent
+        uncompressed.
+        """
+        payloads = [b'hello' * 20, os.urandom(100), b'world' * 20]
+        self.protocol.perMessageCompressionMaxRatio = 0.9
+
+        for no_context_takeover in [False, True]:
+            self.protocol._perMessageCompress = PerMessageZstd(True, no_context_takeover, no_context_takeover)
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            for payload in payloads:
+                self.transport._written = b''
+                self.protocol.sendMessage(payload, isBinary=True)
+                frame = self.transport._written
+                if no_context_takeover and payload is payloads[1]:
+                    self.assertEqual(frame, b'\x82' + bytes(bytearray([len(payload)])) + payload)
+                    continue
+                self.assertEqual(frame[0:1], b'\xc2')
+                if no_context_takeover:
+                    decompressor = zstandard.ZstdDecompressor().decompressobj()
+                self.assertEqual(decompressor.decompress(frame[2:]), payload)
+
     def test_sendClose_none(self):
         """
         sendClose with no code or reason works.
@@ -213,3 +720,169 @@ class WebSocketServerProtocolTests(unittest.TestCase):
         # We shouldn't have closed
         self.assertEqual(self.transport._written, b"")
         self.assertEqual(self.protocol.state, self.protocol.STATE_OPEN)
+
+
+class WebSocketFactoryBroadcastTests(unittest.TestCase):
+    """
+    Tests for autobahn.websocket.protocol.WebSocketFactory.broadcast.
+    """
+
+    def setUp(self):
+        self.factory = WebSocketServerFactory()
+
+    def _connect(self, pmce=None):
+        p = WebSocketServerProtocol()
+        p.factory = self.factory
+        p.transport = FakeTransport()
+        p._connectionMade()
+        p.openHandshakeTimeoutCall.cancel()
+        p.openHandshakeTimeoutCall = None
+        p.state = p.STATE_OPEN
+        p.websocket_version = 18
+        p._perMessageCompress = pmce
+        self.factory._openConnections.add(p)
+        return p
+
+    def _inflate(self, frame):
+        self.assertEqual(frame[0:1], b'\xc1')
+        return zlib.decompressobj(-15).decompress(frame[2:] + b'\x00\x00\xff\xff')
+
+    def test_broadcast_groups(self):
+        payload = b'hello, hello, hello, hello!'
+        plain = [self._connect() for _ in range(3)]
+        shared = [self._connect(PerMessageDeflate(True, True, False, 15, 15, 8)) for _ in range(3)]
+        takeover = self._connect(PerMessageDeflate(True, False, False, 15, 15, 8))
+
+        # connections not open are skipped
+        closing = self._connect()
+        closing.state = closing.STATE_CLOSING
+
+        stats = self.factory.broadcast(payload)
+
+        self.assertEqual(stats['recipients'], 7)
+        self.assertEqual(stats['groups'], 2)
+        self.assertEqual(stats['single'], 1)
+        self.assertTrue(stats['totalTime'] >= 0)
+
+        for p in plain:
+            self.assertEqual(p.transport._written, b'\x81' + bytes(bytearray([len(payload)])) + payload)
+
+        frame = shared[0].transport._written
+        self.assertEqual(self._inflate(frame), payload)
+        for p in shared[1:]:
+            self.assertEqual(p.transport._written, frame)
+
+        self.assertEqual(self._inflate(takeover.transport._written), payload)
+        self.assertEqual(closing.transport._written, b'')
+
+    def test_broadcast_connections(self):
+        p1 = self._connect()
+        p2 = self._connect()
+        stats = self.factory.broadcast(b'x', isBinary=True, connections=[p2])
+        self.assertEqual(stats['recipients'], 1)
+        self.assertEqual(p1.transport._written, b'')
+        self.assertEqual(p2.transport._written, b'\x82\x01x')
+
+    def test_broadcast_do_not_compress(self):
+        p = self._connect(PerMessageDeflate(True, False, False, 15, 15, 8))
+        self.factory.broadcast(b'x', doNotCompress=True)
+        self.assertEqual(p.transport._written, b'\x81\x01x')
+
+    def test_prepared_message_compressed_once(self):
+        payload = b'hello, hello, hello, hello!'
+        msg = self.factory.prepareMessage(payload)
+        p1 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p3 = self._connect(PerMessageDeflate(True, True, False, 10, 15, 8))
+
+        frame = msg.getCompressedFrame(p1._perMessageCompress)
+        self.assertIs(msg.getCompressedFrame(p2._perMessageCompress), frame)
+        self.assertIsNot(msg.getCompressedFrame(p3._perMessageCompress), frame)
+
+        for p in [p1, p2, p3]:
+            p.sendPreparedMessage(msg)
+            self.assertEqual(self._inflate(p.transport._written), payload)
+
+    def test_prepared_message_context_takeover(self):
+        payload = b'hello, hello, hello, hello!'
+        msg = self.factory.prepareMessage(payload)
+        p = self._connect(PerMessageDeflate(True, False, False, 15, 15, 8))
+        self.assertIsNone(msg.getCompressedFrame(p._perMessageCompress))
+
+        p.sendPreparedMessage(msg)
+        self.assertEqual(self._inflate(p.transport._written), payload)
+
+    def test_prepared_message_compress_options(self):
+        payload = b'hello, hello, hello, hello!'
+        msg = self.factory.prepareMessage(payload)
+        p1 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2._perMessageCompress.set_compress_options(level=1, strategy=zlib.Z_HUFFMAN_ONLY)
+
+        frame = msg.getCompressedFrame(p1._perMessageCompress)
+        self.assertNotEqual(msg.getCompressedFrame(p2._perMessageCompress), frame)
+
+        for p in [p1, p2]:
+            p.sendPreparedMessage(msg)
+            self.assertEqual(self._inflate(p.transport._written), payload)
+
+    def test_broadcast_compression_min_size(self):
+        p1 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2.perMessageCompressionMinSize = 64
+
+        stats = self.factory.broadcast(b'hello, hello, hello, hello!')
+        self.assertEqual(stats['groups'], 2)
+        self.assertEqual(self._inflate(p1.transport._written), b'hello, hello, hello, hello!')
+        self.assertEqual(p2.transport._written, b'\x81\x1bhello, hello, hello, hello!')
+
+    def test_compression_max_ratio(self):
+        """
+        Prepared and broadcast messages which do not compress well are sent
+        uncompressed, but still compressed only once.
+        """
+        incompressible = os.urandom(100)
+        uncompressed = b'\x82' + bytes(bytearray([len(incompressible)])) + incompressible
+        p1 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p2 = self._connect(PerMessageDeflate(True, True, False, 15, 15, 8))
+        p1.perMessageCompressionMaxRatio = 0.9
+
+        msg = self.factory.prepareMessage(incompressible, isBinary=True)
+        self.assertEqual(msg.getCompressedFrame(p1._perMessageCompress, 0.9), uncompressed)
+        frame = msg.getCompressedFrame(p2._perMessageCompress)
+        self.assertEqual(frame[0:1], b'\xc2')
+        self.assertEqual(len(msg._compressedFrames), 1)
+
+        p1.sendPreparedMessage(msg)
+        self.assertEqual(p1.transport._written, uncompressed)
+        p2.sendPreparedMessage(msg)
+        self.assertEqual(p2.transport._written, frame)
+
+        for p in [p1, p2]:
+            p.transport._written = b''
+        stats = self.factory.broadcast(incompressible, isBinary=True)
+        self.assertEqual(stats['groups'], 2)
+        self.assertEqual(p1.transport._written, uncompressed)
+        self.assertEqual(p2.transport._written, frame)
+
+    def test_compression_pool(self):
+        self.factory.setProtocolOptions(perMessageCompressionPoolSize=4)
+        pool = self.factory.getPerMessageCompressionPool()
+        self.assertIs(self.factory.getPerMessageCompressionPool(), pool)
+        self.assertEqual(pool.max_size, 4)
+
+        payload = b'hello, hello, hello, hello!'
+        connections = [self._connect(PerMessageDeflate(True, True, False, 15, 15, 8)) for _ in range(3)]
+        for p in connections:
+            p._perMessageCompress.set_pool(pool)
+            p.sendMessage(payload)
+            self.assertEqual(self._inflate(p.transport._written), payload)
+
+        self.assertEqual(pool.misses, 1)
+        self.assertEqual(pool.hits, 2)
+
+    def test_connection_lost_untracked(self):
+        p = self._connect()
+        p._onClose = Mock()
+        p._connectionLost(None)
+        self.assertNotIn(p, self.factory._openConnections)
@@ -0,0 +1,94 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+from __future__ import absolute_import
+
+import unittest2 as unittest
+
+from autobahn.websocket import utf8validator
+from autobahn.websocket.utf8validator import Utf8Validator
+
+# (chunks, expected results of validating the chunks one after another)
+CASES = [
+    # pure ASCII, long enough to take accelerated paths
+    ([b'a' * 1000], [(True, True, 1000, 1000)]),
+
+    # multi-octet code points split across chunks
+    ([b'x' * 200 + u'€'.encode('utf8')[:2], u'€'.encode('utf8')[2:] + b'y' * 200],
+     [(True, False, 202, 202), (True, True, 201, 403)]),
+
+    # 4 octet code points amidst ASCII
+    ([(u'{"key": "\U0001F600"}' * 20).encode('utf8')],
+     [(True, True, 300, 300)]),
+
+    # invalid octet after a long run of ASCII
+    ([b'x' * 300 + b'\xff' + b'y' * 10], [(False, False, 300, 300)]),
+
+    # invalid octet in a second chunk
+    ([b'x' * 300, b'y' * 150 + b'\xc0\xaf'], [(True, True, 300, 300), (False, False, 150, 450)]),
+
+    # truncated code point followed by ASCII
+    ([b'\xc3' + b'a' * 300], [(False, False, 1, 1)]),
+
+    # UTF-16 surrogates are not valid in UTF-8
+    ([b'\xed\xa0\x80' + b'a' * 200], [(False, False, 1, 1)]),
+
+    # small chunks
+    ([b'', b'a', u'ä'.encode('utf8')], [(True, True, 0, 0), (True, True, 1, 1), (True, True, 2, 3)]),
+]
+
+
+class Utf8ValidatorTests(unittest.TestCase):
+
+    def test_accelerator(self):
+        self.assertIn(utf8validator.ACCELERATOR, [u'wsaccel', u'numpy', u'python'])
+
+    def test_validate(self):
+        for chunks, expected in CASES:
+            validator = Utf8Validator()
+            results = [validator.validate(chunk) for chunk in chunks]
+            self.assertEqual(results, expected)
+
+    def test_validate_memoryview(self):
+        for chunks, expected in CASES:
+            validator = Utf8Validator()
+            results = [validator.validate(memoryview(chunk)) for chunk in chunks]
+            self.assertEqual(results, expected)
+
+    def test_validate_octet_by_octet(self):
+        data = (u'hällo w€rld \U0001F600 ' * 20).encode('utf8')
+        validator = Utf8Validator()
+        for i in range(len(data)):
+            valid, _, _, index = validator.validate(data[i:i + 1])
+            self.assertTrue(valid)
+            self.assertEqual(index, i + 1)
+        self.assertEqual(validator.validate(b''), (True, True, 0, len(data)))
+
+    def test_reset(self):
+        validator = Utf8Validator()
+        validator.validate(b'x' * 300 + b'\xff')
+        validator.reset()
+        self.assertEqual(validator.validate(b'x' * 300), (True, True, 300, 300))
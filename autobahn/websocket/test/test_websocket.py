@@ -33,6 +33,7 @@ if os.environ.get('USE_TWISTED', False):
     from twisted.trial import unittest
     from twisted.internet.address import IPv4Address
     from twisted.internet.task import Clock
+    from twisted.test.proto_helpers import StringTransport
     from six import PY3
 
     from autobahn.twisted.websocket import WebSocketServerProtocol
@@ -280,3 +281,174 @@ if os.environ.get('USE_TWISTED', False):
 
                 # which should have cancelled the call
                 self.assertTrue(timeout_call.cancelled)
+
+    class TestCoalesceWrites(unittest.TestCase):
+
+        def setUp(self):
+            self.factory = WebSocketServerFactory(protocols=['wamp.2.json'])
+            self.factory.protocol = WebSocketServerProtocol
+            self.factory.setProtocolOptions(coalesceWrites=True, coalesceWritesMaxSize=100)
+            self.factory.doStart()
+
+            self.proto = self.factory.buildProtocol(IPv4Address('TCP', '127.0.0.1', 65534))
+            self.transport = MagicMock()
+            self.proto.transport = self.transport
+            self.proto.connectionMade()
+
+            # get to STATE_OPEN (the handshake response is coalesced too)
+            with replace_loop(Clock()) as reactor:
+                self.proto.data = mock_handshake_client
+                self.proto.processHandshake()
+                reactor.advance(0)
+            self.assertEqual(self.proto.state, WebSocketServerProtocol.STATE_OPEN)
+            self.transport.reset_mock()
+
+        def tearDown(self):
+            for call in [self.proto.openHandshakeTimeoutCall, self.proto.closeHandshakeTimeoutCall]:
+                if call is not None and call.active():
+                    call.cancel()
+            self.factory.doStop()
+            del self.factory
+            del self.proto
+
+        def written(self):
+            return [c[0][0] for c in self.transport.write.call_args_list]
+
+        def test_coalesce_per_tick(self):
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a')
+                self.proto.sendMessage(b'b')
+                self.proto.sendMessage(b'c')
+                self.assertEqual(self.written(), [])
+                self.assertEqual(len(reactor.calls), 1)
+
+                reactor.advance(0)
+                self.assertEqual(self.written(), [b'\x81\x01a\x81\x01b\x81\x01c'])
+                self.assertEqual(len(reactor.calls), 0)
+
+        def test_coalesce_max_size(self):
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a' * 60)
+                self.proto.sendMessage(b'b' * 60)
+                self.assertEqual(self.written(), [b'\x81\x3c' + b'a' * 60 + b'\x81\x3c' + b'b' * 60])
+
+                # flushing cancelled the timer
+                self.assertEqual(len(reactor.calls), 0)
+
+        def test_coalesce_max_delay(self):
+            self.proto.coalesceWritesMaxDelay = 0.01
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a')
+                reactor.advance(0.005)
+                self.proto.sendMessage(b'b')
+                self.assertEqual(self.written(), [])
+
+                reactor.advance(0.005)
+                self.assertEqual(self.written(), [b'\x81\x01a\x81\x01b'])
+
+        def test_coalesce_sync(self):
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a')
+                self.proto.sendMessage(b'b', sync=True)
+                self.proto.sendMessage(b'c')
+
+                # coalesced octets go out before anything queued
+                self.assertEqual(self.written(), [b'\x81\x01a', b'\x81\x01b'])
+
+                # .. and anything after that
+                reactor.advance(1)
+                self.assertEqual(self.written(), [b'\x81\x01a', b'\x81\x01b', b'\x81\x01c'])
+                self.assertEqual(len(reactor.calls), 0)
+
+        def test_coalesce_drop_connection(self):
+            with replace_loop(Clock()):
+                self.proto.sendMessage(b'a')
+                self.proto.dropConnection()
+                self.assertEqual(self.written(), [b'\x81\x01a'])
+                self.assertTrue(self.transport.loseConnection.called)
+
+    class TestSendQueue(unittest.TestCase):
+
+        def setUp(self):
+            self.factory = WebSocketServerFactory(protocols=['wamp.2.json'])
+            self.factory.protocol = WebSocketServerProtocol
+            self.factory.doStart()
+
+            self.proto = self.factory.buildProtocol(IPv4Address('TCP', '127.0.0.1', 65534))
+            self.transport = MagicMock()
+            self.proto.transport = self.transport
+            self.proto.connectionMade()
+
+            self.proto.data = mock_handshake_client
+            self.proto.processHandshake()
+            self.assertEqual(self.proto.state, WebSocketServerProtocol.STATE_OPEN)
+            self.transport.reset_mock()
+
+        def tearDown(self):
+            if self.proto.openHandshakeTimeoutCall:
+                self.proto.openHandshakeTimeoutCall.cancel()
+            self.factory.doStop()
+            del self.factory
+            del self.proto
+
+        def written(self):
+            return [c[0][0] for c in self.transport.write.call_args_list]
+
+        def reenter(self, reactor):
+            # like a reactor iteration: calls scheduled meanwhile are run on
+            # the next iteration only (unlike with Clock.advance)
+            calls = list(reactor.calls)
+            for call in calls:
+                reactor.calls.remove(call)
+                call.func(*call.args, **call.kw)
+
+        def test_batch_non_sync(self):
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a', sync=True)
+                self.proto.sendMessage(b'b', sync=True)
+                self.proto.sendMessage(b'c')
+                self.proto.sendMessage(b'd')
+                self.proto.sendMessage(b'e', sync=True)
+                self.assertEqual(self.written(), [b'\x81\x01a'])
+
+                # everything queued meanwhile is written after reentering the
+                # reactor once, with consecutive non-synched entries at once
+                self.reenter(reactor)
+                self.assertEqual(self.written()[1:], [b'\x81\x01b', b'\x81\x01c\x81\x01d', b'\x81\x01e'])
+
+                self.reenter(reactor)
+                self.assertEqual(len(reactor.calls), 0)
+                self.assertFalse(self.proto.triggered)
+
+        def test_chopped_single_timer(self):
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendFrame(opcode=2, payload=b'abcdef', chopsize=2)
+                self.assertEqual(self.written(), [b'\x82\x06', b'ab', b'cd', b'ef'])
+                self.assertEqual(len(reactor.calls), 1)
+
+                self.reenter(reactor)
+                self.assertEqual(len(reactor.calls), 0)
+                self.assertFalse(self.proto.triggered)
+
+        def test_register_producer(self):
+            """
+            Application code can register a producer with the transport while
+            the send queue is being written out.
+            """
+            self.transport = StringTransport()
+            self.proto.transport = self.transport
+
+            with replace_loop(Clock()) as reactor:
+                self.proto.sendMessage(b'a', sync=True)
+                self.proto.sendMessage(b'b', sync=True)
+                self.assertEqual(self.transport.value(), b'\x81\x01a')
+
+                producer = MagicMock()
+                self.transport.registerProducer(producer, True)
+                self.assertIs(self.transport.producer, producer)
+
+                for _ in range(2):
+                    self.reenter(reactor)
+                self.assertEqual(self.transport.value(), b'\x81\x01a\x81\x01b')
+                self.assertEqual(len(reactor.calls), 0)
+                self.assertIs(self.transport.producer, producer)
@@ -0,0 +1,99 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) Crossbar.io Technologies GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+from __future__ import absolute_import
+
+import os
+import unittest2 as unittest
+
+from autobahn.websocket import xormasker
+
+
+def _xor(data, mask):
+    return bytes(bytearray(b ^ bytearray(mask)[i & 3] for i, b in enumerate(bytearray(data))))
+
+
+@unittest.skipIf(not hasattr(xormasker, 'XorMaskerBigInt'), 'pure Python XorMaskerBigInt not in use')
+class XorMaskerBigIntTests(unittest.TestCase):
+
+    def test_process(self):
+        mask = os.urandom(4)
+        for n in [0, 1, 3, 4, 5, 127, 128, 1000]:
+            data = os.urandom(n)
+            masker = xormasker.XorMaskerBigInt(mask)
+            self.assertEqual(masker.process(data), _xor(data, mask))
+            self.assertEqual(masker.pointer(), n)
+
+    def test_process_unaligned_chunks(self):
+        mask = os.urandom(4)
+        data = os.urandom(1000)
+        masker = xormasker.XorMaskerBigInt(mask)
+        chunks = []
+        i = 0
+        for k in [1, 2, 3, 5, 7, 11, 13, 0, 17, 19, 922]:
+            chunks.append(masker.process(data[i:i + k]))
+            i += k
+        self.assertEqual(b''.join(chunks), _xor(data, mask))
+        self.assertEqual(masker.pointer(), 1000)
+
+    def test_reset(self):
+        mask = os.urandom(4)
+        data = os.urandom(10)
+        masker = xormasker.XorMaskerBigInt(mask)
+        masker.process(data[:3])
+        masker.reset()
+        self.assertEqual(masker.pointer(), 0)
+        self.assertEqual(masker.process(data), _xor(data, mask))
+
+
+@unittest.skipIf(not hasattr(xormasker, 'XorMaskerNumpy'), 'NumPy not available')
+class XorMaskerNumpyTests(unittest.TestCase):
+
+    def test_process(self):
+        mask = os.urandom(4)
+        for n in [0, 1, 3, 4, 5, 7, 8, 9, 127, 128, 1000, 4099]:
+            data = os.urandom(n)
+            masker = xormasker.XorMaskerNumpy(mask)
+            self.assertEqual(masker.process(data), _xor(data, mask))
+            self.assertEqual(masker.pointer(), n)
+
+    def test_process_unaligned_chunks(self):
+        mask = os.urandom(4)
+        data = os.urandom(3000)
+        masker = xormasker.XorMaskerNumpy(mask)
+        chunks = []
+        i = 0
+        for k in [1, 2, 3, 5, 7, 11, 13, 0, 17, 19, 1001, 1921]:
+            chunks.append(masker.process(data[i:i + k]))
+            i += k
+        self.assertEqual(b''.join(chunks), _xor(data, mask))
+        self.assertEqual(masker.pointer(), 3000)
+
+    def test_process_memoryview(self):
+        mask = os.urandom(4)
+        data = os.urandom(2000)
+        masker = xormasker.XorMaskerNumpy(mask)
+        self.assertEqual(masker.process(memoryview(data)[1:]), _xor(data[1:], mask))
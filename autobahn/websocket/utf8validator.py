@@ -28,8 +28,19 @@
 # "Flexible and Economical UTF-8 Decoder" by Bjoern Hoehrmann
 # bjoern@hoehrmann.de, http://bjoern.hoehrmann.de/utf-8/decoder/dfa/
 
+import os
+
 __all__ = ("Utf8Validator",)
 
+# Accelerator to use for UTF-8 validation: "wsaccel", "numpy" or "python". When
+# not set explicitly via the environment, the first one available is used.
+_ACCELERATOR_WANTED = os.environ.get('AUTOBAHN_ACCELERATOR', None)
+
+ACCELERATOR = None
+"""
+The accelerator actually in use for UTF-8 validation: ``u'wsaccel'``, ``u'numpy'`` or ``u'python'``.
+"""
+
 
 # DFA transitions
 UTF8VALIDATOR_DFA = (
@@ -55,8 +66,13 @@ UTF8_REJECT = 1
 
 # use Cython implementation of UTF8 validator if available
 try:
+    if _ACCELERATOR_WANTED not in (None, 'wsaccel'):
+        raise ImportError('wsaccel not selected')
+
     from wsaccel.utf8validator import Utf8Validator
 
+    ACCELERATOR = u'wsaccel'
+
 except ImportError:
 
     # Fallback to pure Python implementation - also for PyPy.
@@ -235,3 +251,131 @@ except ImportError:
                 self._state = state
                 self._index += l
                 return True, state == UTF8_ACCEPT, l, self._index
+
+    if six.PY3:
+
+        import platform
+        import re
+
+        if hasattr(bytes, 'isascii'):
+
+            def _isascii(ba):
+                if isinstance(ba, memoryview):
+                    ba = ba.tobytes()
+                return ba.isascii()
+
+        else:
+
+            def _isascii(ba):
+                return False
+
+        # PyPy JITs the plain DFA loop just fine, but on CPython, we want to
+        # get through runs of ASCII octets at C speed
+        if platform.python_implementation() == 'CPython':
+
+            _ASCII_RUN = re.compile(b'[\x00-\x7f]+')
+
+            _Utf8ValidatorDFA = Utf8Validator
+
+            class Utf8Validator(_Utf8ValidatorDFA):
+                """
+                Incremental UTF-8 validator which skips over runs of ASCII octets
+                (all of the chunk in the best case) in C, and only runs the DFA from
+                the first non-ASCII octet of a run on.
+                """
+
+                __slots__ = ()
+
+                def validate(self, ba):
+                    """
+                    Incrementally validate a chunk of bytes provided as string.
+
+                    See :meth:`_Utf8ValidatorDFA.validate`.
+                    """
+                    l = len(ba)
+                    state = self._state
+                    if state == UTF8_ACCEPT and _isascii(ba):
+                        self._index += l
+                        return True, True, l, self._index
+
+                    i = 0
+                    while i < l:
+                        if state == UTF8_ACCEPT:
+                            m = _ASCII_RUN.match(ba, i)
+                            if m is not None:
+                                i = m.end()
+                                if i == l:
+                                    break
+                        state = UTF8VALIDATOR_DFA_S[256 + (state << 4) + UTF8VALIDATOR_DFA_S[ba[i]]]
+                        if state == UTF8_REJECT:
+                            self._state = state
+                            self._index += i
+                            return False, False, i, self._index
+                        i += 1
+                    self._state = state
+                    self._index += l
+                    return True, state == UTF8_ACCEPT, l, self._index
+
+    ACCELERATOR = u'python'
+
+    if six.PY3 and _ACCELERATOR_WANTED in (None, 'numpy'):
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        if numpy is not None:
+
+            _Utf8ValidatorPython = Utf8Validator
+
+            # below this chunk length, the fixed overhead of calling
+            # into NumPy outweighs skipping ASCII octets
+            _NUMPY_MIN_LENGTH = 128
+
+            class Utf8Validator(_Utf8ValidatorPython):
+                """
+                Incremental UTF-8 validator which uses NumPy to locate all non-ASCII
+                octets in a chunk up front. Runs of ASCII octets between code points
+                are then skipped, and only the remaining octets go through the DFA.
+                """
+
+                __slots__ = ()
+
+                def validate(self, ba):
+                    """
+                    Incrementally validate a chunk of bytes provided as string.
+
+                    See :meth:`_Utf8ValidatorPython.validate`.
+                    """
+                    l = len(ba)
+                    if l < _NUMPY_MIN_LENGTH:
+                        return _Utf8ValidatorPython.validate(self, ba)
+
+                    if self._state == UTF8_ACCEPT and _isascii(ba):
+                        self._index += l
+                        return True, True, l, self._index
+
+                    nonascii = numpy.flatnonzero(numpy.frombuffer(ba, dtype=numpy.uint8) & 0x80).tolist()
+                    n = len(nonascii)
+                    k = 0
+                    i = 0
+                    state = self._state
+                    while i < l:
+                        if state == UTF8_ACCEPT:
+                            # skip run of ASCII octets up to next non-ASCII octet
+                            while k < n and nonascii[k] < i:
+                                k += 1
+                            if k == n:
+                                break
+                            i = nonascii[k]
+                        state = UTF8VALIDATOR_DFA_S[256 + (state << 4) + UTF8VALIDATOR_DFA_S[ba[i]]]
+                        if state == UTF8_REJECT:
+                            self._state = state
+                            self._index += i
+                            return False, False, i, self._index
+                        i += 1
+                    self._state = state
+                    self._index += l
+                    return True, state == UTF8_ACCEPT, l, self._index
+
+            ACCELERATOR = u'numpy'
@@ -24,16 +24,31 @@
 #
 ###############################################################################
 
+import os
 import six
 
+# Accelerator to use for masking: "wsaccel", "numpy" or "python". When not
+# set explicitly via the environment, the first one available is used.
+_ACCELERATOR_WANTED = os.environ.get('AUTOBAHN_ACCELERATOR', None)
+
+ACCELERATOR = None
+"""
+The accelerator actually in use for masking: ``u'wsaccel'``, ``u'numpy'`` or ``u'python'``.
+"""
+
 try:
     # use Cython implementation of XorMasker validator if available
 
+    if _ACCELERATOR_WANTED not in (None, 'wsaccel'):
+        raise ImportError('wsaccel not selected')
+
     from wsaccel.xormask import XorMaskerNull
     # noinspection PyUnresolvedReferences
     from wsaccel.xormask import createXorMasker
     create_xor_masker = createXorMasker
 
+    ACCELERATOR = u'wsaccel'
+
 except ImportError:
 
     # fallback to pure Python implementation (this is faster on PyPy than above!)
@@ -47,6 +62,7 @@ except ImportError:
         # noinspection PyShadowingBuiltins
         xrange = range
 
+    import platform
     from array import array
 
     class XorMaskerNull(object):
@@ -132,8 +148,122 @@ except ImportError:
             else:
                 return payload.tostring()
 
-    def create_xor_masker(mask, length=None):
-        if length is None or length < 128:
-            return XorMaskerSimple(mask)
-        else:
-            return XorMaskerShifted1(mask)
+    if six.PY3:
+
+        class XorMaskerBigInt(object):
+            """
+            Masks a whole chunk in one go by converting the chunk and the
+            (repeated) mask to integers and XOR'ing those. This moves the per-octet
+            work from the interpreter loop into CPython's C-level integer code.
+            """
+
+            __slots__ = ('_ptr', '_msk')
+
+            def __init__(self, mask):
+                assert len(mask) == 4
+                self._ptr = 0
+                self._msk = bytes(mask)
+
+            def pointer(self):
+                return self._ptr
+
+            def reset(self):
+                self._ptr = 0
+
+            def process(self, data):
+                dlen = len(data)
+                if dlen == 0:
+                    return b''
+
+                # rotate the mask so that continuation chunks which do not
+                # start on a 4-octet boundary are masked correctly
+                shift = self._ptr & 3
+                msk = self._msk[shift:] + self._msk[:shift]
+                msk = (msk * ((dlen >> 2) + 1))[:dlen]
+
+                self._ptr += dlen
+
+                payload = int.from_bytes(data, 'big') ^ int.from_bytes(msk, 'big')
+                return payload.to_bytes(dlen, 'big')
+
+    if six.PY3 and platform.python_implementation() == 'CPython':
+
+        def create_xor_masker(mask, length=None):
+            return XorMaskerBigInt(mask)
+
+    else:
+
+        # on PyPy, the simple loops below are JITted into fast code
+        def create_xor_masker(mask, length=None):
+            if length is None or length < 128:
+                return XorMaskerSimple(mask)
+            else:
+                return XorMaskerShifted1(mask)
+
+    ACCELERATOR = u'python'
+
+    if _ACCELERATOR_WANTED in (None, 'numpy'):
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        if numpy is not None:
+
+            class XorMaskerNumpy(object):
+                """
+                Masks chunks using NumPy, XOR'ing 8 octets at a time.
+                """
+
+                __slots__ = ('_ptr', '_msk')
+
+                def __init__(self, mask):
+                    assert len(mask) == 4
+                    self._ptr = 0
+                    self._msk = bytes(bytearray(mask))
+
+                def pointer(self):
+                    return self._ptr
+
+                def reset(self):
+                    self._ptr = 0
+
+                def process(self, data):
+                    dlen = len(data)
+                    if dlen == 0:
+                        return b''
+
+                    # rotate the mask so that continuation chunks which do not
+                    # start on a 4-octet boundary are masked correctly
+                    shift = self._ptr & 3
+                    msk = self._msk[shift:] + self._msk[:shift]
+                    msk = numpy.frombuffer(msk + msk, dtype=numpy.uint8)
+
+                    self._ptr += dlen
+
+                    payload = numpy.empty(dlen, dtype=numpy.uint8)
+                    words = dlen >> 3
+                    if words:
+                        numpy.bitwise_xor(numpy.frombuffer(data, dtype=numpy.uint64, count=words),
+                                          msk.view(numpy.uint64)[0],
+                                          out=payload[:words << 3].view(numpy.uint64))
+                    rest = dlen & 7
+                    if rest:
+                        numpy.bitwise_xor(numpy.frombuffer(data, dtype=numpy.uint8, offset=words << 3),
+                                          msk[:rest],
+                                          out=payload[words << 3:])
+                    return payload.tobytes()
+
+            _create_xor_masker_python = create_xor_masker
+
+            # below this payload length, the fixed overhead of calling
+            # into NumPy outweighs its faster processing of octets
+            _NUMPY_MIN_LENGTH = 1024
+
+            def create_xor_masker(mask, length=None):
+                if length is not None and length >= _NUMPY_MIN_LENGTH:
+                    return XorMaskerNumpy(mask)
+                else:
+                    return _create_xor_masker_python(mask, length)
+
+            ACCELERATOR = u'numpy'
@@ -89,13 +89,16 @@ else:
 # lz4: do we need that anyway?
 extras_require_compress = [
     "python-snappy>=0.5",       # BSD license
-    "lz4>=0.7.0"                # BSD license
+    "lz4>=0.7.0",               # BSD license
+    "zstandard>=0.9.0"          # BSD license
 ]
 
 # non-JSON WAMP serialization support (namely MsgPack, CBOR and UBJSON)
 os.environ['PYUBJSON_NO_EXTENSION'] = '1'  # enforce use of pure Python py-ubjson (no Cython)
 extras_require_serialization = [
+    "msgpack>=0.6.1",           # Apache 2.0 license
     "u-msgpack-python>=2.1",    # MIT license
+    "cbor2>=5.0.0",             # MIT license
     "cbor>=1.0.0",              # Apache 2.0 license
     "py-ubjson>=0.8.4"          # Apache 2.0 license
 ]